@@ -1,51 +1,48 @@
 import os
+import sys
+import time
+import argparse
 import pandas as pd
-import mysql.connector
 from mysql.connector import Error
 from tqdm import tqdm
-import glob
 import csv
 import re
 import chardet
-from sqlalchemy import create_engine
 import numpy as np
 
-def create_connection(host_name, user_name, user_password, db_name):
-    """Create a connection to MySQL database"""
-    connection = None
-    try:
-        connection = mysql.connector.connect(
-            host=host_name,
-            user=user_name,
-            passwd=user_password,
-            database=db_name,
-            charset='utf8mb4',  # This is correct for MySQL
-            use_unicode=True
-        )
-        print("MySQL Database connection successful")
-    except Error as e:
-        print(f"The error '{e}' occurred")
-    return connection
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import create_connection, load_db_config
+from batch_insert import PacketBatchInserter
+from chunk_control import ChunkSizeController, Rechunker, error_kind
+from csv_source import (list_csv_files, csv_stem, open_csv_text, sample_csv_head, read_csv_arrow,
+                        PARSER_ENGINES, DEFAULT_PARSER_ENGINE)
 
 def get_csv_files(folder_path):
-    """Get all CSV files in the specified folder"""
-    return glob.glob(os.path.join(folder_path, "**", "*.csv"), recursive=True)
+    """Get all CSV files (plain, .gz, .bz2 or .zst) in the specified folder"""
+    return list_csv_files(folder_path)
 
 def detect_file_encoding(file_path):
     """Detect the encoding of a file"""
     try:
-        with open(file_path, 'rb') as f:
-            sample = f.read(10000)  # Read first 10KB
-            result = chardet.detect(sample)
-            encoding = result['encoding'] if result['encoding'] else 'utf-8'
-            # Make sure we never return utf8mb4 as it's not a valid Python encoding
-            if encoding.lower() == 'utf8mb4':
-                encoding = 'utf-8'
-            return encoding
+        sample = sample_csv_head(file_path, 10000)[0][:10000]  # First 10KB, decompressed
+        result = chardet.detect(sample)
+        encoding = result['encoding'] if result['encoding'] else 'utf-8'
+        # Make sure we never return utf8mb4 as it's not a valid Python encoding
+        if encoding.lower() == 'utf8mb4':
+            encoding = 'utf-8'
+        return encoding
     except Exception as e:
         print(f"Error detecting encoding: {e}")
         return 'utf-8'  # Default to utf-8
 
+def read_csv_in_chunks(csv_file, chunk_size, encoding, engine=DEFAULT_PARSER_ENGINE):
+    """Read a CSV file in chunks with pandas' C parser or Arrow's multithreaded reader"""
+    if engine == 'pyarrow':
+        return read_csv_arrow(csv_file, chunk_size, encoding=encoding)
+    return pd.read_csv(csv_file, chunksize=chunk_size, encoding=encoding,
+                       on_bad_lines='skip', low_memory=False)
+
 def sanitize_table_name(name):
     """Sanitize table name to be MySQL compatible"""
     # Replace non-alphanumeric characters with underscore
@@ -82,7 +79,7 @@ def sanitize_column_name(name):
     
     return sanitized
 
-def infer_schema_from_csv(csv_file):
+def infer_schema_from_csv(csv_file, engine=DEFAULT_PARSER_ENGINE):
     """Infer schema (column names and types) from CSV file"""
     try:
         # Detect file encoding
@@ -95,7 +92,7 @@ def infer_schema_from_csv(csv_file):
         
         # Count total rows for progress reporting
         try:
-            with open(csv_file, 'r', encoding=encoding, errors='replace') as f:
+            with open_csv_text(csv_file, encoding=encoding, errors='replace') as f:
                 total_rows = sum(1 for _ in f) - 1  # Subtract header
         except Exception as e:
             print(f"Error counting rows: {e}")
@@ -106,8 +103,7 @@ def infer_schema_from_csv(csv_file):
         column_types = {}
         
         with tqdm(total=total_rows, desc="Inferring schema") as pbar:
-            for chunk in pd.read_csv(csv_file, chunksize=chunk_size, encoding=encoding, 
-                                     on_bad_lines='skip', low_memory=False):
+            for chunk in read_csv_in_chunks(csv_file, chunk_size, encoding, engine):
                 
                 # Sanitize column names
                 sanitized_columns = [sanitize_column_name(col) for col in chunk.columns]
@@ -157,7 +153,7 @@ def infer_schema_from_csv(csv_file):
         print(f"Error inferring schema: {e}")
         # Fallback: use basic schema
         try:
-            with open(csv_file, 'r', encoding='utf-8', errors='replace') as f:
+            with open_csv_text(csv_file, encoding='utf-8', errors='replace') as f:
                 reader = csv.reader(f)
                 header = next(reader)
                 columns = []
@@ -193,7 +189,7 @@ def create_table(connection, table_name, columns):
     finally:
         cursor.close()
 
-def import_csv_to_table(connection, csv_file, table_name):
+def import_csv_to_table(connection, csv_file, table_name, engine=DEFAULT_PARSER_ENGINE):
     """Import data from CSV file to MySQL table"""
     try:
         # Detect file encoding
@@ -205,26 +201,17 @@ def import_csv_to_table(connection, csv_file, table_name):
         
         # Get total rows for progress bar
         try:
-            with open(csv_file, 'r', encoding=encoding, errors='replace') as f:
+            with open_csv_text(csv_file, encoding=encoding, errors='replace') as f:
                 total_rows = sum(1 for _ in f) - 1  # Subtract header
         except Exception as e:
             print(f"Error counting rows: {e}")
             total_rows = None
         
-        # Create SQLAlchemy engine for efficient import
-        user = connection.user
-        password = connection._password
-        host = connection._host
-        database = connection._database
-        
-        engine_url = f"mysql+mysqlconnector://{user}:{password}@{host}/{database}"
-        engine = create_engine(engine_url)
+        # Multi-row prepared INSERTs, each filled up to max_allowed_packet
+        inserter = None
         
-        # Read and import in chunks with progress bar
-        chunk_size = 10000
-        with tqdm(total=total_rows, desc=f"Importing {table_name}") as pbar:
-            for chunk in pd.read_csv(csv_file, chunksize=chunk_size, encoding=encoding, 
-                                     on_bad_lines='skip', low_memory=False):
+        def cleaned_chunks():
+            for chunk in read_csv_in_chunks(csv_file, chunk_size, encoding, engine):
                 # Sanitize column names
                 sanitized_columns = [sanitize_column_name(col) for col in chunk.columns]
                 chunk.columns = sanitized_columns
@@ -232,14 +219,47 @@ def import_csv_to_table(connection, csv_file, table_name):
                 # Replace inf values with NaN
                 for col in chunk.select_dtypes(include=['float', 'float64']).columns:
                     chunk[col] = chunk[col].replace([np.inf, -np.inf], np.nan)
-                
-                # Import chunk to database
-                chunk.to_sql(name=table_name, con=engine, if_exists='append', 
-                           index=False, method='multi')
+                yield chunk
+        
+        # Read in chunks, insert and commit in batches sized to the measured insert latency
+        chunk_size = 10000
+        controller = ChunkSizeController(table_name, initial=chunk_size)
+        batches = Rechunker(cleaned_chunks(), controller)
+        retries = 0
+        with tqdm(total=total_rows, desc=f"Importing {table_name}") as pbar:
+            for batch in batches:
+                if inserter is None:
+                    inserter = PacketBatchInserter(connection, table_name, batch.columns)
+                started = time.perf_counter()
+                try:
+                    # Import batch to database
+                    inserter.insert(batch)
+                    inserter.flush()
+                    connection.commit()
+                except Error as e:
+                    # Lock waits and oversized packets: roll back this batch and retry it smaller
+                    kind = error_kind(e)
+                    if kind is None or retries == 5:
+                        raise
+                    retries += 1
+                    connection.rollback()
+                    inserter.close()
+                    controller.record_error(kind)
+                    print(f"{kind} error inserting {len(batch)} rows, retrying at {controller.size}: {e}")
+                    batches.push_back(batch)
+                    continue
+                retries = 0
+                controller.record(len(batch), time.perf_counter() - started)
                 
                 # Update progress
                 if pbar.total:
-                    pbar.update(len(chunk))
+                    pbar.update(len(batch))
+        
+        if inserter is not None:
+            inserter.close()
+            print(f"Sent {inserter.rows} rows in {inserter.statements} INSERT statements "
+                  f"of up to {inserter.rows_per_statement} rows")
+            print(controller.describe())
                     
         print(f"Data imported successfully into table '{table_name}'")
         return True
@@ -249,15 +269,17 @@ def import_csv_to_table(connection, csv_file, table_name):
         return False
 
 def main():
-    # Database connection parameters
-    host = "localhost"
-    user = "ali"
-    password = "admin"
-    database = "UNOX"
+    parser = argparse.ArgumentParser(description='Create one table per CSV file and import it')
+    parser.add_argument('--engine', choices=PARSER_ENGINES, default=DEFAULT_PARSER_ENGINE,
+                        help="CSV parser: pandas' C parser, or pyarrow's multithreaded reader")
+    args = parser.parse_args()
+
+    # Database connection parameters come from db_config.ini / SRM_DB_* variables
+    database = load_db_config()['v1_database']
     dataset_folder = "dataset"
     
     # Create connection to MySQL
-    connection = create_connection(host, user, password, database)
+    connection = create_connection(database)
     
     if connection is not None:
         try:
@@ -273,13 +295,13 @@ def main():
             # Process each CSV file
             for csv_file in tqdm(csv_files, desc="Processing CSV files"):
                 # Generate table name from file name
-                base_name = os.path.splitext(os.path.basename(csv_file))[0]
+                base_name = csv_stem(csv_file)
                 table_name = sanitize_table_name(base_name)
                 
                 print(f"\nProcessing {csv_file} -> {table_name}")
                 
                 # Infer schema from CSV
-                columns = infer_schema_from_csv(csv_file)
+                columns = infer_schema_from_csv(csv_file, args.engine)
                 
                 if not columns:
                     print(f"Failed to infer schema for {csv_file}, skipping")
@@ -288,7 +310,7 @@ def main():
                 # Create table
                 if create_table(connection, table_name, columns):
                     # Import data
-                    import_csv_to_table(connection, csv_file, table_name)
+                    import_csv_to_table(connection, csv_file, table_name, args.engine)
             
             print("\nAll CSV files processed successfully")
         
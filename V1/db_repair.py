@@ -1,20 +1,12 @@
-import mysql.connector
+import os
+import sys
+import argparse
 from mysql.connector import Error
 
-def create_connection(host_name, user_name, user_password, db_name):
-    """Create a connection to MySQL/MariaDB database."""
-    connection = None
-    try:
-        connection = mysql.connector.connect(
-            host=host_name,
-            user=user_name,
-            passwd=user_password,
-            database=db_name
-        )
-        print("Database connection successful.")
-    except Error as e:
-        print(f"The error '{e}' occurred while connecting.")
-    return connection
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import create_connection, load_db_config
+from migrations import migrate
 
 def add_missing_columns(connection):
     """Add missing columns required for foreign keys to work."""
@@ -187,25 +179,32 @@ def check_db_structure(connection):
         return True
 
 def main():
-    # Adjust these credentials to your environment
-    host = "localhost"
-    user = "ali"
-    password = "admin"
-    database = "UNOX"
+    parser = argparse.ArgumentParser(description='Add the key columns, primary keys and indexes the foreign keys need')
+    parser.add_argument('--reapply', action='store_true',
+                        help='Run every repair statement again instead of only the missing or changed ones')
+    args = parser.parse_args()
+
+    # Credentials come from db_config.ini / SRM_DB_* variables
+    database = load_db_config()['v1_database']
 
     # Connect to the database
-    connection = create_connection(host, user, password, database)
+    connection = create_connection(database)
     if connection is None:
         return
     
-    print("\n=== Step 1: Adding missing columns ===")
-    add_missing_columns(connection)
-    
-    print("\n=== Step 2: Adding primary keys ===")
-    add_primary_keys(connection)
-    
-    print("\n=== Step 3: Adding necessary indexes ===")
-    add_indexes(connection)
+    if args.reapply:
+        print("\n=== Step 1: Adding missing columns ===")
+        add_missing_columns(connection)
+        
+        print("\n=== Step 2: Adding primary keys ===")
+        add_primary_keys(connection)
+        
+        print("\n=== Step 3: Adding necessary indexes ===")
+        add_indexes(connection)
+    else:
+        print("\n=== Steps 1-3: Applying missing columns, primary keys and indexes ===")
+        # Migration 3 is the foreign keys, which foriegn_keys.py adds
+        migrate(connection, target_version=2)
     
     print("\n=== Step 4: Verifying database structure ===")
     check_db_structure(connection)
@@ -1,20 +1,13 @@
-import mysql.connector
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from mysql.connector import Error
 
-def create_connection(host_name, user_name, user_password, db_name):
-    """Create a connection to MySQL/MariaDB database."""
-    connection = None
-    try:
-        connection = mysql.connector.connect(
-            host=host_name,
-            user=user_name,
-            passwd=user_password,
-            database=db_name
-        )
-        print("Database connection successful.")
-    except Error as e:
-        print(f"The error '{e}' occurred while connecting.")
-    return connection
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import create_connection, open_connection, load_db_config
 
 def check_db_structure(connection):
     """
@@ -83,37 +76,63 @@ def check_db_structure(connection):
     cursor.close()
     return not issues_found
 
+# (table, constraint, column, referenced table, referenced column, ON DELETE); every key is ON UPDATE CASCADE
+FOREIGN_KEYS = [
+    # Users related foreign keys
+    ('memberships', 'fk_memberships_users', 'user_id', 'users', 'user_id', 'CASCADE'),
+    ('reviews', 'fk_reviews_users', 'user_id', 'users', 'user_id', 'CASCADE'),
+    ('points_transactions', 'fk_points_transactions_users', 'user_id', 'users', 'user_id', 'CASCADE'),
+    # Movies related foreign keys
+    ('reviews', 'fk_reviews_movies', 'movie_id', 'movies', 'movie_id', 'CASCADE'),
+    ('movie_casts', 'fk_movie_casts_movies', 'movie_id', 'movies', 'movie_id', 'CASCADE'),
+    # Shows related foreign keys
+    ('shows', 'fk_shows_movies', 'movie_id', 'movies', 'movie_id', 'CASCADE'),
+    ('shows', 'fk_shows_screens', 'screen_id', 'screens', 'screen_id', 'CASCADE'),
+    # Seats related foreign keys
+    ('seats', 'fk_seats_screens', 'screen_id', 'screens', 'screen_id', 'CASCADE'),
+    ('show_seats', 'fk_show_seats_shows', 'show_id', 'shows', 'show_id', 'CASCADE'),
+    ('show_seats', 'fk_show_seats_seats', 'seat_id', 'seats', 'seat_id', 'CASCADE'),
+    # Bookings related foreign keys
+    ('bookings', 'fk_bookings_users', 'user_id', 'users', 'user_id', 'CASCADE'),
+    ('bookings', 'fk_bookings_shows', 'show_id', 'shows', 'show_id', 'CASCADE'),
+    # Tickets related foreign keys
+    ('tickets', 'fk_tickets_bookings', 'booking_id', 'bookings', 'booking_id', 'CASCADE'),
+    ('tickets', 'fk_tickets_show_seats', 'show_seat_id', 'show_seats', 'show_seat_id', 'CASCADE'),
+    # Food related foreign keys
+    ('food_item_sizes', 'fk_food_item_sizes_food_items', 'food_item_id', 'food_items', 'food_item_id', 'CASCADE'),
+    ('food_orders', 'fk_food_orders_users', 'user_id', 'users', 'user_id', 'CASCADE'),
+    ('food_order_items', 'fk_food_order_items_food_orders', 'food_order_id', 'food_orders', 'food_order_id', 'CASCADE'),
+    ('food_order_items', 'fk_food_order_items_food_items', 'food_item_id', 'food_items', 'food_item_id', 'CASCADE'),
+    ('food_order_items', 'fk_food_order_items_food_item_sizes', 'size_id', 'food_item_sizes', 'size_id', 'SET NULL'),
+    # Payment related foreign keys
+    ('payments', 'fk_payments_users', 'user_id', 'users', 'user_id', 'CASCADE'),
+    ('payments', 'fk_payments_payment_gateways', 'gateway_id', 'payment_gateways', 'gateway_id', 'SET NULL'),
+    ('payments', 'fk_payments_bookings', 'booking_id', 'bookings', 'booking_id', 'SET NULL'),
+    ('payments', 'fk_payments_food_orders', 'food_order_id', 'food_orders', 'food_order_id', 'SET NULL')
+]
+
+def add_foreign_key_sql(foreign_key, algorithm=None):
+    """ALTER TABLE statement adding one foreign key, optionally with an ALGORITHM clause"""
+    table, name, column, ref_table, ref_column, on_delete = foreign_key
+    statement = f"""
+        ALTER TABLE `{table}`
+        ADD CONSTRAINT `{name}`
+        FOREIGN KEY (`{column}`)
+        REFERENCES `{ref_table}`(`{ref_column}`)
+        ON UPDATE CASCADE
+        ON DELETE {on_delete}"""
+    if algorithm:
+        statement += f",\n        ALGORITHM={algorithm}"
+    return statement.strip()
+
 def drop_foreign_keys(connection):
     """
     Drop existing foreign key constraints before re-adding them.
     This helps when the script needs to be re-run.
     """
-    fk_drops = [
-        # Names of constraints to drop, matching the ones we'll add
-        "ALTER TABLE `memberships` DROP FOREIGN KEY IF EXISTS `fk_memberships_users`",
-        "ALTER TABLE `reviews` DROP FOREIGN KEY IF EXISTS `fk_reviews_users`",
-        "ALTER TABLE `reviews` DROP FOREIGN KEY IF EXISTS `fk_reviews_movies`",
-        "ALTER TABLE `points_transactions` DROP FOREIGN KEY IF EXISTS `fk_points_transactions_users`",
-        "ALTER TABLE `movie_casts` DROP FOREIGN KEY IF EXISTS `fk_movie_casts_movies`",
-        "ALTER TABLE `shows` DROP FOREIGN KEY IF EXISTS `fk_shows_movies`",
-        "ALTER TABLE `shows` DROP FOREIGN KEY IF EXISTS `fk_shows_screens`",
-        "ALTER TABLE `seats` DROP FOREIGN KEY IF EXISTS `fk_seats_screens`",
-        "ALTER TABLE `show_seats` DROP FOREIGN KEY IF EXISTS `fk_show_seats_shows`",
-        "ALTER TABLE `show_seats` DROP FOREIGN KEY IF EXISTS `fk_show_seats_seats`",
-        "ALTER TABLE `bookings` DROP FOREIGN KEY IF EXISTS `fk_bookings_users`",
-        "ALTER TABLE `bookings` DROP FOREIGN KEY IF EXISTS `fk_bookings_shows`",
-        "ALTER TABLE `tickets` DROP FOREIGN KEY IF EXISTS `fk_tickets_bookings`",
-        "ALTER TABLE `tickets` DROP FOREIGN KEY IF EXISTS `fk_tickets_show_seats`",
-        "ALTER TABLE `food_item_sizes` DROP FOREIGN KEY IF EXISTS `fk_food_item_sizes_food_items`",
-        "ALTER TABLE `food_orders` DROP FOREIGN KEY IF EXISTS `fk_food_orders_users`",
-        "ALTER TABLE `food_order_items` DROP FOREIGN KEY IF EXISTS `fk_food_order_items_food_orders`",
-        "ALTER TABLE `food_order_items` DROP FOREIGN KEY IF EXISTS `fk_food_order_items_food_items`",
-        "ALTER TABLE `food_order_items` DROP FOREIGN KEY IF EXISTS `fk_food_order_items_food_item_sizes`",
-        "ALTER TABLE `payments` DROP FOREIGN KEY IF EXISTS `fk_payments_users`",
-        "ALTER TABLE `payments` DROP FOREIGN KEY IF EXISTS `fk_payments_payment_gateways`",
-        "ALTER TABLE `payments` DROP FOREIGN KEY IF EXISTS `fk_payments_bookings`",
-        "ALTER TABLE `payments` DROP FOREIGN KEY IF EXISTS `fk_payments_food_orders`"
-    ]
+    # Names of constraints to drop, matching the ones we'll add
+    fk_drops = [f"ALTER TABLE `{table}` DROP FOREIGN KEY IF EXISTS `{name}`"
+                for table, name, *_ in FOREIGN_KEYS]
     
     cursor = connection.cursor()
     for statement in fk_drops:
@@ -131,236 +150,144 @@ def add_foreign_keys(connection):
     """
     Add foreign key constraints to the movie theater database tables.
     """
-    fk_statements = [
-        # Users related foreign keys
-        """
-        ALTER TABLE `memberships`
-        ADD CONSTRAINT `fk_memberships_users`
-        FOREIGN KEY (`user_id`)
-        REFERENCES `users`(`user_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `reviews`
-        ADD CONSTRAINT `fk_reviews_users`
-        FOREIGN KEY (`user_id`)
-        REFERENCES `users`(`user_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `points_transactions`
-        ADD CONSTRAINT `fk_points_transactions_users`
-        FOREIGN KEY (`user_id`)
-        REFERENCES `users`(`user_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        # Movies related foreign keys
-        """
-        ALTER TABLE `reviews`
-        ADD CONSTRAINT `fk_reviews_movies`
-        FOREIGN KEY (`movie_id`)
-        REFERENCES `movies`(`movie_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `movie_casts`
-        ADD CONSTRAINT `fk_movie_casts_movies`
-        FOREIGN KEY (`movie_id`)
-        REFERENCES `movies`(`movie_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        # Shows related foreign keys
-        """
-        ALTER TABLE `shows`
-        ADD CONSTRAINT `fk_shows_movies`
-        FOREIGN KEY (`movie_id`)
-        REFERENCES `movies`(`movie_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `shows`
-        ADD CONSTRAINT `fk_shows_screens`
-        FOREIGN KEY (`screen_id`)
-        REFERENCES `screens`(`screen_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        # Seats related foreign keys
-        """
-        ALTER TABLE `seats`
-        ADD CONSTRAINT `fk_seats_screens`
-        FOREIGN KEY (`screen_id`)
-        REFERENCES `screens`(`screen_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `show_seats`
-        ADD CONSTRAINT `fk_show_seats_shows`
-        FOREIGN KEY (`show_id`)
-        REFERENCES `shows`(`show_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `show_seats`
-        ADD CONSTRAINT `fk_show_seats_seats`
-        FOREIGN KEY (`seat_id`)
-        REFERENCES `seats`(`seat_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        # Bookings related foreign keys
-        """
-        ALTER TABLE `bookings`
-        ADD CONSTRAINT `fk_bookings_users`
-        FOREIGN KEY (`user_id`)
-        REFERENCES `users`(`user_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `bookings`
-        ADD CONSTRAINT `fk_bookings_shows`
-        FOREIGN KEY (`show_id`)
-        REFERENCES `shows`(`show_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        # Tickets related foreign keys
-        """
-        ALTER TABLE `tickets`
-        ADD CONSTRAINT `fk_tickets_bookings`
-        FOREIGN KEY (`booking_id`)
-        REFERENCES `bookings`(`booking_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `tickets`
-        ADD CONSTRAINT `fk_tickets_show_seats`
-        FOREIGN KEY (`show_seat_id`)
-        REFERENCES `show_seats`(`show_seat_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        # Food related foreign keys
-        """
-        ALTER TABLE `food_item_sizes`
-        ADD CONSTRAINT `fk_food_item_sizes_food_items`
-        FOREIGN KEY (`food_item_id`)
-        REFERENCES `food_items`(`food_item_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `food_orders`
-        ADD CONSTRAINT `fk_food_orders_users`
-        FOREIGN KEY (`user_id`)
-        REFERENCES `users`(`user_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `food_order_items`
-        ADD CONSTRAINT `fk_food_order_items_food_orders`
-        FOREIGN KEY (`food_order_id`)
-        REFERENCES `food_orders`(`food_order_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `food_order_items`
-        ADD CONSTRAINT `fk_food_order_items_food_items`
-        FOREIGN KEY (`food_item_id`)
-        REFERENCES `food_items`(`food_item_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `food_order_items`
-        ADD CONSTRAINT `fk_food_order_items_food_item_sizes`
-        FOREIGN KEY (`size_id`)
-        REFERENCES `food_item_sizes`(`size_id`)
-        ON UPDATE CASCADE
-        ON DELETE SET NULL
-        """,
-        
-        # Payment related foreign keys
-        """
-        ALTER TABLE `payments`
-        ADD CONSTRAINT `fk_payments_users`
-        FOREIGN KEY (`user_id`)
-        REFERENCES `users`(`user_id`)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE
-        """,
-        
-        """
-        ALTER TABLE `payments`
-        ADD CONSTRAINT `fk_payments_payment_gateways`
-        FOREIGN KEY (`gateway_id`)
-        REFERENCES `payment_gateways`(`gateway_id`)
-        ON UPDATE CASCADE
-        ON DELETE SET NULL
-        """,
-        
-        """
-        ALTER TABLE `payments`
-        ADD CONSTRAINT `fk_payments_bookings`
-        FOREIGN KEY (`booking_id`)
-        REFERENCES `bookings`(`booking_id`)
-        ON UPDATE CASCADE
-        ON DELETE SET NULL
-        """,
-        
-        """
-        ALTER TABLE `payments`
-        ADD CONSTRAINT `fk_payments_food_orders`
-        FOREIGN KEY (`food_order_id`)
-        REFERENCES `food_orders`(`food_order_id`)
-        ON UPDATE CASCADE
-        ON DELETE SET NULL
-        """
-    ]
-
     cursor = connection.cursor()
-    for statement in fk_statements:
-        clean_statement = statement.strip()
-        if not clean_statement:
-            continue  # skip empty lines if any
+    for foreign_key in FOREIGN_KEYS:
+        clean_statement = add_foreign_key_sql(foreign_key)
         try:
             print(f"Executing:\n{clean_statement}\n")
+            started = time.perf_counter()
             cursor.execute(clean_statement)
+            print(f"Added {foreign_key[1]} in {time.perf_counter() - started:.2f}s\n")
         except Error as e:
             print(f"Error executing:\n{clean_statement}\nError: {e}\n")
     connection.commit()
     cursor.close()
 
+def add_table_foreign_keys(database, table, foreign_keys, skip_checks=False):
+    """Add one table's foreign keys on a dedicated connection of its own
+
+    With skip_checks, foreign_key_checks is off for the session, so InnoDB
+    adds each key in place without reading a row; validate_foreign_keys()
+    checks the data afterwards. Returns (constraint, seconds, error) tuples.
+    """
+    results = []
+    # Outside the pool, which main() already draws from, so --jobs isn't capped by pool_size
+    connection = open_connection(database)
+    cursor = connection.cursor()
+    try:
+        if skip_checks:
+            cursor.execute("SET SESSION foreign_key_checks = 0")
+        for foreign_key in foreign_keys:
+            started = time.perf_counter()
+            try:
+                cursor.execute(add_foreign_key_sql(foreign_key, 'INPLACE' if skip_checks else None))
+                results.append((foreign_key[1], time.perf_counter() - started, None))
+            except Error as e:
+                results.append((foreign_key[1], time.perf_counter() - started, e))
+    finally:
+        if skip_checks:
+            cursor.execute("SET SESSION foreign_key_checks = 1")
+        cursor.close()
+        connection.close()
+    return results
+
+def add_foreign_keys_parallel(database, jobs=4, skip_checks=False, foreign_keys=None):
+    """Add the foreign keys of different tables concurrently, all of FOREIGN_KEYS unless given
+
+    Keys on the same table share one worker, since ALTERs on one table wait
+    for each other anyway. A table starts once the tables it references have
+    their own keys, so an ALTER never waits on the metadata lock of a parent
+    that is still being altered. Returns the (table, constraint, seconds,
+    error) of every key.
+    """
+    by_table = {}
+    for foreign_key in FOREIGN_KEYS if foreign_keys is None else foreign_keys:
+        by_table.setdefault(foreign_key[0], []).append(foreign_key)
+    waiting_on = {table: {fk[3] for fk in keys if fk[3] in by_table and fk[3] != table}
+                  for table, keys in by_table.items()}
+
+    results = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="fk") as executor:
+        running = {}
+        while waiting_on or running:
+            for table in [table for table, parents in waiting_on.items() if not parents]:
+                del waiting_on[table]
+                running[executor.submit(add_table_foreign_keys, database, table, by_table[table], skip_checks)] = table
+            if not running:
+                raise RuntimeError(f"Foreign keys reference each other in a cycle: {sorted(waiting_on)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table = running.pop(future)
+                try:
+                    table_results = future.result()
+                except Error as e:
+                    table_results = [(fk[1], 0.0, e) for fk in by_table[table]]
+                for name, seconds, error in table_results:
+                    results.append((table, name, seconds, error))
+                    if error is None:
+                        print(f"✅ {table}.{name}: {seconds:.2f}s")
+                    else:
+                        print(f"❌ {table}.{name}: {error}")
+                for parents in waiting_on.values():
+                    parents.discard(table)
+
+    elapsed = time.perf_counter() - started
+    added = sum(1 for *_, error in results if error is None)
+    serial = sum(seconds for _, _, seconds, _ in results)
+    print(f"\nAdded {added}/{len(results)} foreign keys in {elapsed:.2f}s "
+          f"({serial:.2f}s of ALTERs across {len(by_table)} tables, {jobs} at a time"
+          f"{', checks off, ALGORITHM=INPLACE' if skip_checks else ''})")
+    print("Slowest constraints:")
+    for table, name, seconds, error in sorted(results, key=lambda result: -result[2])[:5]:
+        print(f"  {name}: {seconds:.2f}s")
+    return results
+
+def count_orphans(database, foreign_key):
+    """Count child rows whose key has no parent row, with one anti-join"""
+    table, name, column, ref_table, ref_column, _ = foreign_key
+    connection = open_connection(database)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            SELECT COUNT(*)
+            FROM `{table}` c
+            LEFT JOIN `{ref_table}` p ON p.`{ref_column}` = c.`{column}`
+            WHERE c.`{column}` IS NOT NULL AND p.`{ref_column}` IS NULL
+        """)
+        orphans = cursor.fetchone()[0]
+        cursor.close()
+    finally:
+        connection.close()
+    return orphans
+
+def validate_foreign_keys(database, jobs=4):
+    """Check every foreign key's data with set-based anti-joins, several keys at a time
+
+    Needed after adding keys with foreign_key_checks off, which trusts the
+    data. Returns {constraint: orphan rows} for the keys that are violated.
+    """
+    print("\nValidating foreign key data:")
+    started = time.perf_counter()
+    violations = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="fk-check") as executor:
+        futures = {executor.submit(count_orphans, database, fk): fk for fk in FOREIGN_KEYS}
+        for future in as_completed(futures):
+            table, name, column, ref_table, ref_column, _ = futures[future]
+            try:
+                orphans = future.result()
+            except Error as e:
+                print(f"❌ Could not validate {name}: {e}")
+                continue
+            if orphans:
+                violations[name] = orphans
+                print(f"⚠️  {name}: {orphans} rows of {table}.{column} have no {ref_table}.{ref_column}")
+    if violations:
+        print(f"❌ {len(violations)} foreign keys have orphan rows ({time.perf_counter() - started:.2f}s)")
+    else:
+        print(f"✅ All {len(FOREIGN_KEYS)} foreign keys hold ({time.perf_counter() - started:.2f}s)")
+    return violations
+
 def verify_foreign_keys(connection):
     """
     Verify that the foreign keys were successfully added.
@@ -389,14 +316,23 @@ def verify_foreign_keys(connection):
     cursor.close()
 
 def main():
-    # Adjust these credentials to your environment
-    host = "localhost"
-    user = "ali"
-    password = "admin"
-    database = "UNOX"
+    parser = argparse.ArgumentParser(description='Add the foreign keys between the V1 tables')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Drop and re-add every foreign key instead of adding only missing or changed ones')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Tables whose foreign keys are added concurrently, each on its own connection')
+    parser.add_argument('--skip-checks', action='store_true',
+                        help='Add keys with foreign_key_checks=0 and ALGORITHM=INPLACE, then '
+                             'validate the data with anti-join queries')
+    parser.add_argument('--validate', action='store_true',
+                        help='Check every foreign key for orphan rows after adding them')
+    args = parser.parse_args()
+
+    # Credentials come from db_config.ini / SRM_DB_* variables
+    database = load_db_config()['v1_database']
 
     # 1) Connect to the database
-    connection = create_connection(host, user, password, database)
+    connection = create_connection(database)
     if connection is None:
         return  # cannot proceed if connection failed
 
@@ -406,11 +342,21 @@ def main():
         connection.close()
         return
 
-    # 3) Drop existing foreign keys to avoid errors
-    drop_foreign_keys(connection)
-    
-    # 4) Add all foreign keys
-    add_foreign_keys(connection)
+    if not args.rebuild:
+        # 3) Add only the foreign keys that are missing or differ, through the migrations
+        from migrations import migrate
+        migrate(connection, jobs=args.jobs, skip_checks=args.skip_checks)
+    else:
+        # 3) Drop existing foreign keys to avoid errors
+        drop_foreign_keys(connection)
+        
+        # 4) Add all foreign keys
+        if args.jobs > 1 or args.skip_checks:
+            add_foreign_keys_parallel(database, args.jobs, args.skip_checks)
+        else:
+            add_foreign_keys(connection)
+    if args.skip_checks or args.validate:
+        validate_foreign_keys(database, max(args.jobs, 1))
     
     # 5) Verify the foreign keys were added correctly
     verify_foreign_keys(connection)
@@ -0,0 +1,377 @@
+import os
+import re
+import sys
+import time
+import hashlib
+import argparse
+from mysql.connector import Error
+
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import create_connection, load_db_config
+from foriegn_keys import FOREIGN_KEYS, add_foreign_keys_parallel, validate_foreign_keys
+
+# Applied versions, with a checksum of what each one defined
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum CHAR(40) NOT NULL,
+    statements INT NOT NULL,
+    seconds DOUBLE NOT NULL,
+    applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+"""
+
+# (table, column, definition): key columns whose definition db_repair.py enforces
+KEY_COLUMNS = [
+    ('users', 'user_id', 'INT NOT NULL AUTO_INCREMENT'),
+    ('movies', 'movie_id', 'INT NOT NULL AUTO_INCREMENT'),
+    ('food_items', 'food_item_id', 'INT NOT NULL AUTO_INCREMENT'),
+    ('food_item_sizes', 'size_id', 'INT NOT NULL AUTO_INCREMENT'),
+    ('food_orders', 'food_order_id', 'INT NOT NULL AUTO_INCREMENT')
+]
+
+# (table, column, definition): columns added when missing; an existing column keeps the type its CSV gave it
+REQUIRED_COLUMNS = [
+    ('reviews', 'user_id', 'INT NOT NULL'),
+    ('reviews', 'movie_id', 'INT NOT NULL'),
+    ('food_item_sizes', 'food_item_id', 'INT NOT NULL'),
+    ('food_orders', 'user_id', 'INT NOT NULL'),
+    ('food_order_items', 'food_order_id', 'INT NOT NULL'),
+    ('food_order_items', 'food_item_id', 'INT NOT NULL'),
+    ('food_order_items', 'size_id', 'INT NULL'),
+    ('payments', 'user_id', 'INT NOT NULL'),
+    ('payments', 'gateway_id', 'INT NULL'),
+    ('payments', 'booking_id', 'INT NULL'),
+    ('payments', 'food_order_id', 'INT NULL'),
+    # Surrogate keys for tables whose CSV has none
+    ('reviews', 'review_id', 'INT NOT NULL AUTO_INCREMENT'),
+    ('points_transactions', 'transaction_id', 'INT NOT NULL AUTO_INCREMENT'),
+    ('movie_casts', 'cast_id', 'INT NOT NULL AUTO_INCREMENT'),
+    ('tickets', 'ticket_id', 'INT NOT NULL AUTO_INCREMENT'),
+    ('food_order_items', 'item_id', 'INT NOT NULL AUTO_INCREMENT'),
+    ('payments', 'payment_id', 'INT NOT NULL AUTO_INCREMENT')
+]
+
+# Primary key column of every table
+PRIMARY_KEYS = {
+    'users': 'user_id',
+    'memberships': 'user_id',
+    'reviews': 'review_id',
+    'points_transactions': 'transaction_id',
+    'movies': 'movie_id',
+    'movie_casts': 'cast_id',
+    'screens': 'screen_id',
+    'shows': 'show_id',
+    'seats': 'seat_id',
+    'show_seats': 'show_seat_id',
+    'bookings': 'booking_id',
+    'tickets': 'ticket_id',
+    'food_items': 'food_item_id',
+    'food_item_sizes': 'size_id',
+    'food_orders': 'food_order_id',
+    'food_order_items': 'item_id',
+    'payment_gateways': 'gateway_id',
+    'payments': 'payment_id'
+}
+
+# (table, index, column) on every foreign key column
+FOREIGN_KEY_INDEXES = [
+    ('memberships', 'idx_memberships_user', 'user_id'),
+    ('reviews', 'idx_reviews_user', 'user_id'),
+    ('reviews', 'idx_reviews_movie', 'movie_id'),
+    ('points_transactions', 'idx_points_user', 'user_id'),
+    ('movie_casts', 'idx_cast_movie', 'movie_id'),
+    ('shows', 'idx_shows_movie', 'movie_id'),
+    ('shows', 'idx_shows_screen', 'screen_id'),
+    ('seats', 'idx_seats_screen', 'screen_id'),
+    ('show_seats', 'idx_show_seats_show', 'show_id'),
+    ('show_seats', 'idx_show_seats_seat', 'seat_id'),
+    ('bookings', 'idx_bookings_user', 'user_id'),
+    ('bookings', 'idx_bookings_show', 'show_id'),
+    ('tickets', 'idx_tickets_booking', 'booking_id'),
+    ('tickets', 'idx_tickets_seat', 'show_seat_id'),
+    ('food_item_sizes', 'idx_food_sizes_item', 'food_item_id'),
+    ('food_orders', 'idx_food_orders_user', 'user_id'),
+    ('food_order_items', 'idx_food_order_items_order', 'food_order_id'),
+    ('food_order_items', 'idx_food_order_items_food', 'food_item_id'),
+    ('food_order_items', 'idx_food_order_items_size', 'size_id'),
+    ('payments', 'idx_payments_user', 'user_id'),
+    ('payments', 'idx_payments_gateway', 'gateway_id'),
+    ('payments', 'idx_payments_booking', 'booking_id'),
+    ('payments', 'idx_payments_food_order', 'food_order_id')
+]
+
+# (version, name, target): each version describes part of the schema it must end up with
+MIGRATIONS = [
+    (1, 'Key columns and primary keys', {'columns': KEY_COLUMNS, 'required_columns': REQUIRED_COLUMNS,
+                                         'primary_keys': PRIMARY_KEYS}),
+    (2, 'Indexes on foreign key columns', {'indexes': FOREIGN_KEY_INDEXES}),
+    (3, 'Foreign keys between the tables', {'foreign_keys': FOREIGN_KEYS})
+]
+
+def migration_checksum(target):
+    """Fingerprint of a migration's definition, to notice when it was edited after being applied"""
+    return hashlib.sha1(repr(sorted(target.items())).encode()).hexdigest()
+
+def column_signature(column_type, nullable, auto_increment):
+    """Comparable (type, nullable, auto_increment), ignoring integer display widths"""
+    return re.sub(r'^(\w*int)\(\d+\)', r'\1', column_type.strip().lower()), nullable, auto_increment
+
+def parse_column_definition(definition):
+    """Signature of a definition such as 'INT NOT NULL AUTO_INCREMENT'"""
+    upper = definition.upper()
+    column_type = re.split(r'\s+(?:NOT\s+)?NULL|\s+AUTO_INCREMENT', definition, flags=re.IGNORECASE)[0]
+    return column_signature(column_type, 'NOT NULL' not in upper, 'AUTO_INCREMENT' in upper)
+
+def read_schema(connection):
+    """Columns, indexes and foreign keys of every table, from three information_schema queries"""
+    schema = {}
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, EXTRA
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+    """)
+    for table, column, column_type, nullable, extra in cursor.fetchall():
+        table_schema = schema.setdefault(table, {'columns': {}, 'indexes': {}, 'foreign_keys': {}})
+        table_schema['columns'][column] = column_signature(column_type, nullable == 'YES',
+                                                           'auto_increment' in (extra or '').lower())
+
+    cursor.execute("""
+        SELECT TABLE_NAME, INDEX_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX)
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        GROUP BY TABLE_NAME, INDEX_NAME
+    """)
+    for table, index, columns in cursor.fetchall():
+        if table in schema:
+            schema[table]['indexes'][index] = tuple(columns.split(','))
+
+    cursor.execute("""
+        SELECT k.TABLE_NAME, k.CONSTRAINT_NAME, k.COLUMN_NAME, k.REFERENCED_TABLE_NAME,
+               k.REFERENCED_COLUMN_NAME, r.DELETE_RULE, r.UPDATE_RULE
+        FROM information_schema.KEY_COLUMN_USAGE k
+        JOIN information_schema.REFERENTIAL_CONSTRAINTS r
+          ON r.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA AND r.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+         AND r.TABLE_NAME = k.TABLE_NAME
+        WHERE k.TABLE_SCHEMA = DATABASE() AND k.REFERENCED_TABLE_NAME IS NOT NULL
+    """)
+    for table, name, column, ref_table, ref_column, on_delete, on_update in cursor.fetchall():
+        if table in schema:
+            schema[table]['foreign_keys'][name] = (column, ref_table, ref_column, on_delete, on_update)
+    cursor.close()
+    return schema
+
+def plan_migration(schema, target):
+    """Statements that bring the live schema in line with one migration's target
+
+    Returns (statements, missing_tables). Every change to a table is one
+    ALTER TABLE, so the table is rebuilt at most once; a changed foreign key
+    is dropped in a statement of its own first, since one ALTER can't drop
+    and re-add the same constraint name.
+    """
+    clauses = {}
+    statements = []
+    missing_tables = set()
+
+    def table_schema(table):
+        if table not in schema:
+            missing_tables.add(table)
+            return None
+        return schema[table]
+
+    for table, column, definition in target.get('columns', []) + target.get('required_columns', []):
+        live = table_schema(table)
+        if live is None:
+            continue
+        current = live['columns'].get(column)
+        if current is None:
+            clauses.setdefault(table, []).append(f"ADD COLUMN `{column}` {definition}")
+        elif current != parse_column_definition(definition) and (table, column, definition) in target.get('columns', []):
+            clauses.setdefault(table, []).append(f"MODIFY COLUMN `{column}` {definition}")
+
+    for table, column in target.get('primary_keys', {}).items():
+        live = table_schema(table)
+        if live is None:
+            continue
+        current = live['indexes'].get('PRIMARY')
+        if current == (column,):
+            continue
+        if current is not None:
+            clauses.setdefault(table, []).append("DROP PRIMARY KEY")
+        clauses.setdefault(table, []).append(f"ADD PRIMARY KEY (`{column}`)")
+
+    for table, index, column in target.get('indexes', []):
+        live = table_schema(table)
+        if live is None:
+            continue
+        current = live['indexes'].get(index)
+        if current == (column,):
+            continue
+        if current is not None:
+            clauses.setdefault(table, []).append(f"DROP INDEX `{index}`")
+        clauses.setdefault(table, []).append(f"ADD INDEX `{index}` (`{column}`)")
+
+    drops, pending, missing_parents = foreign_key_changes(schema, target.get('foreign_keys', []))
+    statements.extend(drops)
+    missing_tables.update(missing_parents)
+    for table, name, column, ref_table, ref_column, on_delete in pending:
+        clauses.setdefault(table, []).append(
+            f"ADD CONSTRAINT `{name}` FOREIGN KEY (`{column}`) REFERENCES `{ref_table}`(`{ref_column}`) "
+            f"ON UPDATE CASCADE ON DELETE {on_delete}")
+
+    for table, table_clauses in clauses.items():
+        statements.append(f"ALTER TABLE `{table}`\n    " + ",\n    ".join(table_clauses))
+    return statements, sorted(missing_tables)
+
+def foreign_key_changes(schema, foreign_keys):
+    """(DROP statements for changed keys, keys to add, missing tables) for a list of FOREIGN_KEYS entries"""
+    drops = []
+    pending = []
+    missing_tables = set()
+    for foreign_key in foreign_keys:
+        table, name, column, ref_table, ref_column, on_delete = foreign_key
+        missing = {t for t in (table, ref_table) if t not in schema}
+        if missing:
+            missing_tables.update(missing)
+            continue
+        wanted = (column, ref_table, ref_column, on_delete, 'CASCADE')
+        current = schema[table]['foreign_keys'].get(name)
+        if current == wanted:
+            continue
+        if current is not None:
+            drops.append(f"ALTER TABLE `{table}` DROP FOREIGN KEY `{name}`")
+        pending.append(foreign_key)
+    return drops, pending, missing_tables
+
+def applied_migrations(connection):
+    """{version: checksum} of the versions recorded as applied"""
+    cursor = connection.cursor()
+    cursor.execute(CREATE_MIGRATIONS_TABLE)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    applied = dict(cursor.fetchall())
+    cursor.close()
+    return applied
+
+def record_migration(connection, version, name, checksum, statements, seconds):
+    """Record a version as applied"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        INSERT INTO schema_migrations (version, name, checksum, statements, seconds, applied_at)
+        VALUES (%s, %s, %s, %s, %s, NOW())
+        ON DUPLICATE KEY UPDATE name = VALUES(name), checksum = VALUES(checksum),
+            statements = VALUES(statements), seconds = VALUES(seconds), applied_at = NOW()
+    """, (version, name, checksum, statements, seconds))
+    connection.commit()
+    cursor.close()
+
+def migrate(connection, target_version=None, dry_run=False, jobs=1, skip_checks=False):
+    """Apply whatever each migration up to target_version still lacks
+
+    The live schema is read once and diffed against every migration, so a
+    schema that is already up to date costs a handful of information_schema
+    queries and no ALTERs, and drift in an applied version is repaired too.
+    With jobs > 1 or skip_checks, missing foreign keys are added through
+    add_foreign_keys_parallel() instead of one ALTER per table in turn.
+    A version is recorded in schema_migrations once nothing it defines is
+    missing. Returns True when every version is in place.
+    """
+    started = time.perf_counter()
+    applied = applied_migrations(connection)
+    schema = read_schema(connection)
+    cursor = connection.cursor()
+    complete = True
+    executed = 0
+    for version, name, target in MIGRATIONS:
+        if target_version is not None and version > target_version:
+            break
+        checksum = migration_checksum(target)
+        pending = []
+        if target.get('foreign_keys') and (jobs > 1 or skip_checks) and not dry_run:
+            # The other changes run as planned; the foreign keys go to the parallel adder afterwards
+            rest = {key: value for key, value in target.items() if key != 'foreign_keys'}
+            statements, missing_tables = plan_migration(schema, rest)
+            drops, pending, missing_parents = foreign_key_changes(schema, target['foreign_keys'])
+            statements += drops
+            missing_tables = sorted(set(missing_tables) | missing_parents)
+        else:
+            statements, missing_tables = plan_migration(schema, target)
+        if missing_tables:
+            print(f"⚠️  {version} {name}: tables not found: {', '.join(missing_tables)}")
+        if not statements and not pending:
+            if not missing_tables and applied.get(version) != checksum and not dry_run:
+                record_migration(connection, version, name, checksum, 0, 0.0)
+            print(f"{'✅' if not missing_tables else '⚠️ '} {version} {name}: up to date")
+            complete = complete and not missing_tables
+            continue
+
+        print(f"\n{'Would apply' if dry_run else 'Applying'} {version} {name}: "
+              f"{len(statements) + len(pending)} statements")
+        migration_start = time.perf_counter()
+        failed = False
+        for statement in statements:
+            print(f"Executing:\n{statement}")
+            if dry_run:
+                continue
+            statement_start = time.perf_counter()
+            try:
+                cursor.execute(statement)
+                print(f"  done in {time.perf_counter() - statement_start:.2f}s")
+                executed += 1
+            except Error as e:
+                print(f"❌ Error: {e}")
+                failed = True
+        if pending:
+            results = add_foreign_keys_parallel(connection.database, jobs, skip_checks, pending)
+            executed += sum(1 for *_, error in results if error is None)
+            failed = failed or any(error is not None for *_, error in results)
+        complete = False if dry_run or failed or missing_tables else complete
+        if dry_run:
+            continue
+        connection.commit()
+        # Later versions are planned against the schema as this one left it
+        schema = read_schema(connection)
+        if not failed and not missing_tables:
+            record_migration(connection, version, name, checksum, len(statements),
+                             time.perf_counter() - migration_start)
+            print(f"✅ {version} {name}: applied in {time.perf_counter() - migration_start:.2f}s")
+    cursor.close()
+    print(f"\nSchema {'is up to date' if complete else 'still needs changes'} "
+          f"({executed} statements executed in {time.perf_counter() - started:.2f}s)")
+    return complete
+
+def main():
+    parser = argparse.ArgumentParser(description='Bring the V1 schema up to date, changing only what differs')
+    parser.add_argument('--target', type=int, help='Stop after this migration version')
+    parser.add_argument('--dry-run', action='store_true', help='Print the statements without running them')
+    parser.add_argument('--list', action='store_true', help='List the migrations and whether they are recorded')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Tables whose foreign keys are added concurrently, each on its own connection')
+    parser.add_argument('--skip-checks', action='store_true',
+                        help='Add foreign keys with foreign_key_checks=0 and ALGORITHM=INPLACE, then validate '
+                             'the data with anti-join queries')
+    args = parser.parse_args()
+
+    # Credentials come from db_config.ini / SRM_DB_* variables
+    database = load_db_config()['v1_database']
+    connection = create_connection(database)
+    if connection is None:
+        return
+    try:
+        if args.list:
+            applied = applied_migrations(connection)
+            for version, name, target in MIGRATIONS:
+                status = 'not applied' if version not in applied else (
+                    'applied' if applied[version] == migration_checksum(target) else 'applied, since changed')
+                print(f"  {version}. {name}: {status}")
+            return
+        migrate(connection, args.target, args.dry_run, args.jobs, args.skip_checks)
+        if args.skip_checks and not args.dry_run:
+            validate_foreign_keys(database, max(args.jobs, 1))
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
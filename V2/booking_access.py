@@ -0,0 +1,256 @@
+import os
+import sys
+import random
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import get_connection
+
+# Loyalty points awarded per unit of currency spent (matches points_transactions.csv)
+POINTS_PER_UNIT = 2
+
+# Seat lists are padded to these sizes so each one maps to a single reusable prepared statement
+SEAT_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+LIST_SHOWS_SQL = """
+    SELECT s.show_id, s.screen_id, sc.name, sc.class_type, s.show_datetime
+    FROM `Show` s JOIN Screen sc ON sc.screen_id = s.screen_id
+    WHERE s.movie_id = %s AND s.show_datetime >= %s AND s.show_datetime < %s
+    ORDER BY s.show_datetime
+"""
+
+SEAT_AVAILABILITY_SQL = """
+    SELECT ss.show_seat_id, ss.seat_id, se.seat_number, ss.is_available
+    FROM ShowSeat ss JOIN Seat se ON se.seat_id = ss.seat_id
+    WHERE ss.show_id = %s
+    ORDER BY ss.show_seat_id
+"""
+
+INSERT_BOOKING_SQL = "INSERT INTO Booking (user_id, show_id, booking_datetime, total_cost) VALUES (%s, %s, %s, %s)"
+
+INSERT_TICKET_SQL = """
+    INSERT INTO Ticket (booking_id, show_seat_id, qr_code, delivery_method, is_downloaded)
+    VALUES (%s, %s, %s, %s, FALSE)
+"""
+
+INSERT_PAYMENT_SQL = """
+    INSERT INTO Payment (booking_id, gateway_id, transaction_amount, transaction_datetime, status)
+    VALUES (%s, %s, %s, %s, 'Success')
+"""
+
+INSERT_POINTS_SQL = """
+    INSERT INTO PointsTransaction (user_id, amount, points_earned, transaction_datetime, transaction_type)
+    VALUES (%s, %s, %s, %s, 'Earned')
+"""
+
+class SeatsUnavailable(Exception):
+    """Raised when some of the requested seats are already taken"""
+
+def _seat_placeholders(size):
+    """Placeholders for a padded IN list"""
+    return ', '.join(['%s'] * size)
+
+def lock_seats_sql(size):
+    """SELECT ... FOR UPDATE for a seat bucket of the given size"""
+    return (f"SELECT show_seat_id FROM ShowSeat WHERE show_id = %s AND is_available "
+            f"AND show_seat_id IN ({_seat_placeholders(size)}) FOR UPDATE")
+
+def take_seats_sql(size):
+    """UPDATE marking a seat bucket of the given size as sold"""
+    return f"UPDATE ShowSeat SET is_available = FALSE WHERE show_seat_id IN ({_seat_placeholders(size)})"
+
+def claim_seats_sql(size):
+    """UPDATE marking seats as sold only where they are still available (check rowcount)"""
+    return take_seats_sql(size) + " AND is_available"
+
+def pad_seats(show_seat_ids):
+    """Sort and pad seat ids up to the next bucket size by repeating the last id"""
+    seats = sorted(set(show_seat_ids))
+    if not seats:
+        raise ValueError("no seats requested")
+    if len(seats) > SEAT_BUCKETS[-1]:
+        raise ValueError(f"at most {SEAT_BUCKETS[-1]} seats can be booked at once")
+    size = next(bucket for bucket in SEAT_BUCKETS if bucket >= len(seats))
+    return seats, seats + [seats[-1]] * (size - len(seats))
+
+class PreparedSession:
+    """A pooled connection held by one thread, with one prepared cursor per statement
+
+    The connection stays checked out for the life of the thread, because
+    handing it back to the pool resets the session and drops the server-side
+    prepared statements.
+    """
+
+    def __init__(self, database=None):
+        self.connection = get_connection(database)
+        # Reads see fresh data; book_seats() opens its own short transaction
+        self.connection.autocommit = True
+        self.cursors = {}
+
+    def cursor(self, sql):
+        """Get the prepared cursor for a statement, preparing it on first use"""
+        cursor = self.cursors.get(sql)
+        if cursor is None:
+            cursor = self.connection.cursor(prepared=True)
+            self.cursors[sql] = cursor
+        return cursor
+
+    def query(self, sql, params):
+        """Run a prepared SELECT and return all rows"""
+        cursor = self.cursor(sql)
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    def execute(self, sql, params):
+        """Run a prepared statement and return the cursor"""
+        cursor = self.cursor(sql)
+        cursor.execute(sql, params)
+        return cursor
+
+    def close(self):
+        """Release the prepared statements and hand the connection back to the pool"""
+        for cursor in self.cursors.values():
+            cursor.close()
+        self.cursors.clear()
+        self.connection.close()
+
+_local = threading.local()
+
+def get_session():
+    """Get this thread's prepared session, reconnecting if the server dropped it"""
+    session = getattr(_local, 'session', None)
+    if session is not None and not session.connection.is_connected():
+        session.cursors.clear()
+        session = None
+    if session is None:
+        session = PreparedSession()
+        _local.session = session
+    return session
+
+def close_session():
+    """Close this thread's session, if any"""
+    session = getattr(_local, 'session', None)
+    if session is not None:
+        session.close()
+        _local.session = None
+
+def list_shows(movie_id, show_date):
+    """List (show_id, screen_id, screen_name, class_type, show_datetime) for a movie on a date"""
+    day_start = datetime.combine(show_date, datetime.min.time())
+    return get_session().query(LIST_SHOWS_SQL, (movie_id, day_start, day_start + timedelta(days=1)))
+
+def seat_availability(show_id):
+    """List (show_seat_id, seat_id, seat_number, is_available) for every seat of a show"""
+    return get_session().query(SEAT_AVAILABILITY_SQL, (show_id,))
+
+def book_seats(user_id, show_id, show_seat_ids, gateway_id, price_per_seat,
+               delivery_method='App', commit=True):
+    """Atomically book seats: lock ShowSeat rows, then record Booking, Tickets, Payment and points
+
+    Everything happens in one short READ COMMITTED transaction. Seats are
+    locked in ascending id order so concurrent bookings cannot deadlock on
+    each other. Raises SeatsUnavailable if any seat is already taken.
+    Returns the new booking_id; with commit=False the work is rolled back
+    (used by the benchmark).
+    """
+    seats, padded = pad_seats(show_seat_ids)
+    session = get_session()
+    connection = session.connection
+    now = datetime.now().replace(microsecond=0)
+    total_cost = round(price_per_seat * len(seats), 2)
+
+    connection.start_transaction(isolation_level='READ COMMITTED')
+    try:
+        locked = session.query(lock_seats_sql(len(padded)), [show_id] + padded)
+        if len(locked) != len(seats):
+            taken = set(seats) - {row[0] for row in locked}
+            raise SeatsUnavailable(f"seats {sorted(taken)} are not available for show {show_id}")
+        session.execute(take_seats_sql(len(padded)), padded)
+
+        booking_id = session.execute(INSERT_BOOKING_SQL, (user_id, show_id, now, total_cost)).lastrowid
+        ticket_cursor = session.cursor(INSERT_TICKET_SQL)
+        for show_seat_id in seats:
+            qr_code = f"TICKET-{booking_id}-{random.randint(1000, 9999)}"
+            ticket_cursor.execute(INSERT_TICKET_SQL, (booking_id, show_seat_id, qr_code, delivery_method))
+        session.execute(INSERT_PAYMENT_SQL, (booking_id, gateway_id, total_cost, now))
+        session.execute(INSERT_POINTS_SQL, (user_id, total_cost, int(total_cost * POINTS_PER_UNIT), now))
+
+        if commit:
+            connection.commit()
+        else:
+            connection.rollback()
+        return booking_id
+    except BaseException:
+        connection.rollback()
+        raise
+
+def summarize_latencies(name, latencies):
+    """Print count, throughput and latency percentiles in milliseconds"""
+    if not latencies:
+        print(f"  {name:<18} no samples")
+        return
+    latencies = sorted(latencies)
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+    total = sum(latencies)
+    print(f"  {name:<18} n={len(latencies):<6} {len(latencies) / total:>8.0f} ops/s  "
+          f"mean={total / len(latencies) * 1000:.2f}ms  p50={percentile(50):.2f}ms  "
+          f"p95={percentile(95):.2f}ms  p99={percentile(99):.2f}ms")
+
+def benchmark(iterations=500, seed=42):
+    """Measure the latency of each hot-path operation against the live database
+
+    Bookings are rolled back, so the benchmark leaves the data unchanged.
+    """
+    rng = random.Random(seed)
+    session = get_session()
+    shows = session.query("SELECT show_id, movie_id, DATE(show_datetime) FROM `Show` LIMIT 1000", ())
+    if not shows:
+        print("❌ No shows found, import data before running the benchmark")
+        return
+    users = [row[0] for row in session.query("SELECT user_id FROM User LIMIT 1000", ())]
+    gateways = [row[0] for row in session.query("SELECT gateway_id FROM PaymentGateway", ())]
+
+    latencies = {'list_shows': [], 'seat_availability': [], 'book_seats': []}
+    skipped = 0
+    for _ in range(iterations):
+        show_id, movie_id, show_date = rng.choice(shows)
+
+        start = time.perf_counter()
+        list_shows(movie_id, show_date)
+        latencies['list_shows'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        seats = seat_availability(show_id)
+        latencies['seat_availability'].append(time.perf_counter() - start)
+
+        free = [row[0] for row in seats if row[3]]
+        if len(free) < 2 or not users or not gateways:
+            skipped += 1
+            continue
+        start = time.perf_counter()
+        book_seats(rng.choice(users), show_id, rng.sample(free, 2), rng.choice(gateways),
+                   price_per_seat=250, commit=False)
+        latencies['book_seats'].append(time.perf_counter() - start)
+
+    print(f"\nHot-path latency over {iterations} iterations:")
+    for name, samples in latencies.items():
+        summarize_latencies(name, samples)
+    if skipped:
+        print(f"  ({skipped} bookings skipped: show had fewer than 2 free seats or no users/gateways)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Booking hot-path data access and latency benchmark')
+    parser.add_argument('--iterations', '-n', type=int, default=500, help='Benchmark iterations per operation')
+    args = parser.parse_args()
+    try:
+        benchmark(args.iterations)
+    finally:
+        close_session()
+
+if __name__ == "__main__":
+    main()
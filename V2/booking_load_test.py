@@ -0,0 +1,330 @@
+import os
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from mysql.connector import Error
+
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import open_connection, load_db_config
+from Database_creation import TABLE_DEFINITIONS, INDEX_DEFINITIONS
+from booking_access import (INSERT_BOOKING_SQL, INSERT_TICKET_SQL, INSERT_PAYMENT_SQL, INSERT_POINTS_SQL,
+                            POINTS_PER_UNIT, lock_seats_sql, take_seats_sql, claim_seats_sql,
+                            summarize_latencies)
+
+# Seat locking strategies that can be compared
+STRATEGIES = ('for_update', 'skip_locked', 'optimistic')
+
+# MySQL error codes counted separately from other failures
+DEADLOCK = 1213
+LOCK_WAIT_TIMEOUT = 1205
+
+# InnoDB counters sampled before and after each run (Innodb_deadlocks is MariaDB only)
+LOCK_STATUS_VARIABLES = ('Innodb_row_lock_waits', 'Innodb_row_lock_time', 'Innodb_deadlocks')
+
+# Tables emptied between runs, children first
+BOOKING_TABLES = ('PointsTransaction', 'Payment', 'Ticket', 'Booking')
+
+AVAILABLE_SEATS_SQL = "SELECT show_seat_id FROM ShowSeat WHERE show_id = %s AND is_available ORDER BY show_seat_id"
+
+SKIP_LOCKED_SQL = """
+    SELECT show_seat_id FROM ShowSeat WHERE show_id = %s AND is_available
+    ORDER BY show_seat_id LIMIT %s FOR UPDATE SKIP LOCKED
+"""
+
+PRICE_PER_SEAT = 250
+
+def setup_database(database, shows, seats_per_show, users):
+    """Create the load-test database from Database_creation.py and seed shows, seats and users"""
+    connection = open_connection('')
+    cursor = connection.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.execute(f"CREATE DATABASE `{database}`")
+    cursor.close()
+    connection.close()
+
+    connection = open_connection(database)
+    cursor = connection.cursor()
+    for table_query in TABLE_DEFINITIONS.values():
+        cursor.execute(table_query)
+    for index_query in INDEX_DEFINITIONS:
+        cursor.execute(index_query)
+
+    screens = max(1, min(shows, 5))
+    cursor.executemany("INSERT INTO Screen (name, class_type, capacity) VALUES (%s, %s, %s)",
+                       [(chr(65 + i), 'Gold' if i % 2 == 0 else 'Silver', seats_per_show) for i in range(screens)])
+    # Rows of 20 seats: A1..A20, B1..B20, ...
+    seats = [(screen_id, f"{chr(65 + i // 20 % 26)}{i % 20 + 1 + i // 520 * 20}")
+             for screen_id in range(1, screens + 1) for i in range(seats_per_show)]
+    cursor.executemany("INSERT INTO Seat (screen_id, seat_number) VALUES (%s, %s)", seats)
+    cursor.execute("INSERT INTO Movie (title, genre, rating, status) VALUES ('Load Test', 'Drama', 7.5, 'Now Showing')")
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    cursor.executemany("INSERT INTO `Show` (screen_id, movie_id, show_datetime) VALUES (%s, 1, %s)",
+                       [(i % screens + 1, start + timedelta(hours=3 * i)) for i in range(shows)])
+    # Every show offers every seat of its screen
+    cursor.execute("""
+        INSERT INTO ShowSeat (show_id, seat_id, is_available)
+        SELECT s.show_id, se.seat_id, TRUE FROM `Show` s JOIN Seat se ON se.screen_id = s.screen_id
+        ORDER BY s.show_id, se.seat_id
+    """)
+    cursor.executemany("INSERT INTO User (name, email) VALUES (%s, %s)",
+                       [(f"Load User {i}", f"load{i}@example.com") for i in range(1, users + 1)])
+    cursor.executemany("INSERT INTO PaymentGateway (name) VALUES (%s)", [('PayPal',), ('Bill Desk',), ('Razorpay',)])
+    connection.commit()
+    cursor.close()
+    connection.close()
+    print(f"✅ Created {database} with {shows} shows x {seats_per_show} seats and {users} users")
+
+def reset_bookings(connection):
+    """Delete every booking and make all seats available again"""
+    cursor = connection.cursor()
+    cursor.execute("SET foreign_key_checks = 0")
+    for table in BOOKING_TABLES:
+        cursor.execute(f"TRUNCATE TABLE {table}")
+    cursor.execute("SET foreign_key_checks = 1")
+    cursor.execute("UPDATE ShowSeat SET is_available = TRUE WHERE NOT is_available")
+    connection.commit()
+    cursor.close()
+
+def read_lock_status(connection):
+    """Read the InnoDB row lock counters"""
+    cursor = connection.cursor()
+    placeholders = ', '.join(['%s'] * len(LOCK_STATUS_VARIABLES))
+    cursor.execute(f"SHOW GLOBAL STATUS WHERE Variable_name IN ({placeholders})", LOCK_STATUS_VARIABLES)
+    status = {name: int(value) for name, value in cursor.fetchall()}
+    cursor.close()
+    return status
+
+def check_consistency(connection):
+    """Count seats sold twice and sold seats whose ticket count doesn't match"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM (SELECT show_seat_id FROM Ticket GROUP BY show_seat_id HAVING COUNT(*) > 1) t")
+    oversold = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT COUNT(*) FROM ShowSeat ss LEFT JOIN Ticket t ON t.show_seat_id = ss.show_seat_id
+        WHERE (NOT ss.is_available AND t.ticket_id IS NULL) OR (ss.is_available AND t.ticket_id IS NOT NULL)
+    """)
+    mismatched = cursor.fetchone()[0]
+    cursor.close()
+    return oversold, mismatched
+
+def pick_show(rng, show_ids, hot_shows, hot_fraction):
+    """Pick a show, sending `hot_fraction` of the traffic to the first `hot_shows` shows"""
+    hot, cold = show_ids[:hot_shows], show_ids[hot_shows:]
+    if not cold or (hot and rng.random() < hot_fraction):
+        return rng.choice(hot)
+    return rng.choice(cold)
+
+def attempt_booking(connection, cursor, strategy, show_id, seat_count, user_id, gateway_id, rng, payment_delay):
+    """Try to book seats once, returning ('booked' | 'conflict' | 'sold_out', seconds spent taking the seats)
+
+    Like a real customer, each client first looks at the free seats and goes
+    for the best few that remain, so clients on the same show compete for the
+    same rows. `payment_delay` stands in for the gateway round trip, made
+    while the transaction (and its seat locks) is still open.
+    """
+    cursor.execute(AVAILABLE_SEATS_SQL, (show_id,))
+    free = [row[0] for row in cursor.fetchall()]
+    if len(free) < seat_count:
+        return 'sold_out', 0.0
+    seats = sorted(rng.sample(free[:seat_count * 4], seat_count))
+
+    connection.start_transaction()
+    try:
+        start = time.perf_counter()
+        if strategy == 'for_update':
+            cursor.execute(lock_seats_sql(seat_count), [show_id] + seats)
+            locked = len(cursor.fetchall())
+            if locked == seat_count:
+                cursor.execute(take_seats_sql(seat_count), seats)
+        elif strategy == 'skip_locked':
+            # Any free seats will do: skip rows other clients are holding
+            cursor.execute(SKIP_LOCKED_SQL, (show_id, seat_count))
+            seats = [row[0] for row in cursor.fetchall()]
+            locked = len(seats)
+            if locked == seat_count:
+                cursor.execute(take_seats_sql(seat_count), seats)
+        else:
+            # Compare-and-set: the UPDATE only matches seats that are still available
+            cursor.execute(claim_seats_sql(seat_count), seats)
+            locked = cursor.rowcount
+        lock_time = time.perf_counter() - start
+        if locked != seat_count:
+            connection.rollback()
+            return 'conflict', lock_time
+
+        now = datetime.now().replace(microsecond=0)
+        total_cost = PRICE_PER_SEAT * seat_count
+        cursor.execute(INSERT_BOOKING_SQL, (user_id, show_id, now, total_cost))
+        booking_id = cursor.lastrowid
+        cursor.executemany(INSERT_TICKET_SQL, [(booking_id, seat, f"TICKET-{booking_id}-{rng.randint(1000, 9999)}", 'App')
+                                               for seat in seats])
+        if payment_delay:
+            time.sleep(payment_delay)
+        cursor.execute(INSERT_PAYMENT_SQL, (booking_id, gateway_id, total_cost, now))
+        cursor.execute(INSERT_POINTS_SQL, (user_id, total_cost, total_cost * POINTS_PER_UNIT, now))
+        connection.commit()
+        return 'booked', lock_time
+    except BaseException:
+        connection.rollback()
+        raise
+
+def run_client(client_id, args, strategy, show_ids, user_ids, gateway_ids, deadline):
+    """Book seats in a loop until the deadline, returning counters and latency samples"""
+    rng = random.Random(args.seed * 1000 + client_id)
+    counters = Counter()
+    latencies, lock_times = [], []
+    connection = open_connection(args.database)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SET SESSION innodb_lock_wait_timeout = %s", (args.lock_wait_timeout,))
+        connection.autocommit = True
+        while time.monotonic() < deadline:
+            show_id = pick_show(rng, show_ids, args.hot_shows, args.hot_fraction)
+            start = time.perf_counter()
+            for attempt in range(args.max_retries + 1):
+                try:
+                    outcome, lock_time = attempt_booking(connection, cursor, strategy, show_id, args.seats,
+                                                         rng.choice(user_ids), rng.choice(gateway_ids), rng,
+                                                         args.payment_ms / 1000)
+                    lock_times.append(lock_time)
+                except Error as e:
+                    if e.errno == DEADLOCK:
+                        outcome = 'deadlock'
+                    elif e.errno == LOCK_WAIT_TIMEOUT:
+                        outcome = 'lock_wait_timeout'
+                    else:
+                        outcome = 'error'
+                        counters[f"error {e.errno}"] += 1
+                counters[outcome] += 1
+                if outcome in ('booked', 'sold_out', 'error'):
+                    break
+                if attempt < args.max_retries:
+                    counters['retries'] += 1
+                    time.sleep(rng.uniform(0, 0.005 * 2 ** attempt))
+            else:
+                counters['gave_up'] += 1
+            if outcome == 'booked':
+                latencies.append(time.perf_counter() - start)
+        cursor.close()
+    finally:
+        connection.close()
+    return counters, latencies, lock_times
+
+def run_strategy(args, strategy):
+    """Run every client against one strategy and print its results"""
+    connection = open_connection(args.database)
+    connection.autocommit = True
+    reset_bookings(connection)
+    cursor = connection.cursor()
+    cursor.execute("SELECT show_id FROM `Show` ORDER BY show_id")
+    show_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT user_id FROM User")
+    user_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT gateway_id FROM PaymentGateway")
+    gateway_ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    if not show_ids or not user_ids or not gateway_ids:
+        print("❌ The load-test database has no shows, users or gateways, run with --setup first")
+        connection.close()
+        return None
+
+    status_before = read_lock_status(connection)
+    print(f"\nRunning {strategy} with {args.clients} clients for {args.duration:.0f}s...")
+    start = time.perf_counter()
+    deadline = time.monotonic() + args.duration
+    with ThreadPoolExecutor(max_workers=args.clients, thread_name_prefix=f"client-{strategy}") as executor:
+        results = list(executor.map(
+            lambda client_id: run_client(client_id, args, strategy, show_ids, user_ids, gateway_ids, deadline),
+            range(args.clients)))
+    elapsed = time.perf_counter() - start
+    status_after = read_lock_status(connection)
+    oversold, mismatched = check_consistency(connection)
+    connection.close()
+
+    counters = sum((result[0] for result in results), Counter())
+    latencies = [sample for result in results for sample in result[1]]
+    lock_times = [sample for result in results for sample in result[2]]
+    lock_waits = status_after.get('Innodb_row_lock_waits', 0) - status_before.get('Innodb_row_lock_waits', 0)
+    lock_wait_ms = status_after.get('Innodb_row_lock_time', 0) - status_before.get('Innodb_row_lock_time', 0)
+
+    print(f"{strategy}: {counters['booked']} bookings in {elapsed:.1f}s ({counters['booked'] / elapsed:.1f} bookings/s)")
+    print(f"  seat conflicts {counters['conflict']}, sold out {counters['sold_out']}, "
+          f"deadlocks {counters['deadlock']}, lock wait timeouts {counters['lock_wait_timeout']}, "
+          f"retries {counters['retries']}, gave up {counters['gave_up']}, errors {counters['error']}")
+    for key in sorted(key for key in counters if key.startswith('error ')):
+        print(f"  {key}: {counters[key]}")
+    summarize_latencies('booking', latencies)
+    summarize_latencies('taking seats', lock_times)
+    print(f"  InnoDB row lock waits: {lock_waits} ({lock_wait_ms / max(lock_waits, 1):.1f}ms avg)"
+          + (f", deadlocks: {status_after['Innodb_deadlocks'] - status_before['Innodb_deadlocks']}"
+             if 'Innodb_deadlocks' in status_after else ""))
+    if oversold or mismatched:
+        print(f"❌ {oversold} seats sold twice, {mismatched} seats whose availability doesn't match their tickets")
+    else:
+        print("✅ No seat sold twice")
+
+    ordered = sorted(latencies)
+    return {
+        'bookings': counters['booked'],
+        'throughput': counters['booked'] / elapsed,
+        'p50': ordered[len(ordered) // 2] * 1000 if ordered else None,
+        'p99': ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1000 if ordered else None,
+        'deadlocks': counters['deadlock'],
+        'lock_waits': lock_waits,
+        'conflicts': counters['conflict']
+    }
+
+def main():
+    default_database = f"{load_db_config()['database']}_loadtest"
+    parser = argparse.ArgumentParser(description='Simulate concurrent clients booking seats and compare locking strategies')
+    parser.add_argument('--database', default=default_database,
+                        help='Scratch database to run against (its bookings are deleted before every run)')
+    parser.add_argument('--setup', action='store_true', help='(Re)create and seed the load-test database first')
+    parser.add_argument('--strategy', choices=STRATEGIES + ('all',), default='all', help='Seat locking strategy')
+    parser.add_argument('--clients', '-c', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds to run each strategy')
+    parser.add_argument('--seats', type=int, default=2, help='Seats per booking')
+    parser.add_argument('--shows', type=int, default=20, help='Shows to create with --setup')
+    parser.add_argument('--seats-per-show', type=int, default=200, help='Seats per screen with --setup')
+    parser.add_argument('--users', type=int, default=1000, help='Users to create with --setup')
+    parser.add_argument('--hot-shows', type=int, default=2, help='Number of hot shows')
+    parser.add_argument('--hot-fraction', type=float, default=0.8, help='Share of bookings aimed at the hot shows')
+    parser.add_argument('--payment-ms', type=float, default=0.0,
+                        help='Simulated payment gateway time spent inside the booking transaction')
+    parser.add_argument('--lock-wait-timeout', type=int, default=5, help='innodb_lock_wait_timeout for clients (s)')
+    parser.add_argument('--max-retries', type=int, default=3, help='Retries after a conflict, deadlock or timeout')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    if not args.database.endswith('_loadtest'):
+        print("❌ The load test deletes bookings; use a database whose name ends in _loadtest")
+        return
+    if not 1 <= args.seats <= 32:
+        print("❌ --seats must be between 1 and 32")
+        return
+
+    try:
+        if args.setup:
+            setup_database(args.database, args.shows, args.seats_per_show, args.users)
+        strategies = STRATEGIES if args.strategy == 'all' else (args.strategy,)
+        results = {strategy: run_strategy(args, strategy) for strategy in strategies}
+    except Error as e:
+        print(f"The error '{e}' occurred")
+        return
+
+    results = {strategy: result for strategy, result in results.items() if result}
+    if len(results) > 1:
+        print(f"\n{'strategy':<12} {'bookings/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'conflicts':>9} {'deadlocks':>9} {'lock waits':>10}")
+        for strategy, result in results.items():
+            p50 = f"{result['p50']:.1f}" if result['p50'] is not None else '-'
+            p99 = f"{result['p99']:.1f}" if result['p99'] is not None else '-'
+            print(f"{strategy:<12} {result['throughput']:>10.1f} {p50:>8} {p99:>8} {result['conflicts']:>9} "
+                  f"{result['deadlocks']:>9} {result['lock_waits']:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import os
+import sys
+import time
+import argparse
+import threading
+from collections import OrderedDict, defaultdict
+
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import get_connection
+
+# One generation counter per table, bumped by import_data.py after it writes the table
+CREATE_CATALOG_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS CatalogVersion (
+    table_name VARCHAR(64) PRIMARY KEY,
+    generation BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+"""
+
+# Tables served from the cache
+CATALOG_TABLES = ('Movie', 'MovieCast', 'Review', 'FoodItem', 'FoodItemSize', 'PaymentGateway')
+
+_MISSING = object()
+
+def bump_catalog_generation(connection, table_name):
+    """Record that a table changed so every catalog cache drops its entries"""
+    cursor = connection.cursor()
+    cursor.execute(CREATE_CATALOG_VERSION_TABLE)
+    cursor.execute("""
+        INSERT INTO CatalogVersion (table_name, generation) VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE generation = generation + 1
+    """, (table_name,))
+    connection.commit()
+    cursor.close()
+
+class LRUTTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds
+
+    `on_remove`, if given, is called with the keys the cache evicts or
+    expires on its own, after the cache's lock is released.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300.0, on_remove=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_remove = on_remove
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return the cached value or _MISSING, refreshing its LRU position"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            if entry[0] >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+        if self.on_remove is not None:
+            self.on_remove([key])
+        return _MISSING
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries beyond maxsize"""
+        evicted = []
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                evicted.append(self._entries.popitem(last=False)[0])
+                self.evictions += 1
+        if evicted and self.on_remove is not None:
+            self.on_remove(evicted)
+
+    def discard(self, keys):
+        """Drop the given keys, returning how many were present"""
+        with self._lock:
+            return sum(self._entries.pop(key, None) is not None for key in keys)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+class CatalogCache:
+    """Read-through cache for movies, cast, reviews, the food menu and payment gateways
+
+    Entries are tagged with the tables they were built from. At most every
+    `check_interval` seconds one small query reads CatalogVersion; when the
+    importer has bumped a table's generation, the entries built from that
+    table are dropped. Between checks reads never touch the database.
+    A load that overlapped an invalidation of its tables is returned but
+    not cached.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300.0, check_interval=5.0, database=None):
+        self.cache = LRUTTLCache(maxsize, ttl, on_remove=self._untag)
+        self.check_interval = check_interval
+        self.database = database
+        self.invalidations = 0
+        self._generations = None
+        self._next_check = 0.0
+        self._keys_by_table = defaultdict(set)
+        self._tables_by_key = {}
+        # Invalidations per table, to tell whether one happened during a load
+        self._table_epochs = defaultdict(int)
+        self._lock = threading.Lock()
+        # Reentrant: a store can evict, and the eviction untags under the same lock
+        self._tags_lock = threading.RLock()
+
+    def _query(self, sql, params=()):
+        """Run a query on a pooled connection"""
+        connection = get_connection(self.database)
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+        finally:
+            connection.close()
+
+    def _read_generations(self):
+        """Read the current generation of every catalog table"""
+        connection = get_connection(self.database)
+        try:
+            cursor = connection.cursor()
+            cursor.execute(CREATE_CATALOG_VERSION_TABLE)
+            cursor.execute("SELECT table_name, generation FROM CatalogVersion")
+            generations = dict(cursor.fetchall())
+            cursor.close()
+            connection.commit()
+        finally:
+            connection.close()
+        return {table: generations.get(table, 0) for table in CATALOG_TABLES}
+
+    def _check_generations(self):
+        """Invalidate entries of tables whose generation moved since the last check"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            generations = self._read_generations()
+            if self._generations is not None:
+                for table, generation in generations.items():
+                    if generation != self._generations.get(table):
+                        self.invalidate(table)
+            self._generations = generations
+            self._next_check = time.monotonic() + self.check_interval
+
+    def invalidate(self, table_name):
+        """Drop every entry built from a table"""
+        with self._tags_lock:
+            self._table_epochs[table_name] += 1
+            keys = self._keys_by_table.pop(table_name, set())
+            self.invalidations += self.cache.discard(keys)
+            for key in keys:
+                self._untag_key(key)
+
+    def _epochs(self, tables):
+        """Snapshot the invalidation count of each table"""
+        with self._tags_lock:
+            return [self._table_epochs[table] for table in tables]
+
+    def _store(self, key, value, tables, epochs=None):
+        """Cache a value and remember which tables it depends on
+
+        With `epochs` taken before loading, a value whose tables were
+        invalidated in the meantime is not stored.
+        """
+        with self._tags_lock:
+            if epochs is not None and epochs != [self._table_epochs[table] for table in tables]:
+                return
+            self._untag_key(key)
+            self.cache.put(key, value)
+            self._tables_by_key[key] = tables
+            for table in tables:
+                self._keys_by_table[table].add(key)
+
+    def _untag_key(self, key):
+        for table in self._tables_by_key.pop(key, ()):
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
+
+    def _untag(self, keys):
+        """Forget the tables of keys the LRU evicted or expired"""
+        with self._tags_lock:
+            for key in keys:
+                # Stored again since: the new entry keeps its tags
+                if key not in self.cache:
+                    self._untag_key(key)
+
+    def _read_through(self, key, tables, loader):
+        """Return a cached value, loading and caching it on a miss"""
+        self._check_generations()
+        value = self.cache.get(key)
+        if value is _MISSING:
+            epochs = self._epochs(tables)
+            value = loader()
+            self._store(key, value, tables, epochs)
+        return value
+
+    def warm_up(self):
+        """Bulk-load every catalog table with one query each"""
+        start = time.perf_counter()
+        self._check_generations()
+        movies = self._query("SELECT * FROM Movie ORDER BY movie_id")
+        self._store(('movies', None), movies, ('Movie',))
+        for movie in movies:
+            self._store(('movie', movie['movie_id']), movie, ('Movie',))
+        for status in {movie['status'] for movie in movies}:
+            self._store(('movies', status), [m for m in movies if m['status'] == status], ('Movie',))
+
+        for table, key, order in (('MovieCast', 'cast', 'cast_id'), ('Review', 'reviews', 'review_date DESC')):
+            by_movie = defaultdict(list)
+            for row in self._query(f"SELECT * FROM {table} ORDER BY movie_id, {order}"):
+                by_movie[row['movie_id']].append(row)
+            for movie in movies:
+                self._store((key, movie['movie_id']), by_movie.get(movie['movie_id'], []), (table,))
+
+        self._store(('menu',), self._load_menu(), ('FoodItem', 'FoodItemSize'))
+        self._store(('gateways',), self._query("SELECT * FROM PaymentGateway ORDER BY gateway_id"),
+                    ('PaymentGateway',))
+        print(f"✅ Catalog cache warmed with {len(self.cache)} entries in {time.perf_counter() - start:.2f}s")
+
+    def _load_menu(self):
+        """Load food items with their sizes nested under each item"""
+        items = self._query("SELECT * FROM FoodItem ORDER BY item_id")
+        sizes = defaultdict(list)
+        for size in self._query("SELECT * FROM FoodItemSize ORDER BY item_id, rate"):
+            sizes[size['item_id']].append(size)
+        for item in items:
+            item['sizes'] = sizes.get(item['item_id'], [])
+        return items
+
+    def get_movie(self, movie_id):
+        """Get one movie row, or None"""
+        def load():
+            rows = self._query("SELECT * FROM Movie WHERE movie_id = %s", (movie_id,))
+            return rows[0] if rows else None
+        return self._read_through(('movie', movie_id), ('Movie',), load)
+
+    def list_movies(self, status=None):
+        """List movies, optionally only those with a given status (e.g. 'Now Showing')"""
+        if status is None:
+            return self._read_through(('movies', None), ('Movie',),
+                                      lambda: self._query("SELECT * FROM Movie ORDER BY movie_id"))
+        return self._read_through(('movies', status), ('Movie',), lambda: self._query(
+            "SELECT * FROM Movie WHERE status = %s ORDER BY movie_id", (status,)))
+
+    def get_cast(self, movie_id):
+        """List the cast of a movie"""
+        return self._read_through(('cast', movie_id), ('MovieCast',), lambda: self._query(
+            "SELECT * FROM MovieCast WHERE movie_id = %s ORDER BY cast_id", (movie_id,)))
+
+    def get_reviews(self, movie_id):
+        """List the reviews of a movie, newest first"""
+        return self._read_through(('reviews', movie_id), ('Review',), lambda: self._query(
+            "SELECT * FROM Review WHERE movie_id = %s ORDER BY review_date DESC", (movie_id,)))
+
+    def get_menu(self):
+        """Get the food menu: items with their sizes and rates"""
+        return self._read_through(('menu',), ('FoodItem', 'FoodItemSize'), self._load_menu)
+
+    def get_gateways(self):
+        """List the payment gateways"""
+        return self._read_through(('gateways',), ('PaymentGateway',), lambda: self._query(
+            "SELECT * FROM PaymentGateway ORDER BY gateway_id"))
+
+    def stats(self):
+        """Hit, miss, eviction, expiry and invalidation counters"""
+        lookups = self.cache.hits + self.cache.misses
+        return {
+            'entries': len(self.cache),
+            'hits': self.cache.hits,
+            'misses': self.cache.misses,
+            'hit_ratio': self.cache.hits / lookups if lookups else 0.0,
+            'evictions': self.cache.evictions,
+            'expirations': self.cache.expirations,
+            'invalidations': self.invalidations
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm the catalog cache and measure steady-state reads')
+    parser.add_argument('--reads', '-n', type=int, default=100000, help='Catalog reads to perform after warm-up')
+    args = parser.parse_args()
+
+    catalog = CatalogCache()
+    catalog.warm_up()
+    movies = catalog.list_movies()
+    if not movies:
+        print("❌ No movies found, import data first")
+        return
+    start = time.perf_counter()
+    for i in range(args.reads):
+        movie = movies[i % len(movies)]
+        catalog.get_movie(movie['movie_id'])
+        catalog.get_cast(movie['movie_id'])
+        catalog.get_menu()
+    elapsed = time.perf_counter() - start
+    print(f"{args.reads * 3} reads in {elapsed:.2f}s ({args.reads * 3 / elapsed:,.0f} reads/s)")
+    print(f"Cache stats: {catalog.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+import os
+import re
+import sys
+import csv
+import json
+import warnings
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+# The shared CSV helpers live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from csv_source import DEFAULT_PARSER_ENGINE, csv_header, read_csv_arrow, is_parquet, read_parquet
+
+# Integer ranges of the signed MySQL integer types
+INT_RANGES = {
+    'tinyint': (-2 ** 7, 2 ** 7 - 1),
+    'smallint': (-2 ** 15, 2 ** 15 - 1),
+    'mediumint': (-2 ** 23, 2 ** 23 - 1),
+    'int': (-2 ** 31, 2 ** 31 - 1),
+    'integer': (-2 ** 31, 2 ** 31 - 1),
+    'bigint': (-2 ** 63, 2 ** 63 - 1)
+}
+
+# Text accepted for BOOLEAN columns, compared case-insensitively
+BOOLEAN_VALUES = {
+    'true': True, 'false': False, 't': True, 'f': False,
+    'yes': True, 'no': False, 'y': True, 'n': False,
+    '1': True, '0': False, '1.0': True, '0.0': False
+}
+
+# Card expiry dates such as "12/30" (MM/YY), stored as the last day of that month
+CARD_EXPIRY_RE = r'^\s*(0[1-9]|1[0-2])\s*/\s*(\d{2})\s*$'
+
+# pandas reports malformed lines as "Skipping line 7: expected 6 fields, saw 8"
+BAD_LINE_RE = re.compile(r'Skipping line (\d+): (.*)')
+
+# What to do, per (table, column), with values the column's type can't take, instead of rejecting the row:
+#   map      replaces raw values before conversion, e.g. spelled-out numbers with digits
+#   from     fills missing values from another column of the row, through the two-column
+#            mapping `query` returns
+#   default  stands in for values that are still missing or unconvertible
+#   null     stores NULL for unconvertible values (nullable columns only)
+# Only fallbacks that store what the column means belong here. Movie.rating, for one, is a score,
+# so the certificates movies.csv carries there (G, PG-13, ...) are rejected rather than coded into it.
+COLUMN_FALLBACKS = {
+    # Combo items come in a single size, and their order rows leave size_id blank
+    ('FoodOrderItem', 'size_id'): {
+        'from': 'item_id',
+        'query': "SELECT item_id, MIN(size_id) FROM FoodItemSize GROUP BY item_id HAVING COUNT(*) = 1"
+    }
+}
+
+# Where reject files are written by default
+DEFAULT_REJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rejects')
+
+def column_kind(sql_type):
+    """Reduce a MySQL column type to (kind, arguments), e.g. 'decimal(3,1)' -> ('decimal', (3, 1))"""
+    sql_type = sql_type.lower()
+    match = re.match(r'(\w+)(?:\(([\d,\s]+)\))?', sql_type)
+    base = match.group(1)
+    args = tuple(int(arg) for arg in match.group(2).split(',')) if match.group(2) else ()
+    if base in ('boolean', 'bool') or (base == 'tinyint' and args == (1,)):
+        return 'boolean', ()
+    if base in INT_RANGES:
+        return 'int', INT_RANGES[base]
+    if base in ('decimal', 'numeric'):
+        return 'decimal', args if len(args) == 2 else (args[0] if args else 10, 0)
+    if base in ('float', 'double', 'real'):
+        return 'float', ()
+    if base in ('datetime', 'timestamp'):
+        return 'datetime', ()
+    if base == 'date':
+        return 'date', ()
+    if base in ('varchar', 'char'):
+        return 'varchar', args
+    return 'text', ()
+
+def get_column_specs(connection, table_name):
+    """Read (column, kind, arguments, nullable) for every column of a table from DESCRIBE"""
+    cursor = connection.cursor()
+    cursor.execute(f"DESCRIBE `{table_name}`")
+    specs = []
+    for field, sql_type, null, _, _, extra in cursor.fetchall():
+        if isinstance(sql_type, bytes):
+            sql_type = sql_type.decode()
+        kind, args = column_kind(sql_type)
+        # AUTO_INCREMENT columns fill themselves in when given NULL
+        nullable = null == 'YES' or 'auto_increment' in (extra or '')
+        specs.append((field, kind, args, nullable))
+    cursor.close()
+    return specs
+
+def load_column_fallbacks(path=None):
+    """COLUMN_FALLBACKS, with columns overridden by a JSON file of {"Table.column": policy}"""
+    fallbacks = dict(COLUMN_FALLBACKS)
+    if path:
+        with open(path) as f:
+            for key, policy in json.load(f).items():
+                table, column = key.split('.', 1)
+                fallbacks[(table, column)] = policy
+    return fallbacks
+
+def resolve_fallbacks(connection, table_name, fallbacks=None):
+    """One table's fallbacks as {column: policy}, with each `query` read into a `lookup` mapping"""
+    fallbacks = COLUMN_FALLBACKS if fallbacks is None else fallbacks
+    resolved = {}
+    for (table, column), policy in fallbacks.items():
+        if table != table_name:
+            continue
+        policy = dict(policy)
+        query = policy.pop('query', None)
+        if query is not None:
+            cursor = connection.cursor()
+            cursor.execute(query)
+            policy['lookup'] = {str(key): value for key, value in cursor.fetchall()}
+            cursor.close()
+        resolved[column] = policy
+    return resolved
+
+def _as_text(series):
+    """View a column as stripped strings, with blanks treated as missing"""
+    text = series.astype('string').str.strip()
+    return text.mask(text == '')
+
+def coerce_column(series, kind, args):
+    """Convert one column to its target type, returning (values, mask of failed rows, reason per row)
+
+    Missing values stay missing and are never counted as failures here.
+    """
+    text = _as_text(series)
+    present = text.notna()
+
+    if kind in ('int', 'decimal', 'float'):
+        numbers = pd.to_numeric(text, errors='coerce')
+        not_number = present & numbers.isna()
+        if kind == 'float':
+            return numbers, not_number, pd.Series('not a number', index=series.index)
+        if kind == 'int':
+            low, high = args
+            fractional = numbers.notna() & (numbers != np.floor(numbers))
+            out_of_range = numbers.notna() & ((numbers < low) | (numbers > high))
+            bad = not_number | fractional | out_of_range
+            reason = np.select([not_number, fractional], ['not a number', 'not a whole number'], 'out of range')
+            return numbers.where(~bad).astype('Int64'), bad, pd.Series(reason, index=series.index)
+        precision, scale = args
+        numbers = numbers.round(scale)
+        out_of_range = numbers.notna() & (numbers.abs() >= 10.0 ** (precision - scale))
+        reason = np.where(out_of_range, f'out of range for DECIMAL({precision},{scale})', 'not a number')
+        return numbers.where(~out_of_range), not_number | out_of_range, pd.Series(reason, index=series.index)
+
+    if kind in ('datetime', 'date'):
+        parsed = pd.to_datetime(text, format='ISO8601', errors='coerce')
+        if kind == 'date':
+            # Fall back to MM/YY card expiry dates for values that are not ISO dates
+            expiry = text.where(parsed.isna()).str.extract(CARD_EXPIRY_RE)
+            has_expiry = expiry[0].notna()
+            if has_expiry.any():
+                month_start = pd.to_datetime('20' + expiry[1][has_expiry] + '-' + expiry[0][has_expiry] + '-01')
+                parsed[has_expiry] = month_start + pd.offsets.MonthEnd(0)
+            parsed = parsed.dt.normalize()
+        values = parsed.dt.date if kind == 'date' else parsed
+        return (values.astype(object).where(parsed.notna(), None), present & parsed.isna(),
+                pd.Series(f'not a valid {kind}', index=series.index))
+
+    if kind == 'boolean':
+        values = text.str.lower().map(BOOLEAN_VALUES)
+        return values.astype('boolean'), present & values.isna(), pd.Series('not a boolean', index=series.index)
+
+    # Text keeps the raw value; only the declared length can fail
+    values = text.astype(object).where(present, None)
+    if kind == 'varchar' and args:
+        too_long = (present & (text.str.len() > args[0])).fillna(False).astype(bool)
+        return values, too_long, pd.Series(f'longer than {args[0]} characters', index=series.index)
+    return values, pd.Series(False, index=series.index), pd.Series('', index=series.index)
+
+def _apply_fallback_values(text, policy, source):
+    """Raw values of a column after its fallback's `map` and `lookup` (keyed on `source`), and how many changed"""
+    counts = Counter()
+    if 'map' in policy:
+        mapped = text.astype(object).map({str(key): str(value) for key, value in policy['map'].items()})
+        changed = mapped.notna()
+        text = text.astype(object).mask(changed, mapped)
+        counts['mapped'] = int(changed.sum())
+    if 'lookup' in policy and source is not None:
+        looked_up = _as_text(source).astype(object).map(policy['lookup'])
+        filled = text.isna() & looked_up.notna()
+        text = text.astype(object).mask(filled, looked_up.astype(str))
+        counts[f"filled from {policy['from']}"] = int(filled.sum())
+    return text, counts
+
+def coerce_with_fallback(series, kind, args, nullable, policy=None, source=None):
+    """coerce_column() under a column's fallback policy, with NULLs in a NOT NULL column failing too
+
+    `source` is the column a `from` policy looks values up by. Returns
+    (values, mask of failed rows, reason per row, Counter of values each
+    fallback step kept).
+    """
+    if policy is None:
+        values, bad, reason = coerce_column(series, kind, args)
+        counts = Counter()
+    else:
+        text, counts = _apply_fallback_values(_as_text(series), policy, source)
+        values, bad, reason = coerce_column(text, kind, args)
+    bad = bad.astype(bool)
+    if policy is not None:
+        if 'default' in policy:
+            replace = bad | values.isna()
+            default = coerce_column(pd.Series([str(policy['default'])]), kind, args)[0].iloc[0]
+            values = values.mask(replace, default)
+            bad &= ~replace
+            counts['defaulted'] = int(replace.sum())
+        elif policy.get('null') and nullable:
+            values = values.mask(bad, None)
+            counts['set to NULL'] = int(bad.sum())
+            bad &= False
+    if not nullable:
+        missing = values.isna() & ~bad
+        reason = reason.mask(missing, 'NULL in NOT NULL column')
+        bad |= missing
+    return values, bad, reason, counts
+
+def coerce_chunk(df, column_specs, fallbacks=None, fallback_counts=None):
+    """Coerce a cleaned chunk to the table's column types, vectorized per column
+
+    `fallbacks` is resolve_fallbacks() for the table; values they fix are
+    kept and tallied per column in the `fallback_counts` Counter, if given.
+    Returns (good rows with converted values, rejected rows with their
+    original values and a `reason` column naming the first failing column).
+    """
+    fallbacks = fallbacks or {}
+    reasons = pd.Series(None, index=df.index, dtype=object)
+    converted = {}
+    for name, kind, args, nullable in column_specs:
+        if name not in df.columns:
+            continue
+        policy = fallbacks.get(name)
+        source = policy.get('from') if policy else None
+        source = converted.get(source, df.get(source)) if source else None
+        values, bad, reason, counts = coerce_with_fallback(df[name], kind, args, nullable, policy, source)
+        if fallback_counts is not None:
+            fallback_counts.update({f"{name}: {what}": count for what, count in counts.items() if count})
+        new = bad & reasons.isna()
+        if new.any():
+            reasons[new] = name + ': ' + reason[new].astype(str)
+        converted[name] = values
+
+    rejected = reasons.notna()
+    good = pd.DataFrame(converted, index=df.index)[list(df.columns)][~rejected]
+    rejects = df[rejected].assign(reason=reasons[rejected])
+    return good, rejects
+
+def bad_line_rejects(messages, columns):
+    """Turn pandas 'Skipping line N: ...' warnings into reject rows"""
+    rows = []
+    for message in messages:
+        match = BAD_LINE_RE.search(message)
+        if match:
+            rows.append({'line': int(match.group(1)), 'reason': f"malformed line: {match.group(2).strip()}"})
+    return pd.DataFrame(rows, columns=['line', 'reason'] + list(columns))
+
+def source_rows(raw, lines, reasons):
+    """Rejected rows as they appear in the CSV file, with their line numbers and reasons"""
+    line_numbers = pd.Series(lines, index=raw.index)
+    return raw.loc[reasons.index].assign(line=line_numbers[reasons.index], reason=reasons)
+
+def read_csv_chunks(csv_file, chunk_size, engine=DEFAULT_PARSER_ENGINE, **kwargs):
+    """Read a CSV file as text chunks, yielding (chunk, line numbers, malformed-line rejects)
+
+    Every value is read as a string so the coercion stage sees what the file
+    holds (no float rounding of card numbers, no 7.0 for 7). Malformed lines are
+    reported through pandas warnings and returned instead of being dropped.
+    engine='pyarrow' parses with Arrow's multithreaded reader instead.
+    Parquet files are read batch by batch whatever the engine.
+    """
+    if is_parquet(csv_file):
+        yield from read_parquet_chunks(csv_file, chunk_size)
+        return
+    if engine == 'pyarrow':
+        yield from read_arrow_chunks(csv_file, chunk_size, kwargs.get('encoding', 'utf-8'))
+        return
+    reader = pd.read_csv(csv_file, dtype=str, keep_default_na=False, na_values=[''],
+                         on_bad_lines='warn', chunksize=chunk_size, **kwargs)
+    next_line = 2  # line 1 is the header
+    columns = []
+    with reader:
+        while True:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always', pd.errors.ParserWarning)
+                try:
+                    chunk = next(reader)
+                except StopIteration:
+                    chunk = None
+            messages = []
+            for warning in caught:
+                if issubclass(warning.category, pd.errors.ParserWarning):
+                    # One warning can list several skipped lines
+                    messages.extend(str(warning.message).strip().splitlines())
+                else:
+                    warnings.showwarning(warning.message, warning.category, warning.filename, warning.lineno)
+            if chunk is not None:
+                columns = list(chunk.columns)
+            bad_lines = bad_line_rejects(messages, columns)
+            if chunk is None:
+                if not bad_lines.empty:
+                    yield pd.DataFrame(columns=columns), np.array([], dtype=np.int64), bad_lines
+                return
+            # Good rows take the line numbers left over once the malformed lines are removed
+            span = np.arange(next_line, next_line + len(chunk) + len(bad_lines))
+            lines = np.setdiff1d(span, bad_lines['line'].to_numpy(), assume_unique=True)[:len(chunk)]
+            next_line = span[-1] + 1 if len(span) else next_line
+            yield chunk, lines, bad_lines
+
+def read_parquet_chunks(parquet_file, chunk_size):
+    """read_csv_chunks() for a Parquet file: values as their text form, row numbers as line numbers
+
+    Parquet has no malformed rows, so the rejects are always empty, and the
+    "line" of a row is its 1-based position in the file.
+    """
+    next_row = 1
+    for chunk in read_parquet(parquet_file, chunk_size, as_text=True):
+        lines = np.arange(next_row, next_row + len(chunk))
+        next_row += len(chunk)
+        yield chunk, lines, bad_line_rejects([], list(chunk.columns))
+
+def read_arrow_chunks(csv_file, chunk_size, encoding='utf-8'):
+    """read_csv_chunks() on Arrow's multithreaded parser, with the same chunks, line numbers and rejects
+
+    Arrow skips every row with the wrong number of fields. The C parser only
+    rejects rows with too many, and pads short rows with empty values, so
+    short rows are parsed from their text and put back into their chunk.
+    """
+    columns = csv_header(csv_file, encoding)
+
+    def rejects_for(rows):
+        # Same wording as the C parser's warnings
+        return bad_line_rejects([f"Skipping line {line}: expected {expected} fields, saw {actual}"
+                                 for line, expected, actual, _ in rows if actual > expected], columns)
+
+    reported = []
+    bad_numbers = np.array([], dtype=np.int64)
+    parsed = 0
+    next_index = 0
+    try:
+        for chunk in read_csv_arrow(csv_file, chunk_size, encoding, as_text=True, bad_rows=reported):
+            # Parser threads append as they go; take what was reported for the blocks parsed so far
+            count = len(reported)
+            new_bad, reported[:count] = reported[:count], []
+            bad_numbers = np.sort(np.append(bad_numbers, [row[0] for row in new_bad]).astype(np.int64))
+            # The k-th parsed row sits on line k + 2, pushed down by every skipped line before it
+            skipped_before = bad_numbers - 2 - np.arange(len(bad_numbers))
+            positions = np.arange(parsed, parsed + len(chunk))
+            lines = positions + 2 + np.searchsorted(skipped_before, positions, side='right')
+            parsed += len(chunk)
+
+            short = [row for row in new_bad if row[2] < row[1]]
+            if short:
+                values = [next(csv.reader([text]), []) for _, _, _, text in short]
+                padded = pd.DataFrame([row + [''] * (len(columns) - len(row)) for row in values],
+                                      columns=columns, dtype=str)
+                chunk = pd.concat([chunk, padded.mask(padded == '')])
+                lines = np.append(lines, [row[0] for row in short])
+            chunk.index = pd.RangeIndex(next_index, next_index + len(chunk))
+            next_index += len(chunk)
+            yield chunk, lines, rejects_for(new_bad)
+    except ValueError as e:
+        # Arrow's own UTF-8 decoder fails with ArrowInvalid; raise what Python's codecs (and the C parser) raise
+        if 'invalid UTF8' not in str(e):
+            raise
+        raise UnicodeDecodeError('utf-8', b'', 0, 0, str(e)) from e
+    if reported:
+        yield pd.DataFrame(columns=columns), np.array([], dtype=np.int64), rejects_for(reported)
+
+class RejectWriter:
+    """Streams rejected rows of one CSV file to <reject_dir>/<file>.rejects.csv and counts reasons"""
+
+    def __init__(self, csv_file, reject_dir=DEFAULT_REJECT_DIR):
+        name = os.path.basename(csv_file)
+        self.path = os.path.join(reject_dir, name[:name.index('.')] + '.rejects.csv')
+        self.counts = Counter()
+        self.dropped_columns = []
+        self.fallbacks = Counter()
+        self._file = None
+        self._columns = None
+
+    def write(self, rejects):
+        """Append rejected CSV rows (with `line` and `reason` columns) to the reject file"""
+        if rejects.empty:
+            return
+        header = self._file is None
+        if header:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            self._columns = ['line', 'reason'] + [col for col in rejects.columns if col not in ('line', 'reason')]
+        rejects.reindex(columns=self._columns).to_csv(self._file, header=header, index=False,
+                                                      quoting=csv.QUOTE_MINIMAL)
+        # Count by kind of reason: "overlaps show 12" and "overlaps show 40" add up together
+        self.counts.update(rejects['reason'].str.replace(r'\d+', '#', regex=True).value_counts().to_dict())
+
+    @property
+    def total(self):
+        """Number of rows rejected so far"""
+        return sum(self.counts.values())
+
+    def close(self):
+        """Close the reject file and print how many rows were rejected and why"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.dropped_columns:
+            print(f"⚠️  CSV columns not in the table were not imported: {self.dropped_columns}")
+        if self.fallbacks:
+            print(f"⚠️  {sum(self.fallbacks.values())} values kept through column fallbacks instead of rejected:")
+            for what, count in self.fallbacks.most_common():
+                print(f"  {count:>8}  {what}")
+        if self.counts:
+            print(f"⚠️  {self.total} rows rejected -> {self.path}")
+            for reason, count in self.counts.most_common():
+                print(f"  {count:>8}  {reason}")
+        elif os.path.exists(self.path):
+            # Don't leave the rejects of an earlier run behind
+            os.remove(self.path)
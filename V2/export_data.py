@@ -0,0 +1,255 @@
+import os
+import sys
+import csv
+import gzip
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+from import_data import TABLE_ORDER
+
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import open_connection, load_db_config
+
+# File names the importer maps back to each table (same names as the dataset folder)
+TABLE_FILE_NAMES = {
+    'Screen': 'screens',
+    'Movie': 'movies',
+    'User': 'users',
+    'PaymentGateway': 'payment_gateways',
+    'FoodItem': 'food_items',
+    'Seat': 'seats',
+    'MovieCast': 'movie_casts',
+    'Review': 'reviews',
+    'Membership': 'memberships',
+    'Show': 'shows',
+    'ShowSeat': 'show_seats',
+    'FoodItemSize': 'food_item_sizes',
+    'Booking': 'bookings',
+    'Ticket': 'tickets',
+    'Payment': 'payments',
+    'FoodOrder': 'food_orders',
+    'FoodOrderItem': 'food_order_items',
+    'PointsTransaction': 'points_transactions'
+}
+
+EXPORT_FORMATS = {
+    'csv': '.csv',
+    'csv.gz': '.csv.gz',
+    'parquet': '.parquet'
+}
+
+# Completed tables are recorded here so an interrupted export can resume
+MANIFEST_FILE = 'export_manifest.json'
+
+def get_export_columns(connection, table_name):
+    """Get (column, data_type, column_type, precision, scale, is_primary) in schema order"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT COLUMN_NAME, DATA_TYPE, COLUMN_TYPE, NUMERIC_PRECISION, NUMERIC_SCALE, COLUMN_KEY = 'PRI'
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY ORDINAL_POSITION
+    """, (table_name,))
+    columns = cursor.fetchall()
+    cursor.close()
+    return columns
+
+def format_csv_value(value):
+    """Format a value the way the importer reads it back"""
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        # DATETIME -> 'YYYY-MM-DD HH:MM:SS', DATE -> 'YYYY-MM-DD'
+        return value.isoformat(sep=' ') if hasattr(value, 'hour') else value.isoformat()
+    return value
+
+def parquet_schema(columns):
+    """Build an Arrow schema from information_schema column types"""
+    import pyarrow as pa
+    fields = []
+    for name, data_type, column_type, precision, scale, _ in columns:
+        if column_type == 'tinyint(1)':
+            arrow_type = pa.bool_()
+        elif data_type in ('tinyint', 'smallint', 'mediumint', 'int', 'bigint'):
+            arrow_type = pa.int64()
+        elif data_type == 'decimal':
+            arrow_type = pa.decimal128(int(precision), int(scale))
+        elif data_type in ('float', 'double'):
+            arrow_type = pa.float64()
+        elif data_type in ('datetime', 'timestamp'):
+            arrow_type = pa.timestamp('us')
+        elif data_type == 'date':
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+class ChunkWriter:
+    """Append row chunks to a CSV, gzip CSV or Parquet file"""
+
+    def __init__(self, path, export_format, columns):
+        self.path = path
+        self.export_format = export_format
+        self.column_names = [column[0] for column in columns]
+        if export_format == 'parquet':
+            import pyarrow.parquet as pq
+            self.schema = parquet_schema(columns)
+            self.file = None
+            self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+        else:
+            if export_format == 'csv.gz':
+                self.file = gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=6)
+            else:
+                self.file = open(path, 'w', encoding='utf-8', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.column_names)
+
+    def write_rows(self, rows):
+        """Append a chunk of row tuples"""
+        if self.export_format == 'parquet':
+            import pyarrow as pa
+            arrays = []
+            for values, field in zip(zip(*rows), self.schema):
+                if pa.types.is_boolean(field.type):
+                    # BOOLEAN columns come back from MySQL as 0/1
+                    values = [None if value is None else bool(value) for value in values]
+                arrays.append(pa.array(values, type=field.type))
+            self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        else:
+            self.writer.writerows([format_csv_value(value) for value in row] for row in rows)
+
+    def close(self):
+        """Flush and close the underlying file"""
+        if self.export_format == 'parquet':
+            self.writer.close()
+        else:
+            self.file.close()
+
+def export_table(connect, table_name, output_dir, export_format, chunk_size):
+    """Stream one table in primary-key order to a file, returning (file name, rows, seconds)
+
+    Rows come from an unbuffered cursor and are written chunk by chunk, so
+    memory use does not grow with the table. The file is written under a
+    temporary name and renamed only once it is complete.
+    """
+    started = time.perf_counter()
+    connection = connect()
+    try:
+        columns = get_export_columns(connection, table_name)
+        if not columns:
+            raise RuntimeError(f"table {table_name} does not exist")
+        pk_columns = [f"`{column[0]}`" for column in columns if column[5]]
+        order_by = f" ORDER BY {', '.join(pk_columns)}" if pk_columns else ""
+        column_list = ', '.join(f"`{column[0]}`" for column in columns)
+
+        file_name = TABLE_FILE_NAMES.get(table_name, table_name.lower()) + EXPORT_FORMATS[export_format]
+        final_path = os.path.join(output_dir, file_name)
+        part_path = final_path + '.part'
+
+        cursor = connection.cursor(buffered=False)
+        cursor.execute(f"SELECT {column_list} FROM `{table_name}`{order_by}")
+        writer = ChunkWriter(part_path, export_format, columns)
+        rows_written = 0
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.write_rows(rows)
+                rows_written += len(rows)
+        finally:
+            writer.close()
+            cursor.close()
+        os.replace(part_path, final_path)
+        return file_name, rows_written, time.perf_counter() - started
+    finally:
+        connection.close()
+
+def load_manifest(output_dir):
+    """Load the tables already exported to this directory"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(output_dir, manifest):
+    """Write the manifest atomically"""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def export_database(connect, tables, output_dir, export_format='csv', jobs=4, chunk_size=10000, resume=False):
+    """Export tables in parallel, skipping ones a previous run completed when resuming"""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir) if resume else {}
+    manifest_lock = threading.Lock()
+
+    pending = []
+    for table in tables:
+        done = manifest.get(table)
+        if done and done['format'] == export_format and os.path.exists(os.path.join(output_dir, done['file'])):
+            print(f"⏭️  {table}: already exported ({done['rows']} rows)")
+        else:
+            pending.append(table)
+
+    failed = []
+    with tqdm(total=len(pending), desc="Exporting tables") as pbar:
+        with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="export") as executor:
+            # Tables wait in the queue for a free worker, so each one is timed inside export_table
+            futures = {executor.submit(export_table, connect, table, output_dir, export_format, chunk_size): table
+                       for table in pending}
+            for future in as_completed(futures):
+                table = futures[future]
+                try:
+                    file_name, rows, seconds = future.result()
+                    with manifest_lock:
+                        manifest[table] = {
+                            'file': file_name,
+                            'format': export_format,
+                            'rows': rows,
+                            'completed_at': time.strftime('%Y-%m-%d %H:%M:%S')
+                        }
+                        save_manifest(output_dir, manifest)
+                    print(f"✅ {table}: {rows} rows -> {file_name} ({seconds:.1f}s)")
+                except Exception as e:
+                    print(f"❌ Error exporting {table}: {e}")
+                    failed.append(table)
+                pbar.update(1)
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the SRM_STEP database to CSV, gzip CSV or Parquet files')
+    parser.add_argument('--output', '-o', default='export', help='Output folder')
+    parser.add_argument('--format', '-f', choices=list(EXPORT_FORMATS), default='csv', help='Output file format')
+    parser.add_argument('--tables', default='', help='Comma-separated tables to export (default: all)')
+    parser.add_argument('--jobs', '-j', type=int, default=4, help='Tables exported in parallel')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows fetched and written per chunk')
+    parser.add_argument('--resume', action='store_true', help='Skip tables completed by a previous run into the same folder')
+    args = parser.parse_args()
+
+    db_name = load_db_config()['database']
+
+    tables = [t.strip() for t in args.tables.split(',') if t.strip()] or list(TABLE_ORDER)
+    print(f"Exporting {len(tables)} tables from '{db_name}' to '{args.output}' as {args.format}")
+
+    # Each worker opens its own connection, so --jobs isn't capped by the pool size
+    failed = export_database(
+        lambda: open_connection(db_name),
+        tables, args.output, export_format=args.format, jobs=args.jobs,
+        chunk_size=args.chunk_size, resume=args.resume
+    )
+    if failed:
+        print(f"\n❌ {len(failed)} tables failed: {', '.join(failed)}. Re-run with --resume to retry only those.")
+    else:
+        print("\n✅ Export completed")
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,40 @@
 import os
 import pandas as pd
-import mysql.connector
 from mysql.connector import Error
-from sqlalchemy import create_engine
-import glob
+from sqlalchemy.exc import DBAPIError
 from tqdm import tqdm
 import re
 import numpy as np
 import time
 import sys
 import argparse
+import json
+import queue
+import threading
+import codecs
+import random
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def create_connection(host_name, user_name, user_password, db_name):
-    """Create a connection to MySQL database"""
-    connection = None
-    try:
-        connection = mysql.connector.connect(
-            host=host_name,
-            user=user_name,
-            passwd=user_password,
-            database=db_name,
-            charset='utf8mb4',  
-            use_unicode=True
-        )
-        print(f"MySQL/{db_name} connection successful")
-    except Error as e:
-        print(f"The error '{e}' occurred")
-    return connection
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import create_connection, get_engine, load_db_config, is_sqlite
+from csv_source import list_csv_files, csv_stem, sample_csv_head, is_parquet, PARSER_ENGINES, DEFAULT_PARSER_ENGINE
+from batch_insert import PacketBatchInserter
+from chunk_control import ChunkSizeController, Rechunker, error_kind
+from catalog_cache import bump_catalog_generation
+from search_index import SEARCH_TABLES, update_search_index
+from schedule_index import schedule_filter, DEFAULT_RUNTIME_MINUTES
+from user_dedup import deduplicate_users
+from post_load import analyze_tables, print_load_summary
+from coercion import (get_column_specs, coerce_chunk, read_csv_chunks, source_rows,
+                      RejectWriter, DEFAULT_REJECT_DIR, load_column_fallbacks, resolve_fallbacks)
 
 def get_csv_files(folder_path):
-    """Get all CSV files in the specified folder"""
-    csv_files = glob.glob(os.path.join(folder_path, "**", "*.csv"), recursive=True)
+    """Get all CSV files (plain, .gz, .bz2 or .zst) and Parquet files in the specified folder"""
+    csv_files = list_csv_files(folder_path)
     if not csv_files:
         print(f"No CSV files found in '{folder_path}' or its subdirectories")
         # Check if the folder exists
@@ -45,7 +49,7 @@ def get_csv_files(folder_path):
 
 def map_csv_to_table(filename):
     """Map CSV filename to database table name based on conventions"""
-    base_name = os.path.basename(filename).lower().replace('.csv', '')
+    base_name = csv_stem(filename).lower()
     
     # Mapping logic based on filename patterns
     mapping = {
@@ -81,14 +85,78 @@ def map_csv_to_table(filename):
     if base_name in mapping:
         return mapping[base_name]
     
-    # Try partial matching
-    for key in mapping:
+    # Try partial matching, longest key first so movie_casts isn't taken for movie
+    for key in sorted(mapping, key=len, reverse=True):
         if key in base_name:
             return mapping[key]
     
     # Default to filename with first letter capitalized
     return base_name.capitalize()
 
+def find_csv_files(data_folder):
+    """Search the usual dataset locations and return (folder, csv_files)"""
+    # List of potential data folder locations to try
+    potential_folders = [
+        data_folder,  # Original specified path
+        os.path.join(os.getcwd(), data_folder),  # Path relative to current dir
+        os.path.join(os.getcwd(), '..', data_folder),  # Parent directory
+        os.path.join(os.getcwd(), '..', 'V1', data_folder),  # V1 directory
+        os.path.join(os.getcwd(), '..', 'dataset'),  # Parent dir's dataset folder
+        '/home/understressengineer/programming/STEP_Program_SRM/dataset',  # Absolute path
+    ]
+    
+    for folder in potential_folders:
+        print(f"Looking for CSV files in: {folder}")
+        found_files = get_csv_files(folder)
+        if found_files:
+            print(f"✓ Found {len(found_files)} CSV files in {folder}")
+            return folder, found_files
+    return data_folder, []
+
+def group_csv_by_table(csv_files):
+    """Group CSV files by target table, sorted in dependency order"""
+    csv_by_table = {}
+    for csv_file in csv_files:
+        table_name = map_csv_to_table(csv_file)
+        if table_name not in csv_by_table:
+            csv_by_table[table_name] = []
+        csv_by_table[table_name].append(csv_file)
+    sorted_tables = sorted(csv_by_table.keys(), key=lambda t: TABLE_ORDER.get(t, 99))
+    return {table: csv_by_table[table] for table in sorted_tables}
+
+def load_import_stats():
+    """Load the per-table throughput recorded by previous imports"""
+    try:
+        with open(IMPORT_STATS_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_import_stats(table_timings, chunk_sizes=None):
+    """Record rows/s per table so the next --plan can predict load times
+    
+    chunk_sizes maps tables to ChunkSizeController.summary(); the chunk size
+    chosen by the last --chunk-size auto run is kept until a new one replaces it.
+    """
+    stats = load_import_stats()
+    chunk_sizes = chunk_sizes or {}
+    for table, (rows, seconds) in table_timings.items():
+        if rows > 0 and seconds > 0:
+            previous = stats.get(table, {})
+            stats[table] = {
+                'rows': rows,
+                'seconds': round(seconds, 3),
+                'rows_per_second': round(rows / seconds, 1),
+                'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S')
+            }
+            stats[table].update(chunk_sizes.get(table) or
+                                {key: value for key, value in previous.items() if key.startswith('chunk_')})
+    try:
+        with open(IMPORT_STATS_FILE, 'w') as f:
+            json.dump(stats, f, indent=2, sort_keys=True)
+    except OSError as e:
+        print(f"Could not save import statistics: {e}")
+
 def count_table_rows(connection, table_name):
     """Count rows in a table"""
     try:
@@ -101,136 +169,639 @@ def count_table_rows(connection, table_name):
         print(f"Error counting rows in {table_name}: {e}")
         return 0
 
-def import_data(connection, csv_file, table_name):
-    """Import data from CSV file to specified table"""
+# --commit policies other than every-N, as chunks per commit (0: once, when the table is done)
+COMMIT_POLICIES = {'per-chunk': 1, 'per-table': 0}
+
+def parse_commit_policy(value):
+    """Parse --commit per-chunk|every-N|per-table into the number of chunks per commit"""
+    if value in COMMIT_POLICIES:
+        return COMMIT_POLICIES[value]
+    match = re.fullmatch(r'every-(\d+)', value)
+    if not match or int(match.group(1)) < 1:
+        raise argparse.ArgumentTypeError(f"expected per-chunk, every-N or per-table, got '{value}'")
+    return int(match.group(1))
+
+# Rows per parsed chunk with --chunk-size auto; the controller cuts them into inserts of its own size
+AUTO_PARSE_CHUNK_SIZE = 10000
+
+# Starting rows per insert with --chunk-size auto for a table with no recorded choice
+AUTO_INITIAL_CHUNK_SIZE = 1000
+
+# Lock waits or packet errors in a row before a file gives up
+MAX_CHUNK_RETRIES = 5
+
+def parse_chunk_size(value):
+    """Parse --chunk-size: 'auto' or a positive number of rows"""
+    if value == 'auto':
+        return value
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError(f"expected auto or a positive number of rows, got '{value}'")
+    return int(value)
+
+# How ChunkInserter sends rows: packet-sized prepared INSERTs, or pandas' to_sql()
+INSERT_METHODS = ('batch', 'to_sql')
+
+class ChunkInserter:
+    """Inserts chunks over one connection, committing every `commit_every` chunks
+    
+    commit_every=0 never commits on its own: the caller commits once the
+    whole table is loaded, or rolls back so the table is left untouched.
+    Fewer commits also mean fewer redo log flushes. With insert_method
+    'batch', rows go out as prepared multi-row INSERTs filled up to the
+    server's max_allowed_packet, whatever the chunk size; on SQLite, as one
+    executemany() of a prepared single-row INSERT.
+    """
+    
+    def __init__(self, engine, commit_every=1, insert_method='batch'):
+        self.conn = engine.connect()
+        self.commit_every = commit_every
+        self.insert_method = insert_method
+        self.commits = 0
+        self.batchers = {}
+        self._pending = 0
+    
+    def insert(self, table_name, chunk):
+        """Insert a chunk inside the open transaction, committing if the policy says so"""
+        if not self.conn.in_transaction():
+            # Opened here, so to_sql() doesn't open (and commit) one of its own
+            self.conn.begin()
+        if self.insert_method == 'batch':
+            batcher = self.batchers.get(table_name)
+            if batcher is None:
+                # Same DBAPI connection, so the INSERTs share the transaction
+                driver_connection = self.conn.connection.driver_connection
+                if self.conn.dialect.name == 'sqlite':
+                    from sqlite_backend import SQLiteBatchInserter
+                    batcher = SQLiteBatchInserter(driver_connection, table_name, chunk.columns)
+                else:
+                    batcher = PacketBatchInserter(driver_connection, table_name, chunk.columns)
+                self.batchers[table_name] = batcher
+            batcher.insert(chunk)
+        else:
+            chunk.to_sql(name=table_name, con=self.conn, if_exists='append', index=False)
+        self._pending += 1
+        if self.commit_every and self._pending >= self.commit_every:
+            self.commit()
+    
+    def flush(self):
+        """Send rows still waiting for a full INSERT"""
+        for batcher in self.batchers.values():
+            batcher.flush()
+    
+    def count_rows(self, table_name):
+        """Count rows as this connection sees them, uncommitted inserts included"""
+        self.flush()
+        return self.conn.exec_driver_sql(f"SELECT COUNT(*) FROM `{table_name}`").scalar()
+    
+    def commit(self):
+        """Commit the chunks inserted since the last commit"""
+        self.flush()
+        self.conn.commit()
+        if self._pending:
+            self.commits += 1
+        self._pending = 0
+    
+    def rollback(self):
+        """Discard the chunks inserted since the last commit"""
+        for batcher in self.batchers.values():
+            batcher.close()
+        self.batchers.clear()
+        self.conn.rollback()
+        self._pending = 0
+    
+    def report(self):
+        """Print how many INSERT statements carried the rows"""
+        for table_name, batcher in self.batchers.items():
+            if not batcher.statements:
+                continue
+            if isinstance(batcher, PacketBatchInserter):
+                print(f"{table_name}: {batcher.rows} rows in {batcher.statements} INSERT statements of up to "
+                      f"{batcher.rows_per_statement} rows (widest row ~{batcher.max_row_bytes} bytes, "
+                      f"packet limit {batcher.packet_limit} bytes)")
+            else:
+                print(f"{table_name}: {batcher.rows} rows in {batcher.statements} executemany() calls")
+    
+    def close(self):
+        """Roll back anything uncommitted and return the connection to the pool"""
+        self.rollback()
+        self.conn.close()
+
+# Import order that respects foreign key constraints
+TABLE_ORDER = {
+    'Screen': 1,
+    'Movie': 2,
+    'User': 3,
+    'PaymentGateway': 4,
+    'FoodItem': 5,
+    'Seat': 6,
+    'MovieCast': 7,
+    'Review': 8,
+    'Membership': 9,
+    'Show': 10,
+    'ShowSeat': 11,
+    'FoodItemSize': 12,
+    'Booking': 13,
+    'Ticket': 14,
+    'Payment': 15,
+    'FoodOrder': 16,
+    'FoodOrderItem': 17,
+    'PointsTransaction': 18
+}
+
+# Per-table throughput of the last import, used by the --plan load time estimate
+IMPORT_STATS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_stats.json')
+
+# Encodings tried in order when sniffing a CSV file
+CSV_ENCODINGS = ['utf-8', 'latin1', 'cp1252']
+
+# Sentinel placed on the pipeline queue once the producer has emitted every chunk
+_END_OF_STREAM = object()
+
+def detect_csv_encoding(csv_file, sample_size=1024 * 1024):
+    """Pick the first encoding that can decode a sample from the start of the (decompressed) file"""
+    if is_parquet(csv_file):
+        return 'utf-8'  # Parquet strings are always UTF-8
+    sample = sample_csv_head(csv_file, sample_size)[0]
+    for encoding in CSV_ENCODINGS:
+        try:
+            # Incremental decoding tolerates a multibyte character cut off at the end of the sample
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            print(f"❌ Failed with {encoding} encoding, trying another...")
+    return CSV_ENCODINGS[-1]
+
+def read_chunks_with_fallback(csv_file, chunk_size, encoding, engine=DEFAULT_PARSER_ENGINE):
+    """read_csv_chunks(), moving on to the next of CSV_ENCODINGS when the file stops decoding part way
+
+    detect_csv_encoding() only samples the head of the file, so a later
+    chunk can still fail to decode. The file is then read again in the next
+    encoding from the start, skipping the lines already yielded: they
+    decoded cleanly, so nothing that was inserted has to be rolled back.
+    """
+    done = 1  # Last line yielded; line 1 is the header
+    while True:
+        try:
+            for raw, lines, bad_lines in read_csv_chunks(csv_file, chunk_size, engine=engine, encoding=encoding):
+                if done > 1:
+                    keep = lines > done
+                    raw, lines = raw[keep], lines[keep]
+                    bad_lines = bad_lines[bad_lines['line'] > done]
+                    if raw.empty and bad_lines.empty:
+                        continue
+                done = max([done, int(lines.max(initial=done))] + [int(line) for line in bad_lines['line']])
+                yield raw, lines, bad_lines
+            return
+        except UnicodeDecodeError as e:
+            position = CSV_ENCODINGS.index(encoding) if encoding in CSV_ENCODINGS else len(CSV_ENCODINGS)
+            if position + 1 >= len(CSV_ENCODINGS):
+                raise
+            encoding = CSV_ENCODINGS[position + 1]
+            print(f"⚠️  Not {CSV_ENCODINGS[position]} after line {done} ({e.reason}); reading the rest as {encoding}")
+
+def clean_chunk(df, db_columns, verbose=False):
+    """Clean a parsed chunk and reshape it to match the table columns"""
+    # Handle infinities
+    float_cols = df.select_dtypes(include=['float', 'float64']).columns
+    for col in float_cols:
+        df[col] = df[col].replace([np.inf, -np.inf], np.nan)
+    
+    # This maps DataFrame columns to table columns based on case insensitive matching
+    db_columns_by_lower = {db_col.lower(): db_col for db_col in db_columns}
+    column_mapping = {}
+    for df_col in df.columns:
+        db_col = db_columns_by_lower.get(str(df_col).lower())
+        if db_col is not None and db_col != df_col:
+            column_mapping[df_col] = db_col
+    
+    if column_mapping:
+        if verbose:
+            print(f"Mapping columns: {column_mapping}")
+        df = df.rename(columns=column_mapping)
+    
+    # Drop columns that don't exist in the table
+    df_columns = set(df.columns)
+    db_columns_set = set(db_columns)
+    columns_to_drop = df_columns - db_columns_set
+    
+    if columns_to_drop:
+        if verbose:
+            print(f"Dropping columns not in table schema: {columns_to_drop}")
+        df = df.drop(columns=columns_to_drop)
+    
+    # Add missing columns with NULL values
+    missing_columns = db_columns_set - df_columns
+    if missing_columns:
+        if verbose:
+            print(f"Adding missing columns: {missing_columns}")
+        for col in missing_columns:
+            df[col] = None
+    
+    # Ensure proper column order to match table schema
+    return df[db_columns]
+
+def _put_or_cancel(chunk_queue, item, cancel_event):
+    """Put an item on the queue, giving up if the pipeline was cancelled"""
+    while not cancel_event.is_set():
+        try:
+            chunk_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def prepare_chunk(raw, lines, bad_lines, column_specs, rejects, verbose=False, row_filter=None, fallbacks=None):
+    """Clean and type-coerce a parsed chunk, sending unconvertible and malformed rows to the reject file
+    
+    `fallbacks` (from resolve_fallbacks()) keep values the column type can't
+    take instead of rejecting their rows. `row_filter`, if given, is called with the coerced chunk and returns a
+    reject reason per row (None keeps the row), e.g. the schedule check.
+    """
+    db_columns = [spec[0] for spec in column_specs]
+    rejects.write(bad_lines)
+    if raw.empty:
+        return raw.reindex(columns=db_columns)
+    if verbose:
+        db_columns_lower = {col.lower() for col in db_columns}
+        rejects.dropped_columns = [col for col in raw.columns if str(col).lower() not in db_columns_lower]
+    chunk, rejected = coerce_chunk(clean_chunk(raw, db_columns, verbose=verbose), column_specs,
+                                   fallbacks, rejects.fallbacks)
+    if not rejected.empty:
+        rejects.write(source_rows(raw, lines, rejected['reason']))
+    if row_filter is not None and not chunk.empty:
+        reasons = row_filter(chunk)
+        refused = reasons.notna()
+        if refused.any():
+            rejects.write(source_rows(raw, lines, reasons[refused]))
+            chunk = chunk[~refused]
+    return chunk
+
+def produce_chunks(csv_file, encoding, column_specs, rejects, chunk_queue, cancel_event, chunk_size,
+                   row_filter=None, engine=DEFAULT_PARSER_ENGINE, fallbacks=None):
+    """Parse, clean and coerce a CSV file chunk by chunk, feeding the pipeline queue"""
+    try:
+        for i, (raw, lines, bad_lines) in enumerate(read_chunks_with_fallback(csv_file, chunk_size, encoding,
+                                                                              engine)):
+            if cancel_event.is_set():
+                return
+            if i == 0:
+                # Show first few rows to debug
+                print("First 3 rows of CSV data:")
+                print(raw.head(3))
+                print(f"CSV columns: {list(raw.columns)}")
+            chunk = prepare_chunk(raw, lines, bad_lines, column_specs, rejects, verbose=(i == 0),
+                                  row_filter=row_filter, fallbacks=fallbacks)
+            if chunk.empty:
+                continue
+            if not _put_or_cancel(chunk_queue, chunk, cancel_event):
+                return
+        _put_or_cancel(chunk_queue, _END_OF_STREAM, cancel_event)
+    except BaseException as e:
+        # Hand the failure over to the consumer so it is raised in the caller's thread
+        _put_or_cancel(chunk_queue, e, cancel_event)
+
+def queued_chunks(chunk_queue):
+    """Yield chunks from the pipeline queue until the producer is done, raising its errors here"""
+    while True:
+        item = chunk_queue.get()
+        if item is _END_OF_STREAM:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+def import_data(connection, csv_file, table_name, chunk_size=1000, pipeline_depth=4,
+                reject_dir=DEFAULT_REJECT_DIR, row_filter=None, engine=DEFAULT_PARSER_ENGINE,
+                commit_every=1, inserter=None, insert_method='batch', controller=None, column_fallbacks=None):
+    """Import data from CSV file to specified table
+    
+    Parsing, cleaning and type coercion run on a producer thread while the
+    calling thread inserts, joined by a queue of at most `pipeline_depth`
+    chunks. Rows that can't be converted to the column types are written to
+    a reject file in `reject_dir` instead of failing the file.
+    engine='pyarrow' parses with Arrow's multithreaded reader (memory-mapped
+    when the file is not compressed) instead of pandas' C parser.
+    Chunks are committed every `commit_every` chunks, and at the end. Pass an
+    `inserter` to load inside the caller's transaction instead; nothing is
+    committed then, and on failure the caller rolls back.
+    With a ChunkSizeController, the parsed chunks are cut into inserts of the
+    size it picks from each insert's latency, and every insert is sent to
+    the database before it is timed, whatever the commit policy. When a chunk is committed on
+    its own, a lock wait, deadlock or packet error rolls back just that
+    chunk and it is retried at a smaller size. `column_fallbacks` defaults
+    to coercion.COLUMN_FALLBACKS.
+    Returns the number of rows added (0 when every row was rejected or
+    filtered out), or False on failure.
+    """
+    own_inserter = inserter is None
     try:
         print(f"\nProcessing {os.path.basename(csv_file)} -> {table_name}")
         
+        if own_inserter:
+            # Shared SQLAlchemy engine for efficient import
+            inserter = ChunkInserter(get_engine(bulk_load=True), commit_every, insert_method)
+        
         # Get initial row count
-        initial_row_count = count_table_rows(connection, table_name)
+        initial_row_count = inserter.count_rows(table_name)
         print(f"Current row count in {table_name}: {initial_row_count}")
         
-        # Create SQLAlchemy engine for efficient import
-        user = connection.user
-        password = connection._password
-        host = connection._host
-        database = connection._database
+        encoding = detect_csv_encoding(csv_file)
+        print(f"✅ Using {encoding} encoding")
         
-        engine_url = f"mysql+mysqlconnector://{user}:{password}@{host}/{database}"
-        engine = create_engine(engine_url)
+        column_specs = get_column_specs(connection, table_name)
+        fallbacks = resolve_fallbacks(connection, table_name, column_fallbacks)
+        print(f"Database columns: {[spec[0] for spec in column_specs]}")
+        rejects = RejectWriter(csv_file, reject_dir)
         
-        # Try multiple encodings with progress bar
-        encodings = ['utf-8', 'latin1', 'cp1252']
-        df = None
-        
-        with tqdm(total=len(encodings), desc="Trying encodings") as pbar:
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(csv_file, encoding=encoding, on_bad_lines='skip', low_memory=False)
-                    print(f"✅ Successfully loaded with {encoding} encoding")
-                    pbar.update(1)
-                    break
-                except UnicodeDecodeError:
-                    print(f"❌ Failed with {encoding} encoding, trying another...")
-                    pbar.update(1)
-                except Exception as e:
-                    print(f"❌ Error: {e}")
-                    pbar.update(1)
-                    continue
-        
-        if df is None:
-            print(f"Could not load {csv_file} with any encoding")
-            return False
-            
-        print(f"CSV file contains {len(df)} rows")
-        
-        # Show first few rows to debug
-        print("First 3 rows of CSV data:")
-        print(df.head(3))
-        
-        # Clean data before importing
-        print("Cleaning data...")
-        
-        # Handle infinities
-        float_cols = df.select_dtypes(include=['float', 'float64']).columns
-        if not float_cols.empty:
-            with tqdm(total=len(float_cols), desc="Processing float columns") as pbar:
-                for col in float_cols:
-                    df[col] = df[col].replace([np.inf, -np.inf], np.nan)
-                    pbar.update(1)
+        chunk_queue = queue.Queue(maxsize=pipeline_depth)
+        cancel_event = threading.Event()
+        producer = threading.Thread(
+            target=produce_chunks,
+            args=(csv_file, encoding, column_specs, rejects, chunk_queue, cancel_event, chunk_size, row_filter,
+                  engine, fallbacks),
+            name=f"parse-{table_name}",
+            daemon=True
+        )
         
-        # Convert column names if needed
-        # This maps DataFrame columns to table columns based on case insensitive matching
-        cursor = connection.cursor()
-        cursor.execute(f"DESCRIBE `{table_name}`")
-        db_columns = [column[0] for column in cursor.fetchall()]
-        cursor.close()
+        if controller is None:
+            print(f"Importing records to {table_name} in chunks of {chunk_size}...")
+            batches = queued_chunks(chunk_queue)
+        else:
+            print(f"Importing records to {table_name} in adaptive chunks, starting at {controller.size}...")
+            batches = Rechunker(queued_chunks(chunk_queue), controller)
+        # Only a chunk committed on its own can be rolled back and retried by itself
+        can_retry = controller is not None and own_inserter and commit_every == 1
+        rows_sent = 0
+        retries = 0
+        producer.start()
+        try:
+            with tqdm(desc=f"Uploading rows", unit="rows") as pbar:
+                for batch in batches:
+                    started = time.perf_counter()
+                    try:
+                        inserter.insert(table_name, batch)
+                        if controller is not None:
+                            # Send what the batcher held back, or the latency would only time buffering
+                            inserter.flush()
+                    except (DBAPIError, Error) as e:
+                        kind = error_kind(e)
+                        if not can_retry or kind is None or retries == MAX_CHUNK_RETRIES:
+                            raise
+                        retries += 1
+                        inserter.rollback()
+                        controller.record_error(kind)
+                        print(f"⚠️  {kind} error inserting {len(batch)} rows, retrying at {controller.size}: {e}")
+                        batches.push_back(batch)
+                        continue
+                    retries = 0
+                    if controller is not None:
+                        controller.record(len(batch), time.perf_counter() - started)
+                    rows_sent += len(batch)
+                    pbar.update(len(batch))
+        finally:
+            # Stops the producer on insert errors and Ctrl+C alike
+            cancel_event.set()
+            producer.join()
+            rejects.close()
         
-        print(f"Database columns: {db_columns}")
-        print(f"CSV columns: {list(df.columns)}")
+        print(f"CSV file contained {rows_sent} importable rows")
+        if controller is not None:
+            print(controller.describe())
+        if own_inserter:
+            inserter.commit()
+            print(f"Committed {inserter.commits} transactions")
+            inserter.report()
         
-        column_mapping = {}
-        for df_col in df.columns:
-            for db_col in db_columns:
-                if df_col.lower() == db_col.lower():
-                    column_mapping[df_col] = db_col
-                    break
+        # Verify data was actually imported
+        final_row_count = inserter.count_rows(table_name)
+        rows_added = final_row_count - initial_row_count
         
-        if column_mapping:
-            print(f"Mapping columns: {column_mapping}")
-            df = df.rename(columns=column_mapping)
+        if rows_added > 0:
+            print(f"✅ Successfully imported {rows_added} rows to {table_name}")
+            return rows_added
+        elif rows_sent == 0:
+            print(f"⚠️  {os.path.basename(csv_file)} had no importable rows for {table_name}")
+            return 0
+        else:
+            print(f"❌ WARNING: No rows were added to {table_name}! Initial: {initial_row_count}, Final: {final_row_count}")
+            return False
         
-        # Drop columns that don't exist in the table
-        df_columns = set(df.columns)
-        db_columns_set = set(db_columns)
-        columns_to_drop = df_columns - db_columns_set
+    except Exception as e:
+        print(f"❌ Error importing data to {table_name}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if own_inserter and inserter is not None:
+            inserter.close()
+
+# MySQL error codes that are safe to retry as a whole partition transaction
+RETRYABLE_ERRNOS = {1205, 1213}  # lock wait timeout, deadlock
+
+def get_primary_key_column(connection, table_name):
+    """Get the single-column primary key of a table, or None"""
+    cursor = connection.cursor()
+    cursor.execute(f"DESCRIBE `{table_name}`")
+    pk_columns = [column[0] for column in cursor.fetchall() if column[3] == 'PRI']
+    cursor.close()
+    return pk_columns[0] if len(pk_columns) == 1 else None
+
+def spill_frame(path, df):
+    """Append a DataFrame to a spill file, keeping its coerced dtypes"""
+    with open(path, 'ab') as f:
+        pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def read_spill(path):
+    """Yield the DataFrames appended to a spill file, in order"""
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+def pk_range_bounds(keys, partitions):
+    """Split sorted primary-key values into contiguous [low, high] ranges of roughly equal size"""
+    bounds = np.linspace(0, len(keys), partitions + 1).astype(int)
+    return [(keys[start], keys[end - 1]) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+def route_to_partitions(spill_path, partition_dir, pk_column, keys, total_rows, partitions):
+    """Stream the staged chunks into one spill file per partition
+
+    With primary-key values every partition holds one contiguous key range;
+    without them the rows are split by position. Returns a list of
+    (low, high, path, rows), with low/high None for positional partitions.
+    """
+    if keys is not None:
+        bounds = pk_range_bounds(keys, partitions)
+        highs = np.array([high for _, high in bounds])
+    else:
+        edges = np.linspace(0, total_rows, partitions + 1).astype(int)
+        ends = [end for start, end in zip(edges[:-1], edges[1:]) if end > start]
+        bounds = [(None, None)] * len(ends)
+        highs = np.array(ends)
+    paths = [os.path.join(partition_dir, f"partition_{i:04d}.pkl") for i in range(len(bounds))]
+    rows = [0] * len(bounds)
+
+    offset = 0
+    for chunk in read_spill(spill_path):
+        if keys is not None:
+            targets = np.searchsorted(highs, chunk[pk_column].to_numpy(), side='left')
+        else:
+            targets = np.searchsorted(highs, np.arange(offset, offset + len(chunk)), side='right')
+        offset += len(chunk)
+        for target, part in chunk.groupby(targets, sort=False):
+            if keys is not None:
+                part = part.sort_values(pk_column, kind='stable')
+            spill_frame(paths[int(target)], part)
+            rows[int(target)] += len(part)
+    return [(low, high, path, count) for (low, high), path, count in zip(bounds, paths, rows) if count]
+
+def insert_partition(engine, table_name, spill_path, chunk_size, max_retries=5, insert_method='batch'):
+    """Insert one partition's spill file in its own transaction, retrying on deadlocks and lock waits"""
+    for attempt in range(max_retries + 1):
+        try:
+            with engine.begin() as conn:
+                batcher = None
+                try:
+                    for part in read_spill(spill_path):
+                        if insert_method == 'batch':
+                            if batcher is None:
+                                batcher = PacketBatchInserter(conn.connection.driver_connection, table_name,
+                                                              part.columns)
+                            batcher.insert(part)
+                        else:
+                            part.to_sql(name=table_name, con=conn, if_exists='append',
+                                        index=False, chunksize=chunk_size)
+                    if batcher is not None:
+                        batcher.flush()
+                finally:
+                    if batcher is not None:
+                        batcher.close()
+            return attempt
+        except DBAPIError as e:
+            errno = getattr(e.orig, 'errno', None)
+            if errno not in RETRYABLE_ERRNOS or attempt == max_retries:
+                raise
+            # Back off with jitter so the retried partitions don't collide again
+            time.sleep(min(0.05 * 2 ** attempt, 2.0) * (1 + random.random()))
+
+def count_rows_in_range(connection, table_name, pk_column, low, high):
+    """Count rows whose primary key falls in [low, high]"""
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM `{table_name}` WHERE `{pk_column}` BETWEEN %s AND %s",
+                   (int(low), int(high)))
+    count = cursor.fetchone()[0]
+    cursor.close()
+    return count
+
+def import_data_partitioned(connection, csv_file, table_name, partitions=4, chunk_size=1000,
+                            reject_dir=DEFAULT_REJECT_DIR, row_filter=None, engine=DEFAULT_PARSER_ENGINE,
+                            insert_method='batch', column_fallbacks=None):
+    """Import a CSV file by inserting primary-key range partitions concurrently
+    
+    Each partition is loaded over its own pooled connection in a single
+    transaction, so one InnoDB insert thread is no longer the ceiling.
+    Parsed chunks are staged on disk and routed into one spill file per
+    partition, so only the primary-key column is held in memory.
+    Returns the number of rows added (0 when the file has no importable
+    rows), or False on failure.
+    """
+    partition_dir = None
+    try:
+        print(f"\nProcessing {os.path.basename(csv_file)} -> {table_name} ({partitions} partitions)")
         
-        if columns_to_drop:
-            print(f"Dropping columns not in table schema: {columns_to_drop}")
-            df = df.drop(columns=columns_to_drop)
+        initial_row_count = count_table_rows(connection, table_name)
+        print(f"Current row count in {table_name}: {initial_row_count}")
         
-        # Add missing columns with NULL values
-        missing_columns = db_columns_set - df_columns
-        if missing_columns:
-            print(f"Adding missing columns: {missing_columns}")
-            for col in missing_columns:
-                df[col] = None
+        column_specs = get_column_specs(connection, table_name)
+        fallbacks = resolve_fallbacks(connection, table_name, column_fallbacks)
+        pk_column = get_primary_key_column(connection, table_name)
+        encoding = detect_csv_encoding(csv_file)
+        print(f"✅ Using {encoding} encoding")
         
-        # Ensure proper column order to match table schema
-        df = df[db_columns]
+        partition_dir = tempfile.mkdtemp(prefix='srm_partitions_')
+        staged_path = os.path.join(partition_dir, 'staged.pkl')
+        keys = []
+        total_rows = 0
+        rejects = RejectWriter(csv_file, reject_dir)
+        try:
+            for i, (raw, lines, bad_lines) in enumerate(read_chunks_with_fallback(csv_file, max(chunk_size, 10000),
+                                                                                  encoding, engine)):
+                chunk = prepare_chunk(raw, lines, bad_lines, column_specs, rejects, verbose=(i == 0),
+                                      row_filter=row_filter, fallbacks=fallbacks)
+                if chunk.empty:
+                    continue
+                spill_frame(staged_path, chunk)
+                total_rows += len(chunk)
+                if keys is not None:
+                    # Without explicit keys the rows can only be split by position
+                    if pk_column is None or chunk[pk_column].isna().any():
+                        keys = None
+                    else:
+                        keys.append(chunk[pk_column].to_numpy())
+        finally:
+            rejects.close()
+        if not total_rows:
+            print(f"⚠️  {csv_file} has no importable rows")
+            return 0
+        if keys is not None:
+            keys = np.sort(np.concatenate(keys), kind='stable')
         
-        # Import data to table with progress bar
-        print(f"Importing {len(df)} records to {table_name}...")
+        ranges = route_to_partitions(staged_path, partition_dir, pk_column, keys, total_rows, partitions)
+        del keys
+        os.remove(staged_path)
         
-        # Use tqdm to track SQLAlchemy's chunksize-based imports
-        chunk_size = 1000
-        total_chunks = (len(df) // chunk_size) + (1 if len(df) % chunk_size > 0 else 0)
+        # Rows already present in a range would skew the per-partition check
+        if pk_column is not None and ranges[0][0] is not None:
+            existing = [count_rows_in_range(connection, table_name, pk_column, low, high)
+                        for low, high, _ in ranges]
+        else:
+            existing = None
+        # End the read snapshot the counts above opened, or the checks below wouldn't see the partitions' commits
+        connection.commit()
+
+        # Partitions beyond pool_size + max_overflow wait for a free pooled connection
+        db_engine = get_engine(bulk_load=True)
+        results = {}
+        with tqdm(total=len(ranges), desc="Inserting partitions") as pbar:
+            with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix=f"insert-{table_name}") as executor:
+                futures = {executor.submit(insert_partition, db_engine, table_name, path, chunk_size,
+                                           insert_method=insert_method): i
+                           for i, (_, _, path, _) in enumerate(ranges)}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        retries = future.result()
+                        results[index] = None
+                        if retries:
+                            print(f"Partition {index + 1} committed after {retries} retries")
+                    except Exception as e:
+                        results[index] = e
+                    pbar.update(1)
         
-        with tqdm(total=total_chunks, desc=f"Uploading chunks") as pbar:
-            # Define a callback for SQLAlchemy to execute after each chunk
-            def track_progress(batch):
-                pbar.update(1)
-                return batch
-                
-            # Import data
-            df.to_sql(
-                name=table_name, 
-                con=engine, 
-                if_exists='append', 
-                index=False, 
-                chunksize=chunk_size,
-                method=track_progress if total_chunks > 1 else None
-            )
+        # Verify that every partition committed
+        all_committed = True
+        for i, (low, high, _, rows) in enumerate(ranges):
+            label = f"Partition {i + 1}" + (f" [{low}..{high}]" if low is not None else "")
+            if results[i] is not None:
+                print(f"❌ {label} failed: {results[i]}")
+                all_committed = False
+            elif existing is not None:
+                committed = count_rows_in_range(connection, table_name, pk_column, low, high) - existing[i]
+                if committed != rows:
+                    print(f"❌ {label}: expected {rows} rows, found {committed}")
+                    all_committed = False
         
-        # Verify data was actually imported
         final_row_count = count_table_rows(connection, table_name)
         rows_added = final_row_count - initial_row_count
+        expected_rows = sum(rows for _, _, _, rows in ranges)
         
-        if rows_added > 0:
-            print(f"✅ Successfully imported {rows_added} rows to {table_name}")
-            return True
+        if all_committed and rows_added == expected_rows:
+            print(f"✅ Successfully imported {rows_added} rows to {table_name} in {len(ranges)} partitions")
+            return rows_added
         else:
-            print(f"❌ WARNING: No rows were added to {table_name}! Initial: {initial_row_count}, Final: {final_row_count}")
+            print(f"❌ WARNING: {rows_added} of {expected_rows} rows were added to {table_name}")
             return False
         
     except Exception as e:
@@ -238,48 +809,83 @@ def import_data(connection, csv_file, table_name):
         import traceback
         traceback.print_exc()
         return False
+    finally:
+        if partition_dir is not None:
+            shutil.rmtree(partition_dir, ignore_errors=True)
 
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Import CSV data into SRM_STEP database')
     parser.add_argument('--dataset', '-d', help='Path to dataset folder', default='dataset')
+    parser.add_argument('--chunk-size', type=parse_chunk_size, default='auto',
+                        help='Rows parsed and inserted per chunk, or auto to tune the rows per insert for each '
+                             'table from measured latency (the choice is saved in import_stats.json)')
+    parser.add_argument('--max-insert-latency', type=float, default=2.0, metavar='SECONDS',
+                        help='With --chunk-size auto, keep every insert under this many seconds '
+                             '(each insert is sent on its own, so only the commits are batched)')
+    parser.add_argument('--pipeline-depth', type=int, default=4,
+                        help='Maximum number of parsed chunks waiting to be inserted')
+    parser.add_argument('--commit', type=parse_commit_policy, metavar='POLICY',
+                        help='per-chunk, every-N (chunks) or per-table: load each table in one transaction '
+                             'that is rolled back if any of its files fails (default: per-chunk on MySQL, '
+                             'per-table on SQLite)')
+    parser.add_argument('--insert-method', choices=INSERT_METHODS, default='batch',
+                        help="batch: prepared multi-row INSERTs sized to max_allowed_packet; to_sql: pandas' inserts")
+    parser.add_argument('--parallel-tables', default='',
+                        help='Comma-separated tables to insert as concurrent primary-key range partitions')
+    parser.add_argument('--partitions', type=int, default=4,
+                        help='Number of partitions (and pooled connections) for --parallel-tables')
+    parser.add_argument('--engine', choices=PARSER_ENGINES, default=DEFAULT_PARSER_ENGINE,
+                        help="CSV parser: pandas' C parser, or pyarrow's multithreaded reader")
+    parser.add_argument('--reject-dir', default=DEFAULT_REJECT_DIR,
+                        help='Folder for <file>.rejects.csv files listing rows that could not be converted')
+    parser.add_argument('--schedule-check', choices=['reject', 'warn', 'off'], default='warn',
+                        help='Check shows for overlaps on the same screen before import; reject drops the later show')
+    parser.add_argument('--show-runtime', type=int, default=DEFAULT_RUNTIME_MINUTES,
+                        help='Minutes a show occupies its screen for --schedule-check')
+    parser.add_argument('--fallbacks', metavar='FILE',
+                        help='JSON file of {"Table.column": policy} overriding the column fallbacks in coercion.py '
+                             '(map, from + query, default, null) used instead of rejecting unconvertible values')
+    parser.add_argument('--dedup-users', choices=['report', 'merge', 'off'], default='report',
+                        help='Find users sharing a normalized email (or phone); merge repoints their '
+                             'memberships, bookings and points to one user before load')
+    parser.add_argument('--skip-analyze', action='store_true',
+                        help="Don't run ANALYZE TABLE on the loaded tables after the import")
+    parser.add_argument('--plan', action='store_true',
+                        help='Print the import plan with row, size and time estimates without touching the database')
     args = parser.parse_args()
     
-    # Database connection parameters
-    host = "localhost"
-    user = "ali"
-    password = "admin"
-    db_name = "SRM_STEP"
+    if args.plan:
+        from import_plan import print_import_plan
+        print_import_plan(args.dataset, load_column_fallbacks(args.fallbacks))
+        return
+    
+    # Database connection parameters come from db_config.ini / SRM_DB_* variables
+    db_name = load_db_config()['database']
     data_folder = args.dataset  # Use the folder specified via command line
+    parallel_tables = {t.strip() for t in args.parallel_tables.split(',') if t.strip()}
+    sqlite = is_sqlite()
+    if args.commit is None:
+        # Each SQLite transaction takes and releases the file's write lock; one per table is the fast load
+        args.commit = COMMIT_POLICIES['per-table' if sqlite else 'per-chunk']
+    if sqlite and parallel_tables:
+        print("⚠️  SQLite takes one writer at a time; --parallel-tables is ignored")
+        parallel_tables = set()
+    auto_chunks = args.chunk_size == 'auto'
+    column_fallbacks = load_column_fallbacks(args.fallbacks)
+    read_chunk_size = AUTO_PARSE_CHUNK_SIZE if auto_chunks else args.chunk_size
     
     print(f"Starting import process from '{data_folder}' to database '{db_name}'")
     print(f"Current working directory: {os.getcwd()}")
     
     # Create connection
-    connection = create_connection(host, user, password, db_name)
+    connection = create_connection(db_name)
     if connection is None:
         return
+    dedup_dir = None
     
     try:
-        # List of potential data folder locations to try
-        potential_folders = [
-            data_folder,  # Original specified path
-            os.path.join(os.getcwd(), data_folder),  # Path relative to current dir
-            os.path.join(os.getcwd(), '..', data_folder),  # Parent directory
-            os.path.join(os.getcwd(), '..', 'V1', data_folder),  # V1 directory
-            os.path.join(os.getcwd(), '..', 'dataset'),  # Parent dir's dataset folder
-            '/home/understressengineer/programming/STEP_Program_SRM/dataset',  # Absolute path
-        ]
-        
-        csv_files = []
-        for folder in potential_folders:
-            print(f"Looking for CSV files in: {folder}")
-            found_files = get_csv_files(folder)
-            if found_files:
-                csv_files = found_files
-                data_folder = folder
-                print(f"✓ Found {len(csv_files)} CSV files in {folder}")
-                break
+        data_folder, csv_files = find_csv_files(data_folder)
         
         if not csv_files:
             print("❌ Could not find any CSV files in any of the potential locations.")
@@ -296,45 +902,21 @@ def main():
         for i, file in enumerate(csv_files):
             print(f"  {i+1}. {os.path.basename(file)}")
         
-        # Define import order to respect foreign key constraints
-        table_order = {
-            'Screen': 1,
-            'Movie': 2,
-            'User': 3,
-            'PaymentGateway': 4,
-            'FoodItem': 5,
-            'Seat': 6,
-            'MovieCast': 7,
-            'Review': 8,
-            'Membership': 9,
-            'Show': 10,
-            'ShowSeat': 11,
-            'FoodItemSize': 12,
-            'Booking': 13,
-            'Ticket': 14,
-            'Payment': 15,
-            'FoodOrder': 16,
-            'FoodOrderItem': 17,
-            'PointsTransaction': 18
-        }
-        
-        # Group CSV files by target table
-        csv_by_table = {}
-        with tqdm(total=len(csv_files), desc="Mapping CSV files to tables") as pbar:
-            for csv_file in csv_files:
-                table_name = map_csv_to_table(csv_file)
-                if table_name not in csv_by_table:
-                    csv_by_table[table_name] = []
-                csv_by_table[table_name].append(csv_file)
-                pbar.update(1)
-        
-        # Sort tables by dependency order
-        sorted_tables = sorted(csv_by_table.keys(), key=lambda t: table_order.get(t, 99))
+        # Group CSV files by target table and sort by dependency order
+        csv_by_table = group_csv_by_table(csv_files)
+        if args.dedup_users != 'off':
+            # Merged copies of the user-related files are imported instead of the originals
+            dedup_dir = tempfile.mkdtemp(prefix='srm_dedup_') if args.dedup_users == 'merge' else None
+            csv_by_table = deduplicate_users(csv_by_table, args.dedup_users, args.reject_dir, dedup_dir)
+        sorted_tables = list(csv_by_table)
         print("\nPlanned import order:")
         for i, table in enumerate(sorted_tables):
             print(f"  {i+1}. {table} - {len(csv_by_table[table])} files")
         
         # Process each table in dependency order
+        table_timings = {}
+        chunk_sizes = {}
+        import_stats = load_import_stats()
         with tqdm(total=len(sorted_tables), desc="Processing tables", position=0) as table_pbar:
             for table in sorted_tables:
                 print(f"\n{'='*50}")
@@ -342,31 +924,109 @@ def main():
                 print(f"{'='*50}")
                 
                 success_count = 0
+                table_rows = 0
+                table_start = time.perf_counter()
+                # per-table: every file of the table goes through one transaction
+                table_inserter = None
+                if args.commit == 0:
+                    if table in parallel_tables:
+                        print(f"⚠️  {table} loads in concurrent partitions, each committed on its own; "
+                              f"--commit per-table can't make it atomic")
+                    else:
+                        table_inserter = ChunkInserter(get_engine(bulk_load=True), commit_every=0,
+                                                       insert_method=args.insert_method)
+                controller = None
+                if auto_chunks and table not in parallel_tables:
+                    # Start from the size the last run settled on; every-N measures across whole commits
+                    controller = ChunkSizeController(
+                        table, initial=import_stats.get(table, {}).get('chunk_size', AUTO_INITIAL_CHUNK_SIZE),
+                        latency_ceiling=args.max_insert_latency, samples=max(2, args.commit))
                 with tqdm(total=len(csv_by_table[table]), desc=f"Files for {table}", position=1) as file_pbar:
                     for csv_file in csv_by_table[table]:
                         print(f"\nImporting {os.path.basename(csv_file)}")
-                        if import_data(connection, csv_file, table):
+                        row_filter = None
+                        if table == 'Show' and args.schedule_check != 'off':
+                            row_filter = schedule_filter(connection, csv_file, args.show_runtime,
+                                                         reject=(args.schedule_check == 'reject'))
+                        if table in parallel_tables:
+                            imported = import_data_partitioned(connection, csv_file, table,
+                                                               partitions=args.partitions,
+                                                               chunk_size=read_chunk_size,
+                                                               reject_dir=args.reject_dir,
+                                                               row_filter=row_filter, engine=args.engine,
+                                                               insert_method=args.insert_method,
+                                                               column_fallbacks=column_fallbacks)
+                        else:
+                            imported = import_data(connection, csv_file, table, chunk_size=read_chunk_size,
+                                                   pipeline_depth=args.pipeline_depth,
+                                                   reject_dir=args.reject_dir,
+                                                   row_filter=row_filter, engine=args.engine,
+                                                   commit_every=args.commit, inserter=table_inserter,
+                                                   insert_method=args.insert_method, controller=controller,
+                                                   column_fallbacks=column_fallbacks)
+                        # 0 rows (everything rejected or filtered out) is not a failure
+                        if imported is not False:
                             success_count += 1
+                            table_rows += imported
                         file_pbar.update(1)
+                        if table_inserter is not None and imported is False:
+                            break
+                if table_inserter is not None:
+                    try:
+                        if success_count == len(csv_by_table[table]):
+                            table_inserter.commit()
+                            print(f"✅ Committed {table_rows} rows to {table} in one transaction")
+                            table_inserter.report()
+                        else:
+                            table_inserter.rollback()
+                            print(f"❌ Rolled back {table}: the table is left as it was before the import")
+                            success_count = 0
+                            table_rows = 0
+                    except Exception as e:
+                        print(f"❌ Could not commit {table}: {e}")
+                        success_count = 0
+                        table_rows = 0
+                    finally:
+                        table_inserter.close()
+                table_timings[table] = (table_rows, time.perf_counter() - table_start)
+                if controller is not None and controller.best_rate:
+                    chunk_sizes[table] = controller.summary()
+                # A failed file may still have committed chunks unless the whole table was one transaction
+                changed = table_rows > 0 or (table_inserter is None and success_count < len(csv_by_table[table]))
+                if changed:
+                    if not sqlite:
+                        # Tell catalog caches in other processes that this table changed
+                        bump_catalog_generation(connection, table)
+                    if table in SEARCH_TABLES:
+                        # Index the newly loaded movies and cast members
+                        update_search_index(connection)
                 
                 print(f"\n{table}: {success_count}/{len(csv_by_table[table])} files imported successfully")
                 table_pbar.update(1)
             
         print("\n✅ Data import completed")
+        save_import_stats(table_timings, chunk_sizes)
+        if chunk_sizes:
+            print("\nChosen rows per insert (saved to import_stats.json, the next auto run starts from them):")
+            for table, summary in chunk_sizes.items():
+                print(f"  {table}: {summary['chunk_size']} (~{summary['chunk_rows_per_second']:,.0f} rows/s, "
+                      f"slowest insert {summary['chunk_max_latency']:.2f}s)")
         
-        # Final validation
-        print("\nFinal table row counts:")
-        cursor = connection.cursor()
-        cursor.execute("SHOW TABLES")
-        tables = [table[0] for table in cursor.fetchall()]
-        
-        total_rows = 0
-        for table in tables:
-            count = count_table_rows(connection, table)
-            total_rows += count
-            print(f"  {table}: {count} rows")
+        # Fresh optimizer statistics for the loaded tables, which also feed the summary
+        loaded_tables = [table for table, (rows, _) in table_timings.items() if rows > 0]
+        analyze_timings = {}
+        if loaded_tables and not args.skip_analyze:
+            print(f"\nAnalyzing {len(loaded_tables)} loaded tables...")
+            analyze_timings = analyze_tables(db_name, loaded_tables)
         
-        print(f"\nTotal rows in database: {total_rows}")
+        # Final validation from the importer's counters and information_schema, without counting rows
+        total_rows = print_load_summary(connection, table_timings, analyze_timings)
+        print(f"\nRows imported this run: {total_rows}")
+        if sqlite:
+            # Loaded with foreign key checks off; MySQL would have refused these rows
+            from sqlite_backend import foreign_key_violations
+            for (child, parent), rows in sorted(foreign_key_violations(connection).items()):
+                print(f"⚠️  {child}: {rows} rows reference a missing {parent} row")
         if total_rows == 0:
             print("❌ WARNING: No data was imported to any table!")
         
@@ -376,6 +1036,8 @@ def main():
         traceback.print_exc()
     
     finally:
+        if dedup_dir:
+            shutil.rmtree(dedup_dir, ignore_errors=True)
         if connection:
             connection.close()
             print("Database connection closed")
@@ -408,13 +1070,8 @@ def generate_sample_data(connection):
             'phone': ['1234567890', '0987654321', '1122334455']
         })
         
-        # Create SQLAlchemy engine
-        user = connection.user
-        password = connection._password
-        host = connection._host
-        database = connection._database
-        engine_url = f"mysql+mysqlconnector://{user}:{password}@{host}/{database}"
-        engine = create_engine(engine_url)
+        # Shared SQLAlchemy engine
+        engine = get_engine()
         
         # Import the sample data
         print("Importing Screen data...")
@@ -0,0 +1,234 @@
+import os
+import sys
+import time
+import pandas as pd
+
+from Database_creation import TABLE_DEFINITIONS, parse_column_definitions
+from import_data import find_csv_files, group_csv_by_table, detect_csv_encoding, load_import_stats
+from coercion import COLUMN_FALLBACKS, column_kind, coerce_with_fallback, read_csv_chunks
+
+# The shared CSV helpers live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from csv_source import csv_compression, sample_csv_head, csv_header, is_parquet, parquet_rows
+
+# Bytes read from the head and the middle of a file to estimate the average line length
+PLAN_SAMPLE_SIZE = 64 * 1024
+
+# Decompressed bytes sampled from a compressed file, which can only be read from the start
+COMPRESSED_SAMPLE_SIZE = 1024 * 1024
+
+# Rows parsed to compare CSV values against the target column types
+PLAN_SAMPLE_ROWS = 200
+
+# Column kinds whose values are converted from text; integers are listed only when their text changes
+CONVERTED_KINDS = ('decimal', 'float', 'datetime', 'date', 'boolean')
+
+def estimate_csv_rows(csv_file, sample_size=PLAN_SAMPLE_SIZE):
+    """Estimate the number of data rows from the file size and sampled line lengths"""
+    if is_parquet(csv_file):
+        return parquet_rows(csv_file)  # Exact, from the footer
+    if csv_compression(csv_file):
+        return estimate_compressed_csv_rows(csv_file)
+    file_size = os.path.getsize(csv_file)
+    with open(csv_file, 'rb') as f:
+        header = f.readline()
+        sampled_bytes = 0
+        sampled_lines = 0
+        for offset in (len(header), len(header) + (file_size - len(header)) // 2):
+            f.seek(offset)
+            if offset > len(header):
+                f.readline()  # Skip the partial line we landed in
+            sample = f.read(sample_size)
+            # Only count complete lines
+            end = sample.rfind(b'\n') + 1
+            sampled_bytes += end
+            sampled_lines += sample.count(b'\n', 0, end)
+            if len(sample) < sample_size:
+                break  # The head sample already covered the whole file
+
+    if sampled_lines == 0:
+        return 0 if file_size <= len(header) else 1
+    average_line = sampled_bytes / sampled_lines
+    return int(round((file_size - len(header)) / average_line))
+
+def estimate_compressed_csv_rows(csv_file, sample_size=COMPRESSED_SAMPLE_SIZE):
+    """Estimate the data rows of a compressed CSV from a decompressed sample of its head
+
+    The uncompressed size is extrapolated from the sample's compression ratio,
+    then divided by the sample's average line length. Small files are
+    decompressed completely and counted exactly.
+    """
+    data, consumed, complete = sample_csv_head(csv_file, sample_size)
+    header_end = data.find(b'\n') + 1
+    end = data.rfind(b'\n') + 1
+    lines = data.count(b'\n', header_end, end)
+    if complete:
+        # A last line without a trailing newline still counts
+        return lines + (1 if header_end and data[end:].strip() else 0)
+    if lines == 0:
+        return 1
+    uncompressed = os.path.getsize(csv_file) * len(data) / consumed
+    return int(round((uncompressed - header_end) / ((end - header_end) / lines)))
+
+def describe_column(series, sql_type, nullable, policy=None):
+    """Describe how a column's sampled values are converted, kept by a fallback, or rejected
+
+    The values go through coercion.coerce_with_fallback(), the importer's
+    own conversion, so the plan shows what an import would do with them.
+    Returns (coercion, fallback, reject), each None when there is nothing to
+    say. A fallback's query needs the database, so the plan only counts the
+    missing values it would fill.
+    """
+    kind, args = column_kind(sql_type)
+    text = series.astype('string').str.strip()
+    present = (text.notna() & (text != '')).astype(bool)
+    lookup_from = policy.get('from') if policy and 'query' in policy else None
+    if policy:
+        policy = {key: value for key, value in policy.items() if key != 'query'}
+    values, failed, reasons, counts = coerce_with_fallback(series, kind, args, nullable, policy)
+
+    coercion = None
+    converted = present & ~failed
+    if converted.any() and kind in CONVERTED_KINDS + ('int',):
+        changed = converted & (text != values.astype(str))
+        if kind != 'int' or changed.any():
+            example = (changed if changed.any() else converted).idxmax()
+            coercion = (f"text -> {sql_type} ({int(converted.sum())}/{int(present.sum())} sampled values, "
+                        f"e.g. {series[example]!r} -> {values[example]})")
+
+    kept = [f"{count} {what}" for what, count in counts.items() if count]
+    if lookup_from:
+        to_fill = failed & ~present
+        failed &= present
+        if to_fill.any():
+            kept.append(f"{int(to_fill.sum())} missing, to be filled from {lookup_from} by its query")
+    fallback = f"{', '.join(kept)} (of {len(series)} sampled rows)" if kept else None
+
+    reject = None
+    if failed.any():
+        reason = reasons[failed].value_counts().index[0]
+        example = failed[failed & (reasons == reason)].index[0]
+        shown = repr(series[example]) if present[example] else "a blank value"
+        reject = f"{int(failed.sum())}/{len(series)} sampled rows as {sql_type} ({reason}, e.g. {shown})"
+    return coercion, fallback, reject
+
+def plan_csv_file(csv_file, table_name, import_stats, column_fallbacks=None):
+    """Build the plan entry for one CSV file without touching the database
+
+    `column_fallbacks` is coercion.load_column_fallbacks(), by default
+    COLUMN_FALLBACKS.
+    """
+    column_fallbacks = COLUMN_FALLBACKS if column_fallbacks is None else column_fallbacks
+    entry = {
+        'file': csv_file,
+        'table': table_name,
+        'bytes': os.path.getsize(csv_file),
+        'rows': estimate_csv_rows(csv_file),
+        'dropped': [],
+        'null_filled': [],
+        'coercions': [],
+        'fallbacks': [],
+        'rejects': [],
+        'seconds': None
+    }
+
+    if table_name not in TABLE_DEFINITIONS:
+        entry['error'] = "no such table in Database_creation.py"
+        return entry
+
+    encoding = detect_csv_encoding(csv_file, sample_size=PLAN_SAMPLE_SIZE)
+    # Read as text, the way the importer reads it
+    chunks = read_csv_chunks(csv_file, PLAN_SAMPLE_ROWS, encoding=encoding)
+    sample = next(chunks, (pd.DataFrame(columns=csv_header(csv_file, encoding)),))[0]
+    chunks.close()
+
+    # Same case-insensitive matching as clean_chunk()
+    columns = parse_column_definitions(table_name)
+    csv_by_lower = {str(col).lower(): col for col in sample.columns}
+    matched = set()
+    for name, sql_type, nullable in columns:
+        csv_col = csv_by_lower.get(name.lower())
+        if csv_col is None:
+            entry['null_filled'].append(name if nullable else f"{name} (NOT NULL!)")
+            continue
+        matched.add(csv_col)
+        described = describe_column(sample[csv_col], sql_type, nullable, column_fallbacks.get((table_name, name)))
+        for key, description in zip(('coercions', 'fallbacks', 'rejects'), described):
+            if description:
+                entry[key].append(f"{name}: {description}")
+    entry['dropped'] = [col for col in sample.columns if col not in matched]
+
+    table_stats = import_stats.get(table_name)
+    if table_stats is None and import_stats:
+        # Fall back to the overall throughput of the last run
+        rows = sum(s['rows'] for s in import_stats.values())
+        seconds = sum(s['seconds'] for s in import_stats.values())
+        table_stats = {'rows_per_second': rows / seconds} if seconds else None
+    if table_stats:
+        entry['seconds'] = entry['rows'] / table_stats['rows_per_second']
+    return entry
+
+def format_bytes(size):
+    """Format a byte count for humans"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def print_import_plan(data_folder, column_fallbacks=None):
+    """Print what an import would do, with row, size and time estimates"""
+    start = time.perf_counter()
+    data_folder, csv_files = find_csv_files(data_folder)
+    if not csv_files:
+        print("❌ Could not find any CSV files to plan")
+        return []
+
+    import_stats = load_import_stats()
+    csv_by_table = group_csv_by_table(csv_files)
+    plan = []
+    for table, files in csv_by_table.items():
+        for csv_file in files:
+            plan.append(plan_csv_file(csv_file, table, import_stats, column_fallbacks))
+
+    print(f"\nImport plan for '{data_folder}' (no database changes)")
+    print(f"{'#':>3}  {'Table':<18} {'File':<28} {'Size':>10} {'~Rows':>10} {'~Time':>9}")
+    for i, entry in enumerate(plan):
+        seconds = f"{entry['seconds']:.1f}s" if entry['seconds'] is not None else "n/a"
+        print(f"{i+1:>3}  {entry['table']:<18} {os.path.basename(entry['file']):<28} "
+              f"{format_bytes(entry['bytes']):>10} {entry['rows']:>10,} {seconds:>9}")
+
+    total_bytes = sum(entry['bytes'] for entry in plan)
+    total_rows = sum(entry['rows'] for entry in plan)
+    timed = [entry['seconds'] for entry in plan if entry['seconds'] is not None]
+    print(f"\nTotal: {format_bytes(total_bytes)}, ~{total_rows:,} rows", end="")
+    if timed:
+        print(f", ~{sum(timed):.1f}s predicted from the last import"
+              f"{'' if len(timed) == len(plan) else ' (some tables have no benchmark yet)'}")
+    else:
+        print(" (no previous import statistics, run an import once to predict load times)")
+
+    print("\nColumn mismatches:")
+    any_mismatch = False
+    for entry in plan:
+        if 'error' in entry:
+            print(f"  {entry['table']}: ❌ {entry['error']}")
+            any_mismatch = True
+            continue
+        if any(entry[key] for key in ('dropped', 'null_filled', 'coercions', 'fallbacks', 'rejects')):
+            any_mismatch = True
+            print(f"  {entry['table']} ({os.path.basename(entry['file'])}):")
+            if entry['dropped']:
+                print(f"    dropped: {', '.join(entry['dropped'])}")
+            if entry['null_filled']:
+                print(f"    filled with NULL: {', '.join(entry['null_filled'])}")
+            for coercion in entry['coercions']:
+                print(f"    coerced {coercion}")
+            for fallback in entry['fallbacks']:
+                print(f"    kept by fallback {fallback}")
+            for reject in entry['rejects']:
+                print(f"    rejected {reject}")
+    if not any_mismatch:
+        print("  none")
+
+    print(f"\nPlanned in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return plan
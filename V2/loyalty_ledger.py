@@ -0,0 +1,274 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from mysql.connector import Error
+
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import create_connection
+
+# Last PointsTransaction applied to each member's balance
+CREATE_WATERMARK_TABLE = """
+CREATE TABLE IF NOT EXISTS PointsLedgerWatermark (
+    user_id INT PRIMARY KEY,
+    last_transaction_id INT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+"""
+
+# Rows applied within LATE_COMMIT_WINDOW of a watermark, so the window can be re-scanned without applying one twice
+CREATE_APPLIED_TABLE = """
+CREATE TABLE IF NOT EXISTS PointsLedgerApplied (
+    transaction_id INT PRIMARY KEY,
+    user_id INT NOT NULL
+) ENGINE=InnoDB;
+"""
+
+# Ids re-scanned below each watermark. A booking transaction takes its auto-increment id when it
+# inserts and becomes visible when it commits, so a row can appear after rows with higher ids;
+# it is still applied as long as fewer than this many ids were handed out meanwhile.
+LATE_COMMIT_WINDOW = 10000
+
+# Balance change of one ledger row: earned and bonus points add up, redemptions
+# carry the redeemed points in `amount` (points_earned is 0 for them)
+POINTS_DELTA_SQL = "pt.points_earned - IF(pt.transaction_type = 'Redeemed', ROUND(pt.amount), 0)"
+
+# Record the rows of the members in `scope` (user_id, last_transaction_id) that their watermark
+# already covers, as far back as the late-commit window reaches
+MARK_COVERED_SQL = f"""
+    INSERT IGNORE INTO PointsLedgerApplied (transaction_id, user_id)
+    SELECT pt.transaction_id, pt.user_id
+    FROM PointsTransaction pt JOIN {{scope}} s ON s.user_id = pt.user_id
+    WHERE pt.transaction_id <= s.last_transaction_id
+      AND pt.transaction_id > s.last_transaction_id - {LATE_COMMIT_WINDOW}
+"""
+
+def ensure_ledger_tables(connection):
+    """Create the ledger tables and seed a watermark for every member without one
+
+    A new member's watermark goes on their latest ledger row, taking the
+    stored balance as it is: whether it matches the ledger is for
+    reconcile to report and reconcile --fix to correct.
+    """
+    cursor = connection.cursor()
+    cursor.execute("SHOW TABLES LIKE 'PointsLedgerApplied'")
+    upgrading = cursor.fetchone() is None
+    cursor.execute(CREATE_WATERMARK_TABLE)
+    cursor.execute(CREATE_APPLIED_TABLE)
+    try:
+        connection.start_transaction()
+        if upgrading:
+            # Watermarks from before the applied rows were tracked cover everything below them
+            cursor.execute(MARK_COVERED_SQL.format(scope="PointsLedgerWatermark"))
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS ledger_seed")
+        cursor.execute("""
+            CREATE TEMPORARY TABLE ledger_seed (PRIMARY KEY (user_id)) AS
+            SELECT m.user_id, COALESCE(MAX(pt.transaction_id), 0) AS last_transaction_id
+            FROM (SELECT DISTINCT user_id FROM Membership) m
+            LEFT JOIN PointsLedgerWatermark w ON w.user_id = m.user_id
+            LEFT JOIN PointsTransaction pt ON pt.user_id = m.user_id
+            WHERE w.user_id IS NULL
+            GROUP BY m.user_id
+        """)
+        cursor.execute("""
+            INSERT INTO PointsLedgerWatermark (user_id, last_transaction_id)
+            SELECT user_id, last_transaction_id FROM ledger_seed
+        """)
+        cursor.execute(MARK_COVERED_SQL.format(scope="ledger_seed"))
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS ledger_seed")
+        connection.commit()
+    except Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def apply_new_transactions(connection):
+    """Apply PointsTransaction rows not yet applied to Membership balances
+
+    Each member's rows above their watermark are applied, and so are rows
+    that committed late within LATE_COMMIT_WINDOW ids below it, which
+    PointsLedgerApplied tells apart from rows already applied. Only that
+    primary-key range is scanned. Every watermark then moves up to the last
+    row considered, and applied rows that fell out of the window are
+    forgotten. Balances, watermarks and applied rows move together in one
+    transaction, so a re-run never applies a row twice. Returns (users
+    updated, rows applied).
+    """
+    ensure_ledger_tables(connection)
+    cursor = connection.cursor()
+    try:
+        connection.start_transaction()
+        # Fix the upper bound so rows inserted meanwhile wait for the next run
+        cursor.execute("SELECT COALESCE(MAX(transaction_id), 0) FROM PointsTransaction")
+        upper = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE(MIN(last_transaction_id), 0) FROM PointsLedgerWatermark")
+        lower = max(0, cursor.fetchone()[0] - LATE_COMMIT_WINDOW)
+
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS ledger_rows")
+        cursor.execute(f"""
+            CREATE TEMPORARY TABLE ledger_rows (PRIMARY KEY (transaction_id)) AS
+            SELECT pt.transaction_id, pt.user_id, {POINTS_DELTA_SQL} AS delta
+            FROM PointsTransaction pt
+            JOIN PointsLedgerWatermark w ON w.user_id = pt.user_id
+            LEFT JOIN PointsLedgerApplied a ON a.transaction_id = pt.transaction_id
+            WHERE pt.transaction_id > %s AND pt.transaction_id <= %s
+              AND pt.transaction_id > w.last_transaction_id - %s
+              AND a.transaction_id IS NULL
+        """, (lower, upper, LATE_COMMIT_WINDOW))
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS ledger_delta")
+        cursor.execute("""
+            CREATE TEMPORARY TABLE ledger_delta (PRIMARY KEY (user_id)) AS
+            SELECT user_id, SUM(delta) AS delta, COUNT(*) AS row_count
+            FROM ledger_rows
+            GROUP BY user_id
+        """)
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(row_count), 0) FROM ledger_delta")
+        users, rows = cursor.fetchone()
+
+        if users:
+            cursor.execute("""
+                UPDATE Membership m JOIN ledger_delta d ON d.user_id = m.user_id
+                SET m.current_points = m.current_points + d.delta
+            """)
+            cursor.execute("""
+                INSERT INTO PointsLedgerApplied (transaction_id, user_id)
+                SELECT transaction_id, user_id FROM ledger_rows
+            """)
+        # Every balance now covers the ledger up to `upper`
+        cursor.execute("UPDATE PointsLedgerWatermark SET last_transaction_id = %s WHERE last_transaction_id < %s",
+                       (upper, upper))
+        cursor.execute("SELECT COALESCE(MIN(last_transaction_id), 0) FROM PointsLedgerWatermark")
+        oldest = cursor.fetchone()[0]
+        cursor.execute("DELETE FROM PointsLedgerApplied WHERE transaction_id <= %s",
+                       (oldest - LATE_COMMIT_WINDOW,))
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS ledger_delta")
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS ledger_rows")
+        connection.commit()
+        return users, int(rows)
+    except Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def get_balance(connection, user_id):
+    """Read a member's balance, a single indexed lookup"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT current_points FROM Membership WHERE user_id = %s LIMIT 1", (user_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else None
+
+def compute_ledger_balances(connection):
+    """Aggregate the whole ledger into a DataFrame of balance and watermark per user"""
+    cursor = connection.cursor()
+    cursor.execute(f"""
+        SELECT pt.user_id, SUM({POINTS_DELTA_SQL}), MAX(pt.transaction_id), COUNT(*)
+        FROM PointsTransaction pt
+        GROUP BY pt.user_id
+    """)
+    rows = cursor.fetchall()
+    cursor.close()
+    ledger = pd.DataFrame(rows, columns=['user_id', 'ledger_points', 'last_transaction_id', 'row_count'])
+    return ledger.astype({'user_id': np.int64, 'ledger_points': np.int64,
+                          'last_transaction_id': np.int64, 'row_count': np.int64})
+
+def reconcile(connection, fix=False, show=10):
+    """Compare every Membership balance with the full ledger, optionally fixing drift in bulk
+
+    The comparison is vectorized over all members at once. Fixing loads the
+    corrected balances into a temporary table and applies them with one
+    UPDATE ... JOIN, and moves every watermark to the ledger's latest row.
+    """
+    start = time.perf_counter()
+    ledger = compute_ledger_balances(connection)
+    cursor = connection.cursor()
+    cursor.execute("SELECT user_id, current_points FROM Membership")
+    members = pd.DataFrame(cursor.fetchall(), columns=['user_id', 'current_points'])
+    cursor.close()
+
+    merged = members.merge(ledger, on='user_id', how='left')
+    merged[['ledger_points', 'last_transaction_id', 'row_count']] = (
+        merged[['ledger_points', 'last_transaction_id', 'row_count']].fillna(0).astype(np.int64))
+    merged['drift'] = merged['current_points'].to_numpy(np.int64) - merged['ledger_points'].to_numpy()
+    drifted = merged[merged['drift'] != 0]
+
+    print(f"Reconciled {len(merged)} memberships against {int(ledger['row_count'].sum())} ledger rows "
+          f"in {time.perf_counter() - start:.3f}s")
+    if drifted.empty:
+        print("✅ No drift found")
+    else:
+        print(f"⚠️  {len(drifted)} balances drifted, total |drift| = {int(drifted['drift'].abs().sum())} points")
+        worst = drifted.reindex(drifted['drift'].abs().sort_values(ascending=False).index).head(show)
+        for row in worst.itertuples(index=False):
+            print(f"  user {row.user_id}: stored {row.current_points}, ledger {row.ledger_points} ({row.drift:+d})")
+
+    if fix:
+        ensure_ledger_tables(connection)
+        cursor = connection.cursor()
+        try:
+            connection.start_transaction()
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS ledger_fix")
+            cursor.execute("""
+                CREATE TEMPORARY TABLE ledger_fix (
+                    user_id INT PRIMARY KEY, ledger_points INT NOT NULL, last_transaction_id INT NOT NULL
+                )
+            """)
+            fixes = merged.drop_duplicates('user_id')[['user_id', 'ledger_points', 'last_transaction_id']]
+            # executemany batches these into multi-row INSERTs
+            cursor.executemany("INSERT INTO ledger_fix VALUES (%s, %s, %s)",
+                               fixes.itertuples(index=False, name=None))
+            cursor.execute("""
+                UPDATE Membership m JOIN ledger_fix f ON f.user_id = m.user_id
+                SET m.current_points = f.ledger_points
+                WHERE m.current_points <> f.ledger_points
+            """)
+            fixed = cursor.rowcount
+            cursor.execute("""
+                UPDATE PointsLedgerWatermark w JOIN ledger_fix f ON f.user_id = w.user_id
+                SET w.last_transaction_id = f.last_transaction_id
+            """)
+            # The fixed balances hold every ledger row up to the new watermarks
+            cursor.execute(MARK_COVERED_SQL.format(scope="ledger_fix"))
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS ledger_fix")
+            connection.commit()
+            print(f"✅ Fixed {fixed} balances and reset watermarks")
+        except Error:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+    return drifted
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep Membership.current_points in step with PointsTransaction')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('apply', help='Apply new ledger rows to balances incrementally')
+    reconcile_parser = subparsers.add_parser('reconcile', help='Compare balances with the full ledger')
+    reconcile_parser.add_argument('--fix', action='store_true', help='Overwrite drifted balances and reset watermarks')
+    balance_parser = subparsers.add_parser('balance', help='Show a member balance')
+    balance_parser.add_argument('user_id', type=int)
+    args = parser.parse_args()
+
+    connection = create_connection()
+    if connection is None:
+        return
+    try:
+        if args.command == 'apply':
+            start = time.perf_counter()
+            users, rows = apply_new_transactions(connection)
+            print(f"✅ Applied {rows} ledger rows to {users} balances in {time.perf_counter() - start:.3f}s")
+        elif args.command == 'reconcile':
+            reconcile(connection, fix=args.fix)
+        else:
+            balance = get_balance(connection, args.user_id)
+            print(f"User {args.user_id}: {balance if balance is not None else 'no membership'}")
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
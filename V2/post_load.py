@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from mysql.connector import Error
+
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import get_connection, load_db_config, is_sqlite
+
+def analyze_table(database, table_name):
+    """Refresh one table's optimizer statistics on its own pooled connection
+
+    Returns the seconds taken and any warning or error messages.
+    """
+    started = time.perf_counter()
+    connection = get_connection(database)
+    try:
+        cursor = connection.cursor()
+        if is_sqlite():
+            # SQLite's ANALYZE reports failures as errors rather than result rows
+            cursor.execute(f"ANALYZE `{table_name}`")
+            connection.commit()
+            messages = []
+        else:
+            cursor.execute(f"ANALYZE TABLE `{table_name}`")
+            # One row per message: (Table, Op, Msg_type, Msg_text)
+            messages = cursor.fetchall()
+        cursor.close()
+    finally:
+        connection.close()
+    problems = [f"{msg_type}: {msg_text}" for _, _, msg_type, msg_text in messages
+                if str(msg_type).lower() in ('error', 'warning')]
+    return time.perf_counter() - started, problems
+
+def analyze_tables(database, tables, jobs=None):
+    """Run ANALYZE TABLE on several tables at once, one pooled connection each
+
+    ANALYZE samples a fixed number of index pages per table, so its cost
+    hardly grows with the rows loaded. Returns {table: seconds} for the
+    tables analyzed without errors.
+    """
+    if not tables:
+        return {}
+    jobs = jobs or max(1, min(len(tables), load_db_config()['pool_size']))
+    if is_sqlite():
+        # ANALYZE writes sqlite_stat1, and a SQLite file takes one writer at a time
+        jobs = 1
+    started = time.perf_counter()
+    timings = {}
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="analyze") as executor:
+        futures = {executor.submit(analyze_table, database, table): table for table in tables}
+        for future in as_completed(futures):
+            table = futures[future]
+            try:
+                seconds, problems = future.result()
+            except Error as e:
+                print(f"❌ Could not analyze {table}: {e}")
+                continue
+            if problems:
+                print(f"⚠️  ANALYZE TABLE {table}: {'; '.join(problems)}")
+            else:
+                timings[table] = seconds
+    print(f"✅ Refreshed optimizer statistics of {len(timings)}/{len(tables)} tables "
+          f"in {time.perf_counter() - started:.2f}s ({jobs} in parallel)")
+    return timings
+
+def table_statistics(connection):
+    """(table, estimated rows, data bytes, index bytes) for every table, from information_schema
+
+    Read from the data dictionary rather than by counting, so the cost does
+    not depend on table sizes. Row counts are InnoDB's estimates.
+    """
+    if is_sqlite():
+        from sqlite_backend import table_statistics as sqlite_table_statistics
+        return sqlite_table_statistics(connection)
+    cursor = connection.cursor()
+    try:
+        # MySQL 8 caches these statistics for a day by default; read the current ones
+        cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+    except Error:
+        pass  # Older servers have no cache
+    cursor.execute("""
+        SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH, INDEX_LENGTH
+        FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+        ORDER BY TABLE_NAME
+    """)
+    statistics = [(name, int(rows or 0), int(data or 0), int(index or 0))
+                  for name, rows, data, index in cursor.fetchall()]
+    cursor.close()
+    return statistics
+
+def print_load_summary(connection, table_timings, analyze_timings=None):
+    """Print rows imported this run next to each table's estimated size on disk
+
+    table_timings is the importer's {table: (rows imported, seconds)}.
+    Tables loaded this run come first, in import order. Returns the number
+    of rows imported.
+    """
+    analyze_timings = analyze_timings or {}
+    loaded = list(table_timings)
+    statistics = sorted(table_statistics(connection),
+                        key=lambda row: (loaded.index(row[0]) if row[0] in loaded else len(loaded), row[0]))
+    mb = 1024 * 1024
+
+    if is_sqlite():
+        print("\nFinal table statistics (rows from ANALYZE's sqlite_stat1, sizes from dbstat):")
+    else:
+        print("\nFinal table statistics (rows are InnoDB estimates, sizes from information_schema):")
+    print(f"  {'Table':<20} {'Imported':>10} {'Load s':>8} {'~Rows':>12} {'Data MB':>9} {'Index MB':>9} {'Analyze s':>9}")
+    total_imported = total_rows = total_data = total_index = 0
+    for name, rows, data, index in statistics:
+        imported, seconds = table_timings.get(name, (0, 0.0))
+        analyzed = f"{analyze_timings[name]:.2f}" if name in analyze_timings else '-'
+        print(f"  {name:<20} {imported:>10} {seconds:>8.1f} {rows:>12} "
+              f"{data / mb:>9.1f} {index / mb:>9.1f} {analyzed:>9}")
+        total_imported += imported
+        total_rows += rows
+        total_data += data
+        total_index += index
+    print(f"  {'Total':<20} {total_imported:>10} {'':>8} {total_rows:>12} "
+          f"{total_data / mb:>9.1f} {total_index / mb:>9.1f}")
+    return total_imported
@@ -0,0 +1,314 @@
+import os
+import sys
+import time
+import argparse
+from datetime import date, datetime, timedelta
+from mysql.connector import Error
+
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import create_connection
+
+# Pre-aggregated tables the dashboards read instead of joining the fact tables
+REPORT_TABLES = {
+    'DailyMovieRevenue': """
+CREATE TABLE IF NOT EXISTS DailyMovieRevenue (
+    day DATE NOT NULL,
+    movie_id INT NOT NULL,
+    screen_id INT NOT NULL,
+    gateway_id INT NOT NULL,
+    bookings INT NOT NULL,
+    tickets INT NOT NULL,
+    revenue DECIMAL(14,2) NOT NULL,
+    PRIMARY KEY (day, movie_id, screen_id, gateway_id),
+    INDEX idx_daily_movie_revenue_movie (movie_id, day)
+) ENGINE=InnoDB;
+""",
+    'DailyFoodRevenue': """
+CREATE TABLE IF NOT EXISTS DailyFoodRevenue (
+    day DATE NOT NULL,
+    item_id INT NOT NULL,
+    size_id INT NOT NULL,
+    orders INT NOT NULL,
+    quantity INT NOT NULL,
+    revenue DECIMAL(14,2) NOT NULL,
+    PRIMARY KEY (day, item_id, size_id)
+) ENGINE=InnoDB;
+""",
+    'ShowOccupancy': """
+CREATE TABLE IF NOT EXISTS ShowOccupancy (
+    show_id INT PRIMARY KEY,
+    screen_id INT NOT NULL,
+    movie_id INT NOT NULL,
+    show_date DATE NOT NULL,
+    capacity INT NOT NULL,
+    tickets_sold INT NOT NULL,
+    occupancy_pct DECIMAL(5,2) NOT NULL,
+    INDEX idx_show_occupancy_date (show_date)
+) ENGINE=InnoDB;
+""",
+    'ReportWatermark': """
+CREATE TABLE IF NOT EXISTS ReportWatermark (
+    source VARCHAR(30) PRIMARY KEY,
+    last_value DATETIME NOT NULL,
+    refreshed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+"""
+}
+
+# Watermarked sources: name -> (table, datetime column)
+WATERMARK_SOURCES = {
+    'booking': ('Booking', 'booking_datetime'),
+    'payment': ('Payment', 'transaction_datetime'),
+    'food_order': ('FoodOrder', 'order_datetime')
+}
+
+# Indexes that turn the watermark lookups into range scans
+SOURCE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_booking_datetime ON Booking (booking_datetime)",
+    "CREATE INDEX IF NOT EXISTS idx_payment_datetime ON Payment (transaction_datetime)",
+    "CREATE INDEX IF NOT EXISTS idx_foodorder_datetime ON FoodOrder (order_datetime)"
+]
+
+EPOCH = datetime(1970, 1, 1)
+
+# Summary tables rebuilt from scratch by a full refresh
+SUMMARY_TABLES = ('DailyMovieRevenue', 'DailyFoodRevenue', 'ShowOccupancy')
+
+# Rows are re-scanned this far behind each watermark: a transaction that
+# commits after a refresh can carry a timestamp older than that refresh's MAX
+LATE_COMMIT_WINDOW = timedelta(minutes=30)
+
+def ensure_report_tables(connection):
+    """Create the summary tables, the watermark table and the source indexes"""
+    cursor = connection.cursor()
+    for ddl in REPORT_TABLES.values():
+        cursor.execute(ddl)
+    for statement in SOURCE_INDEXES:
+        cursor.execute(statement)
+    connection.commit()
+    cursor.close()
+
+def get_watermarks(cursor):
+    """Read the last processed datetime of every source"""
+    cursor.execute("SELECT source, last_value FROM ReportWatermark")
+    watermarks = dict(cursor.fetchall())
+    return {source: watermarks.get(source, EPOCH) for source in WATERMARK_SOURCES}
+
+def collect_affected(cursor, watermarks, uppers):
+    """Fill the report_days and report_shows temporary tables from rows past the given lower bounds"""
+    booking_low, booking_high = watermarks['booking'], uppers['booking']
+    payment_low, payment_high = watermarks['payment'], uppers['payment']
+    food_low, food_high = watermarks['food_order'], uppers['food_order']
+
+    cursor.execute("""
+        INSERT IGNORE INTO report_days (day)
+        SELECT DISTINCT DATE(booking_datetime) FROM Booking
+        WHERE booking_datetime > %s AND booking_datetime <= %s
+    """, (booking_low, booking_high))
+    # Revenue is reported on the booking day, so late payments reopen that day
+    cursor.execute("""
+        INSERT IGNORE INTO report_days (day)
+        SELECT DISTINCT DATE(b.booking_datetime) FROM Payment p JOIN Booking b ON b.booking_id = p.booking_id
+        WHERE p.transaction_datetime > %s AND p.transaction_datetime <= %s
+    """, (payment_low, payment_high))
+    cursor.execute("""
+        INSERT IGNORE INTO report_food_days (day)
+        SELECT DISTINCT DATE(order_datetime) FROM FoodOrder
+        WHERE order_datetime > %s AND order_datetime <= %s
+    """, (food_low, food_high))
+    cursor.execute("""
+        INSERT IGNORE INTO report_shows (show_id)
+        SELECT DISTINCT show_id FROM Booking
+        WHERE booking_datetime > %s AND booking_datetime <= %s
+    """, (booking_low, booking_high))
+
+def recompute_movie_revenue(cursor):
+    """Rebuild DailyMovieRevenue rows for the days in report_days"""
+    cursor.execute("DELETE r FROM DailyMovieRevenue r JOIN report_days d ON d.day = r.day")
+    cursor.execute("""
+        INSERT INTO DailyMovieRevenue (day, movie_id, screen_id, gateway_id, bookings, tickets, revenue)
+        SELECT bk.day, s.movie_id, s.screen_id, p.gateway_id,
+               COUNT(DISTINCT bk.booking_id), SUM(bk.tickets), SUM(p.transaction_amount)
+        FROM (
+            -- Tickets are counted per booking through the Ticket.booking_id index
+            SELECT d.day, b.booking_id, b.show_id,
+                   (SELECT COUNT(*) FROM Ticket t WHERE t.booking_id = b.booking_id) AS tickets
+            FROM report_days d
+            JOIN Booking b ON b.booking_datetime >= d.day AND b.booking_datetime < d.day + INTERVAL 1 DAY
+        ) bk
+        JOIN `Show` s ON s.show_id = bk.show_id
+        JOIN Payment p ON p.booking_id = bk.booking_id AND p.status = 'Success'
+        GROUP BY bk.day, s.movie_id, s.screen_id, p.gateway_id
+    """)
+
+def recompute_food_revenue(cursor):
+    """Rebuild DailyFoodRevenue rows for the days in report_food_days"""
+    cursor.execute("DELETE r FROM DailyFoodRevenue r JOIN report_food_days d ON d.day = r.day")
+    cursor.execute("""
+        INSERT INTO DailyFoodRevenue (day, item_id, size_id, orders, quantity, revenue)
+        SELECT d.day, oi.item_id, oi.size_id, COUNT(DISTINCT o.order_id),
+               SUM(oi.quantity), SUM(oi.quantity * oi.price_at_time)
+        FROM report_food_days d
+        JOIN FoodOrder o ON o.order_datetime >= d.day AND o.order_datetime < d.day + INTERVAL 1 DAY
+        JOIN FoodOrderItem oi ON oi.order_id = o.order_id
+        GROUP BY d.day, oi.item_id, oi.size_id
+    """)
+
+def recompute_occupancy(cursor):
+    """Rebuild ShowOccupancy rows for the shows in report_shows"""
+    cursor.execute("""
+        REPLACE INTO ShowOccupancy (show_id, screen_id, movie_id, show_date, capacity, tickets_sold, occupancy_pct)
+        SELECT s.show_id, s.screen_id, s.movie_id, DATE(s.show_datetime), sc.capacity,
+               COUNT(t.ticket_id),
+               LEAST(999.99, ROUND(100 * COUNT(t.ticket_id) / GREATEST(sc.capacity, 1), 2))
+        FROM report_shows rs
+        JOIN `Show` s ON s.show_id = rs.show_id
+        JOIN Screen sc ON sc.screen_id = s.screen_id
+        LEFT JOIN Booking b ON b.show_id = s.show_id
+        LEFT JOIN Ticket t ON t.booking_id = b.booking_id
+        GROUP BY s.show_id, s.screen_id, s.movie_id, s.show_datetime, sc.capacity
+    """)
+
+def refresh_reports(connection, full=False, days=None, overlap=LATE_COMMIT_WINDOW):
+    """Recompute only the days and shows touched since the last refresh
+
+    Each source is re-scanned from `overlap` before its watermark so late
+    commits are picked up; recomputing a day twice is harmless. `full`
+    empties the summary tables and rebuilds everything; `days` forces the
+    given dates to be recomputed as well (e.g. after a backfill with old
+    timestamps). Everything is swapped in within one transaction.
+    """
+    ensure_report_tables(connection)
+    cursor = connection.cursor()
+    start = time.perf_counter()
+    try:
+        if connection.in_transaction:
+            connection.commit()
+        connection.start_transaction()
+        if full:
+            watermarks = {source: EPOCH for source in WATERMARK_SOURCES}
+            # DELETE rather than TRUNCATE, which would commit the transaction
+            for summary_table in SUMMARY_TABLES:
+                cursor.execute(f"DELETE FROM {summary_table}")
+        else:
+            watermarks = get_watermarks(cursor)
+        uppers = {}
+        for source, (table, column) in WATERMARK_SOURCES.items():
+            cursor.execute(f"SELECT MAX({column}) FROM `{table}`")
+            uppers[source] = cursor.fetchone()[0] or watermarks[source]
+
+        for temp_table, key in (('report_days', 'day DATE'), ('report_food_days', 'day DATE'),
+                                ('report_shows', 'show_id INT')):
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {temp_table}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {temp_table} ({key} PRIMARY KEY)")
+
+        lows = {source: max(EPOCH, value - overlap) for source, value in watermarks.items()}
+        collect_affected(cursor, lows, uppers)
+        for forced_day in days or []:
+            cursor.execute("INSERT IGNORE INTO report_days (day) VALUES (%s)", (forced_day,))
+            cursor.execute("INSERT IGNORE INTO report_food_days (day) VALUES (%s)", (forced_day,))
+            cursor.execute("""
+                INSERT IGNORE INTO report_shows (show_id)
+                SELECT DISTINCT show_id FROM Booking
+                WHERE booking_datetime >= %s AND booking_datetime < %s + INTERVAL 1 DAY
+            """, (forced_day, forced_day))
+
+        counts = {}
+        for temp_table in ('report_days', 'report_food_days', 'report_shows'):
+            cursor.execute(f"SELECT COUNT(*) FROM {temp_table}")
+            counts[temp_table] = cursor.fetchone()[0]
+
+        recompute_movie_revenue(cursor)
+        recompute_food_revenue(cursor)
+        recompute_occupancy(cursor)
+
+        for source, upper in uppers.items():
+            cursor.execute("""
+                INSERT INTO ReportWatermark (source, last_value) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE last_value = VALUES(last_value)
+            """, (source, upper))
+        for temp_table in ('report_days', 'report_food_days', 'report_shows'):
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {temp_table}")
+        connection.commit()
+    except Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    print(f"✅ Refreshed {counts['report_days']} revenue days, {counts['report_food_days']} food days "
+          f"and {counts['report_shows']} shows in {time.perf_counter() - start:.2f}s")
+    return counts
+
+def print_dashboard(connection, start_day, end_day):
+    """Print the dashboard figures, reading only the summary tables"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT m.title, SUM(r.tickets), SUM(r.revenue)
+        FROM DailyMovieRevenue r JOIN Movie m ON m.movie_id = r.movie_id
+        WHERE r.day BETWEEN %s AND %s
+        GROUP BY m.movie_id, m.title ORDER BY SUM(r.revenue) DESC LIMIT 10
+    """, (start_day, end_day))
+    print(f"\nTop movies by revenue, {start_day} to {end_day}:")
+    for title, tickets, revenue in cursor.fetchall():
+        print(f"  {title[:40]:<40} {int(tickets):>7} tickets {revenue:>12}")
+
+    cursor.execute("""
+        SELECT g.name, SUM(r.revenue) FROM DailyMovieRevenue r
+        JOIN PaymentGateway g ON g.gateway_id = r.gateway_id
+        WHERE r.day BETWEEN %s AND %s GROUP BY g.gateway_id, g.name ORDER BY 2 DESC
+    """, (start_day, end_day))
+    print("\nRevenue by gateway:")
+    for name, revenue in cursor.fetchall():
+        print(f"  {name:<20} {revenue:>12}")
+
+    cursor.execute("""
+        SELECT fi.name, fs.size_name, SUM(r.quantity), SUM(r.revenue)
+        FROM DailyFoodRevenue r
+        JOIN FoodItem fi ON fi.item_id = r.item_id
+        JOIN FoodItemSize fs ON fs.size_id = r.size_id
+        WHERE r.day BETWEEN %s AND %s
+        GROUP BY fi.name, fs.size_name ORDER BY 4 DESC LIMIT 10
+    """, (start_day, end_day))
+    print("\nTop food items:")
+    for name, size, quantity, revenue in cursor.fetchall():
+        print(f"  {name + ' (' + size + ')':<30} {int(quantity):>7} sold {revenue:>12}")
+
+    cursor.execute("""
+        SELECT screen_id, COUNT(*), AVG(occupancy_pct) FROM ShowOccupancy
+        WHERE show_date BETWEEN %s AND %s GROUP BY screen_id ORDER BY screen_id
+    """, (start_day, end_day))
+    print("\nAverage occupancy per screen:")
+    for screen_id, shows, occupancy in cursor.fetchall():
+        print(f"  screen {screen_id}: {shows} shows, {occupancy:.1f}%")
+    cursor.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain pre-aggregated revenue and occupancy reports')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    refresh_parser = subparsers.add_parser('refresh', help='Recompute the days and shows affected since the last refresh')
+    refresh_parser.add_argument('--full', action='store_true', help='Empty the summary tables and rebuild everything')
+    refresh_parser.add_argument('--overlap-minutes', type=float, default=LATE_COMMIT_WINDOW.total_seconds() / 60,
+                                help='Re-scan this many minutes behind each watermark to catch late commits')
+    refresh_parser.add_argument('--days', default='', help='Comma-separated YYYY-MM-DD days to recompute as well')
+    dashboard_parser = subparsers.add_parser('dashboard', help='Print dashboard figures from the summary tables')
+    dashboard_parser.add_argument('--start', default='1970-01-01', help='First day (YYYY-MM-DD)')
+    dashboard_parser.add_argument('--end', default=date.today().isoformat(), help='Last day (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    connection = create_connection()
+    if connection is None:
+        return
+    try:
+        if args.command == 'refresh':
+            days = [date.fromisoformat(d.strip()) for d in args.days.split(',') if d.strip()]
+            refresh_reports(connection, full=args.full, days=days,
+                            overlap=timedelta(minutes=args.overlap_minutes))
+        else:
+            print_dashboard(connection, date.fromisoformat(args.start), date.fromisoformat(args.end))
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# The shared connection layer and CSV helpers live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import create_connection
+from csv_source import is_parquet
+
+# Movie has no runtime column, so every show occupies its screen for this long (film, ads and cleaning)
+DEFAULT_RUNTIME_MINUTES = 150
+
+class ScheduleIndex:
+    """Per-screen sorted interval index over shows
+
+    Shows are sorted by (screen, start) into flat int64 arrays of epoch
+    seconds, with one contiguous slice per screen. Alongside the end times it
+    keeps their running maximum within each screen, which is non-decreasing,
+    so both bounds of a window query are binary searches and overlap
+    detection is a single vectorized comparison over the whole schedule.
+    """
+
+    def __init__(self, show_ids, screen_ids, starts, ends):
+        show_ids = np.asarray(show_ids, dtype=np.int64)
+        screen_ids = np.asarray(screen_ids, dtype=np.int64)
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        order = np.lexsort((ends, starts, screen_ids))
+        self.show_ids = show_ids[order]
+        self.screen_ids = screen_ids[order]
+        self.starts = starts[order]
+        self.ends = ends[order]
+
+        screens, first = np.unique(self.screen_ids, return_index=True)
+        self.screen_slices = dict(zip(screens.tolist(), zip(first.tolist(), np.append(first[1:], len(order)).tolist())))
+        self.segment_starts = np.zeros(len(order), dtype=bool)
+        self.segment_starts[first] = True
+
+        # Running max of end times, restarted at every screen: offset each screen above the previous one
+        offset = np.cumsum(self.segment_starts) * (int(self.ends.max()) + 1 if len(order) else 0)
+        self.max_ends = np.maximum.accumulate(self.ends + offset) - offset
+        # Position of the show that set that running max
+        positions = np.where(self.ends == self.max_ends, np.arange(len(order)), 0)
+        self.max_end_holders = np.maximum.accumulate(positions)
+
+    @classmethod
+    def from_frame(cls, shows, runtime_minutes=DEFAULT_RUNTIME_MINUTES):
+        """Build from a DataFrame with show_id, screen_id and show_datetime columns"""
+        starts = pd.to_datetime(shows['show_datetime']).to_numpy(dtype='datetime64[s]').astype(np.int64)
+        return cls(shows['show_id'], shows['screen_id'], starts, starts + int(runtime_minutes * 60))
+
+    def window(self, screen_id, start, end):
+        """Show ids on a screen that overlap [start, end), given as datetimes, in start order
+
+        Both bounds are binary searches; only the matching shows are scanned.
+        """
+        first, last = self.screen_slices.get(screen_id, (0, 0))
+        start, end = to_epoch(start), to_epoch(end)
+        high = first + np.searchsorted(self.starts[first:last], end, side='left')
+        low = first + np.searchsorted(self.max_ends[first:high], start, side='right')
+        candidates = np.arange(low, high)
+        return self.show_ids[candidates[self.ends[candidates] > start]]
+
+    def conflicts(self):
+        """Every show that starts before an earlier show on its screen has ended
+
+        Returns a DataFrame of (show_id, screen_id, start, conflicts_with),
+        where conflicts_with is the earlier show still running latest.
+        """
+        previous_max = np.roll(self.max_ends, 1)
+        overlapping = ~self.segment_starts & (self.starts < previous_max)
+        positions = np.nonzero(overlapping)[0]
+        return pd.DataFrame({
+            'show_id': self.show_ids[positions],
+            'screen_id': self.screen_ids[positions],
+            'start': pd.to_datetime(self.starts[positions], unit='s'),
+            'conflicts_with': self.show_ids[self.max_end_holders[positions - 1]]
+        })
+
+    def overlaps_with(self, screen_ids, starts, ends):
+        """Vectorized check of new intervals against this index, returning the id of an overlapping show or -1"""
+        screen_ids = np.asarray(screen_ids, dtype=np.int64)
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        result = np.full(len(starts), -1, dtype=np.int64)
+        for screen_id, (first, last) in self.screen_slices.items():
+            rows = np.nonzero(screen_ids == screen_id)[0]
+            if not len(rows):
+                continue
+            # The last show starting before each new end; it overlaps if the running max end reaches past our start
+            before = first + np.searchsorted(self.starts[first:last], ends[rows], side='left') - 1
+            valid = before >= first
+            hit = valid & (self.max_ends[np.maximum(before, first)] > starts[rows])
+            result[rows[hit]] = self.show_ids[self.max_end_holders[before[hit]]]
+        return result
+
+def to_epoch(value):
+    """Convert a datetime (or anything pandas parses) to epoch seconds"""
+    return int(pd.Timestamp(value).to_datetime64().astype('datetime64[s]').astype(np.int64))
+
+def keep_non_overlapping(index):
+    """Pick which shows to keep so no screen is double-booked, earliest show first
+
+    Greedy per screen: keep a show, skip every show starting before it ends,
+    keep the next one. Each step is a binary search, so the cost is
+    O(kept shows x log n) rather than a pass over every pair.
+    Returns a dict of rejected show_id -> show_id it lost to.
+    """
+    rejected = {}
+    for first, last in index.screen_slices.values():
+        starts = index.starts[first:last]
+        position = 0
+        while position < len(starts):
+            kept = first + position
+            following = position + 1 + np.searchsorted(starts[position + 1:], index.ends[kept], side='left')
+            for loser in index.show_ids[kept + 1:first + following].tolist():
+                rejected[loser] = int(index.show_ids[kept])
+            position = following
+    return rejected
+
+def load_existing_shows(connection):
+    """Read every scheduled show from the database"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT show_id, screen_id, show_datetime FROM `Show`")
+    shows = pd.DataFrame(cursor.fetchall(), columns=['show_id', 'screen_id', 'show_datetime'])
+    cursor.close()
+    return shows
+
+def schedule_filter(connection, csv_file, runtime_minutes=DEFAULT_RUNTIME_MINUTES, reject=True):
+    """Validate a shows CSV against itself and the existing schedule before import
+
+    Returns a row filter for import_data(): given a coerced chunk it returns
+    the reject reason of each row, or None to keep it. New shows that overlap
+    a show already in the database are rejected; among the rest the earliest
+    show on a screen wins. With reject=False conflicts are only reported.
+    """
+    columns = ['show_id', 'screen_id', 'show_datetime']
+    if is_parquet(csv_file):
+        shows = pd.read_parquet(csv_file, columns=columns)
+    else:
+        shows = pd.read_csv(csv_file, usecols=columns, dtype=str)
+    shows['show_datetime'] = pd.to_datetime(shows['show_datetime'], format='ISO8601', errors='coerce')
+    shows[['show_id', 'screen_id']] = shows[['show_id', 'screen_id']].apply(pd.to_numeric, errors='coerce')
+    # Rows that don't parse are left for the coercion stage to reject
+    shows = shows.dropna().astype({'show_id': np.int64, 'screen_id': np.int64})
+
+    start = time.perf_counter()
+    checked = len(shows)
+    reasons = {}
+    existing = load_existing_shows(connection) if connection is not None else pd.DataFrame()
+    existing = existing[~existing['show_id'].isin(shows['show_id'])] if not existing.empty else existing
+    if not existing.empty:
+        scheduled = ScheduleIndex.from_frame(existing, runtime_minutes)
+        new_starts = shows['show_datetime'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        clashes = scheduled.overlaps_with(shows['screen_id'], new_starts, new_starts + int(runtime_minutes * 60))
+        for show_id, other in zip(shows['show_id'][clashes >= 0].tolist(), clashes[clashes >= 0].tolist()):
+            reasons[show_id] = f"schedule: overlaps scheduled show {other}"
+        shows = shows[clashes < 0]
+
+    index = ScheduleIndex.from_frame(shows, runtime_minutes)
+    for show_id, winner in keep_non_overlapping(index).items():
+        reasons[show_id] = f"schedule: overlaps show {winner} on the same screen"
+    print(f"{'✅' if not reasons else '⚠️ '} Schedule check: {len(reasons)} of {checked} "
+          f"shows overlap another show ({runtime_minutes} min per show) in {time.perf_counter() - start:.3f}s")
+    if not reasons or not reject:
+        return None
+
+    def row_filter(chunk):
+        return chunk['show_id'].map(reasons)
+    return row_filter
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-screen schedule index: overlap checks and window queries')
+    parser.add_argument('--csv', help='Read shows from a shows.csv file instead of the database')
+    parser.add_argument('--runtime', type=int, default=DEFAULT_RUNTIME_MINUTES, help='Minutes each show occupies its screen')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    check_parser = subparsers.add_parser('check', help='List overlapping shows')
+    check_parser.add_argument('--show', type=int, default=10, help='Conflicts to print')
+    window_parser = subparsers.add_parser('window', help="What's on a screen between two times")
+    window_parser.add_argument('screen_id', type=int)
+    window_parser.add_argument('start')
+    window_parser.add_argument('end')
+    args = parser.parse_args()
+
+    if args.csv:
+        shows = pd.read_csv(args.csv, usecols=['show_id', 'screen_id', 'show_datetime'])
+    else:
+        connection = create_connection()
+        if connection is None:
+            return
+        try:
+            shows = load_existing_shows(connection)
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    index = ScheduleIndex.from_frame(shows, args.runtime)
+    print(f"Indexed {len(index.show_ids)} shows on {len(index.screen_slices)} screens "
+          f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    if args.command == 'check':
+        start = time.perf_counter()
+        conflicts = index.conflicts()
+        rejected = keep_non_overlapping(index)
+        print(f"{len(conflicts)} shows start before an earlier show on their screen has ended "
+              f"({(time.perf_counter() - start) * 1000:.1f}ms); keeping the earliest show of each clash "
+              f"would drop {len(rejected)}")
+        if not conflicts.empty:
+            print(conflicts.head(args.show).to_string(index=False))
+            print("\nConflicts per screen:")
+            print(conflicts.groupby('screen_id').size().to_string())
+    else:
+        start = time.perf_counter()
+        show_ids = index.window(args.screen_id, args.start, args.end)
+        print(f"{len(show_ids)} shows on screen {args.screen_id} between {args.start} and {args.end} "
+              f"({(time.perf_counter() - start) * 1e6:.0f}µs): {show_ids.tolist()}")
+
+if __name__ == "__main__":
+    main()
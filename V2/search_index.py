@@ -0,0 +1,292 @@
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import numpy as np
+import pandas as pd
+from mysql.connector import Error
+
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import create_connection
+
+# Where the index is persisted between runs
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'search_index.npz')
+
+# Tables the index is built from; the importer refreshes it after loading them
+SEARCH_TABLES = ('Movie', 'MovieCast')
+
+# Each token is stored with the field it came from, e.g. "t:secured", "g:comedy", "c:scott"
+FIELD_PREFIXES = {'title': 't:', 'genre': 'g:', 'cast': 'c:'}
+
+TOKEN_PATTERN = r'[^\W_]+'
+TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+SQL_LIKE_SEARCH = """
+    SELECT DISTINCT m.movie_id FROM Movie m LEFT JOIN MovieCast c ON c.movie_id = m.movie_id
+    WHERE m.title LIKE %s OR m.genre LIKE %s OR c.person_name LIKE %s
+"""
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+def token_pairs(movie_ids, texts, field):
+    """Turn (movie_id, text) columns into a DataFrame of unique (token, movie_id) pairs, vectorized"""
+    frame = pd.DataFrame({'movie_id': np.asarray(movie_ids, dtype=np.uint32),
+                          'token': pd.Series(texts, dtype=object).fillna('').astype(str)
+                                     .str.lower().str.findall(TOKEN_PATTERN).to_numpy()})
+    frame = frame.explode('token').dropna(subset=['token'])
+    frame['token'] = FIELD_PREFIXES[field] + frame['token'].astype(str)
+    return frame[['token', 'movie_id']]
+
+class SearchIndex:
+    """Inverted index from title, genre and cast tokens to movie ids
+
+    Tokens are kept in one sorted vocabulary array; the posting lists are
+    slices of a single uint32 array, so every token sharing a prefix maps to
+    one contiguous slice and a prefix lookup is two binary searches.
+    Rows added after the last compaction live in a small pending table that
+    is searched alongside the arrays until compact() merges it in.
+    """
+
+    def __init__(self, vocabulary=None, offsets=None, postings=None, movie_ids=None, titles=None,
+                 last_movie_id=0, last_cast_id=0):
+        self.vocabulary = vocabulary if vocabulary is not None else np.array([], dtype=str)
+        self.offsets = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+        self.postings = postings if postings is not None else np.array([], dtype=np.uint32)
+        self.movie_ids = movie_ids if movie_ids is not None else np.array([], dtype=np.uint32)
+        self.titles = titles if titles is not None else np.array([], dtype=str)
+        self.last_movie_id = int(last_movie_id)
+        self.last_cast_id = int(last_cast_id)
+        self._pending = []
+        self._pending_titles = {}
+
+    def add_movies(self, rows):
+        """Add (movie_id, title, genre) rows"""
+        rows = list(rows)
+        if not rows:
+            return
+        movie_ids, titles, genres = zip(*rows)
+        self._pending.append(token_pairs(movie_ids, titles, 'title'))
+        self._pending.append(token_pairs(movie_ids, genres, 'genre'))
+        self._pending_titles.update(zip(movie_ids, titles))
+        self.last_movie_id = max(self.last_movie_id, max(movie_ids))
+
+    def add_cast(self, rows):
+        """Add (cast_id, movie_id, person_name) rows"""
+        rows = list(rows)
+        if not rows:
+            return
+        cast_ids, movie_ids, names = zip(*rows)
+        self._pending.append(token_pairs(movie_ids, names, 'cast'))
+        self.last_cast_id = max(self.last_cast_id, max(cast_ids))
+
+    def compact(self):
+        """Merge pending rows into the sorted vocabulary and posting arrays"""
+        if not self._pending:
+            return
+        existing = pd.DataFrame({'token': np.repeat(self.vocabulary, np.diff(self.offsets)),
+                                 'movie_id': self.postings})
+        pairs = pd.concat([existing] + self._pending, ignore_index=True).drop_duplicates()
+        pairs = pairs.sort_values(['token', 'movie_id'], kind='stable')
+        tokens = pairs['token'].to_numpy(dtype=str)
+        self.vocabulary, starts = np.unique(tokens, return_index=True)
+        self.offsets = np.append(starts, len(tokens)).astype(np.int64)
+        self.postings = pairs['movie_id'].to_numpy(dtype=np.uint32)
+
+        titles = dict(zip(self.movie_ids.tolist(), self.titles.tolist()))
+        titles.update(self._pending_titles)
+        self.movie_ids = np.array(sorted(titles), dtype=np.uint32)
+        self.titles = np.array([titles[movie_id] for movie_id in self.movie_ids.tolist()], dtype=str)
+        self._pending = []
+        self._pending_titles = {}
+
+    def _prefix_postings(self, prefix):
+        """Movie ids of every token starting with `prefix` (field prefix included)"""
+        low = np.searchsorted(self.vocabulary, prefix, side='left')
+        high = np.searchsorted(self.vocabulary, prefix + '\U0010ffff', side='left')
+        ids = self.postings[self.offsets[low]:self.offsets[high]]
+        for pairs in self._pending:
+            ids = np.concatenate([ids, pairs['movie_id'].to_numpy()[pairs['token'].str.startswith(prefix).to_numpy()]])
+        return ids
+
+    def lookup(self, term):
+        """Movie ids matching one term: 'scott', 'cast:scott' or 'genre:com' (prefix match)"""
+        field, _, word = term.rpartition(':')
+        words = tokenize(word)
+        if not words:
+            return np.array([], dtype=np.uint32)
+        fields = [field] if field in FIELD_PREFIXES else list(FIELD_PREFIXES)
+        result = None
+        # "title:dark knight" style terms require every word
+        for word in words:
+            ids = np.unique(np.concatenate([self._prefix_postings(FIELD_PREFIXES[f] + word) for f in fields]))
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+        return result
+
+    def search(self, query):
+        """Movie ids matching every term of the query, in id order"""
+        result = None
+        for term in query.split():
+            ids = self.lookup(term)
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+            if not len(result):
+                break
+        return result if result is not None else np.array([], dtype=np.uint32)
+
+    def title(self, movie_id):
+        """Title of an indexed movie"""
+        if movie_id in self._pending_titles:
+            return self._pending_titles[movie_id]
+        position = np.searchsorted(self.movie_ids, movie_id)
+        if position < len(self.movie_ids) and self.movie_ids[position] == movie_id:
+            return str(self.titles[position])
+        return None
+
+    def save(self, path=INDEX_FILE):
+        """Write the compacted index to an uncompressed .npz file"""
+        self.compact()
+        temp_path = path + '.part.npz'
+        np.savez(temp_path, vocabulary=self.vocabulary, offsets=self.offsets, postings=self.postings,
+                 movie_ids=self.movie_ids, titles=self.titles,
+                 watermarks=np.array([self.last_movie_id, self.last_cast_id], dtype=np.int64))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        """Load a saved index, or return an empty one if there is none"""
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as data:
+            last_movie_id, last_cast_id = data['watermarks'].tolist()
+            return cls(data['vocabulary'], data['offsets'], data['postings'], data['movie_ids'],
+                       data['titles'], last_movie_id, last_cast_id)
+
+    def stats(self):
+        """Vocabulary size, posting count and array memory in bytes"""
+        return {
+            'tokens': len(self.vocabulary),
+            'postings': len(self.postings),
+            'movies': len(self.movie_ids),
+            'bytes': int(self.vocabulary.nbytes + self.offsets.nbytes + self.postings.nbytes
+                         + self.movie_ids.nbytes + self.titles.nbytes)
+        }
+
+def update_search_index(connection, path=INDEX_FILE):
+    """Add Movie and MovieCast rows above the index watermarks and save it
+
+    With no saved index this builds it from scratch. Only new rows are read,
+    so the importer can call it after every load; edits to existing rows
+    need a rebuild (search_index.py build).
+    """
+    start = time.perf_counter()
+    index = SearchIndex.load(path)
+    cursor = connection.cursor()
+    cursor.execute("SELECT movie_id, title, genre FROM Movie WHERE movie_id > %s ORDER BY movie_id",
+                   (index.last_movie_id,))
+    movies = cursor.fetchall()
+    cursor.execute("SELECT cast_id, movie_id, person_name FROM MovieCast WHERE cast_id > %s ORDER BY cast_id",
+                   (index.last_cast_id,))
+    casts = cursor.fetchall()
+    cursor.close()
+    index.add_movies(movies)
+    index.add_cast(casts)
+    index.save(path)
+    print(f"✅ Search index updated with {len(movies)} movies and {len(casts)} cast rows "
+          f"in {time.perf_counter() - start:.2f}s")
+    return index
+
+def build_from_csv(data_folder, path=INDEX_FILE):
+    """Build the index straight from movies.csv and movie_casts.csv"""
+    movies = pd.read_csv(os.path.join(data_folder, 'movies.csv'), usecols=['movie_id', 'title', 'genre'])
+    casts = pd.read_csv(os.path.join(data_folder, 'movie_casts.csv'), usecols=['cast_id', 'movie_id', 'person_name'])
+    index = SearchIndex()
+    index.add_movies(movies.itertuples(index=False, name=None))
+    index.add_cast(casts.itertuples(index=False, name=None))
+    index.save(path)
+    return index
+
+def benchmark(index, connection=None, queries=1000, seed=42):
+    """Time random prefix queries on the index, and the same queries as SQL LIKE scans"""
+    rng = random.Random(seed)
+    words = [token.split(':', 1)[1] for token in index.vocabulary.tolist()]
+    if not words:
+        print("❌ The index is empty")
+        return
+    terms = [word[:max(3, len(word) - 2)] for word in rng.choices(words, k=queries)]
+
+    start = time.perf_counter()
+    matches = sum(len(index.search(term)) for term in terms)
+    elapsed = time.perf_counter() - start
+    print(f"Index: {queries} queries in {elapsed * 1000:.1f}ms "
+          f"({elapsed / queries * 1e6:.1f}µs/query, {matches} matches)")
+
+    if connection is not None:
+        sql_queries = min(queries, 200)
+        cursor = connection.cursor()
+        start = time.perf_counter()
+        sql_matches = 0
+        for term in terms[:sql_queries]:
+            pattern = f"%{term}%"
+            cursor.execute(SQL_LIKE_SEARCH, (pattern, pattern, pattern))
+            sql_matches += len(cursor.fetchall())
+        sql_elapsed = time.perf_counter() - start
+        cursor.close()
+        print(f"SQL LIKE: {sql_queries} queries in {sql_elapsed * 1000:.1f}ms "
+              f"({sql_elapsed / sql_queries * 1e6:.1f}µs/query, {sql_matches} matches)")
+        print(f"Index is {sql_elapsed / sql_queries / (elapsed / queries):.0f}x faster per query "
+              f"(LIKE '%term%' also matches inside words, so match counts can differ)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Inverted search index over movie titles, genres and cast')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='Rebuild the index from the database or from CSV files')
+    build_parser.add_argument('--from-csv', metavar='FOLDER', help='Read movies.csv and movie_casts.csv instead')
+    search_parser = subparsers.add_parser('search', help="Search, e.g. 'scott comedy' or 'cast:flowers'")
+    search_parser.add_argument('query', nargs='+')
+    bench_parser = subparsers.add_parser('bench', help='Compare index lookups with SQL LIKE queries')
+    bench_parser.add_argument('--queries', '-n', type=int, default=1000)
+    bench_parser.add_argument('--no-sql', action='store_true', help='Only time the index')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        if args.from_csv:
+            index = build_from_csv(args.from_csv)
+        else:
+            if os.path.exists(INDEX_FILE):
+                os.remove(INDEX_FILE)
+            connection = create_connection()
+            if connection is None:
+                return
+            try:
+                index = update_search_index(connection)
+            finally:
+                connection.close()
+        print(f"✅ Built index in {time.perf_counter() - start:.2f}s: {index.stats()}")
+        return
+
+    start = time.perf_counter()
+    index = SearchIndex.load()
+    print(f"Loaded index in {(time.perf_counter() - start) * 1000:.1f}ms: {index.stats()}")
+    if args.command == 'search':
+        start = time.perf_counter()
+        movie_ids = index.search(' '.join(args.query))
+        print(f"{len(movie_ids)} movies in {(time.perf_counter() - start) * 1e6:.0f}µs")
+        for movie_id in movie_ids[:20].tolist():
+            print(f"  {movie_id}: {index.title(movie_id)}")
+    else:
+        connection = None if args.no_sql else create_connection()
+        try:
+            benchmark(index, connection, args.queries)
+        except Error as e:
+            print(f"The error '{e}' occurred")
+        finally:
+            if connection is not None:
+                connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+import os
+import sys
+import time
+import heapq
+import queue
+import random
+import argparse
+import itertools
+import threading
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+from mysql.connector import Error
+
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import get_connection, load_db_config
+from booking_access import (INSERT_BOOKING_SQL, INSERT_TICKET_SQL, INSERT_PAYMENT_SQL, INSERT_POINTS_SQL,
+                            POINTS_PER_UNIT, SeatsUnavailable, claim_seats_sql, summarize_latencies)
+
+class HoldExpired(Exception):
+    """Raised when confirming a hold that expired or was released"""
+
+class SeatHold:
+    """Seats of one show held for one user until `expires_at` (time.monotonic())"""
+
+    __slots__ = ('hold_id', 'show_id', 'seats', 'user_id', 'expires_at', 'confirming')
+
+    def __init__(self, hold_id, show_id, seats, user_id, expires_at):
+        self.hold_id = hold_id
+        self.show_id = show_id
+        self.seats = seats
+        self.user_id = user_id
+        self.expires_at = expires_at
+        self.confirming = False
+
+class SeatHoldManager:
+    """Short-lived seat holds kept in memory, with confirmed bookings written to the database in batches
+
+    Holds are indexed per show (show -> seat -> hold) and expire through a
+    min-heap ordered by expiry time, so holding, releasing and sweeping cost
+    O(k + log n) for k seats and n active holds. No database lock is taken
+    while a customer pays: confirm() queues the booking and a writer thread
+    commits queued bookings together in one short transaction, claiming
+    each booking's seats with a compare-and-set UPDATE.
+    """
+
+    def __init__(self, database=None, hold_seconds=300.0, batch_size=100, flush_interval=0.05):
+        self.database = database
+        self.hold_seconds = hold_seconds
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._holds = {}          # hold_id -> SeatHold
+        self._held = {}           # show_id -> {show_seat_id: hold_id}
+        self._seats = {}          # show_id -> set of all show_seat_ids
+        self._sold = {}           # show_id -> set of sold show_seat_ids
+        self._expiry = []         # heap of (expires_at, hold_id)
+        self._ids = itertools.count(1)
+        self._confirmations = queue.Queue()
+        self._writer = None
+        self._stopping = threading.Event()
+        self.batches = 0
+        self.batch_seconds = 0.0
+        self.expired = 0
+
+    def register_show(self, show_id, seat_ids, sold_ids=()):
+        """Make a show's seats known to the manager"""
+        with self._lock:
+            self._seats[show_id] = set(seat_ids)
+            self._sold[show_id] = set(sold_ids)
+            self._held.setdefault(show_id, {})
+
+    def load_show(self, show_id):
+        """Load a show's seats and their availability from ShowSeat"""
+        connection = get_connection(self.database)
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT show_seat_id, is_available FROM ShowSeat WHERE show_id = %s", (show_id,))
+            rows = cursor.fetchall()
+            cursor.close()
+        finally:
+            connection.close()
+        self.register_show(show_id, [row[0] for row in rows], [row[0] for row in rows if not row[1]])
+
+    def _ensure_show(self, show_id):
+        """Load a show on first use"""
+        if show_id not in self._seats:
+            self.load_show(show_id)
+
+    def _drop(self, hold):
+        """Forget a hold and free its seats (caller holds the lock)"""
+        del self._holds[hold.hold_id]
+        held = self._held[hold.show_id]
+        for seat in hold.seats:
+            if held.get(seat) == hold.hold_id:
+                del held[seat]
+
+    def _sweep(self, now):
+        """Release holds whose time ran out (caller holds the lock)"""
+        while self._expiry and self._expiry[0][0] <= now:
+            _, hold_id = heapq.heappop(self._expiry)
+            hold = self._holds.get(hold_id)
+            # Released and confirming holds stay out of the way; their heap entries are skipped
+            if hold is not None and not hold.confirming:
+                self._drop(hold)
+                self.expired += 1
+
+    def expire(self):
+        """Release every hold that has expired, returning how many were released"""
+        with self._lock:
+            before = self.expired
+            self._sweep(time.monotonic())
+            return self.expired - before
+
+    def available_seats(self, show_id):
+        """Seats of a show that are neither sold nor held, in id order"""
+        self._ensure_show(show_id)
+        with self._lock:
+            self._sweep(time.monotonic())
+            taken = self._sold[show_id].union(self._held[show_id])
+            return sorted(self._seats[show_id] - taken)
+
+    def hold(self, show_id, show_seat_ids, user_id, hold_seconds=None):
+        """Hold seats for a user, returning the hold id; raises SeatsUnavailable if any is taken"""
+        seats = tuple(sorted(set(show_seat_ids)))
+        if not seats:
+            raise ValueError("no seats requested")
+        self._ensure_show(show_id)
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            held, sold, known = self._held[show_id], self._sold[show_id], self._seats[show_id]
+            taken = [seat for seat in seats if seat in held or seat in sold or seat not in known]
+            if taken:
+                raise SeatsUnavailable(f"seats {taken} are not available for show {show_id}")
+            hold = SeatHold(next(self._ids), show_id, seats, user_id,
+                            now + (hold_seconds if hold_seconds is not None else self.hold_seconds))
+            self._holds[hold.hold_id] = hold
+            for seat in seats:
+                held[seat] = hold.hold_id
+            heapq.heappush(self._expiry, (hold.expires_at, hold.hold_id))
+            return hold.hold_id
+
+    def release(self, hold_id):
+        """Give up a hold (e.g. the customer left checkout); returns False if it was already gone"""
+        with self._lock:
+            hold = self._holds.get(hold_id)
+            if hold is None or hold.confirming:
+                return False
+            self._drop(hold)
+            return True
+
+    def confirm(self, hold_id, gateway_id, price_per_seat, delivery_method='App'):
+        """Queue a paid hold for writing, returning a Future that resolves to the booking_id
+
+        Raises HoldExpired if the hold is gone. The Future raises
+        SeatsUnavailable if another writer sold the seats in the meantime.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            hold = self._holds.get(hold_id)
+            if hold is None or hold.confirming:
+                raise HoldExpired(f"hold {hold_id} expired or was already confirmed")
+            # A confirming hold no longer expires
+            hold.confirming = True
+        future = Future()
+        self._confirmations.put((hold, gateway_id, price_per_seat, delivery_method, future))
+        self._start_writer()
+        return future
+
+    def _start_writer(self):
+        """Start the batch writer thread on first use"""
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="seat-hold-writer", daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self):
+        """Collect confirmations for up to `flush_interval` seconds and write them as one batch"""
+        while not (self._stopping.is_set() and self._confirmations.empty()):
+            try:
+                batch = [self._confirmations.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                self.expire()
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._confirmations.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        """Write a batch of confirmed holds in one transaction and settle their futures"""
+        start = time.perf_counter()
+        now = datetime.now().replace(microsecond=0)
+        outcomes = []
+        try:
+            connection = get_connection(self.database)
+        except Error as e:
+            outcomes = [(hold, future, e) for hold, _, _, _, future in batch]
+        else:
+            cursor = connection.cursor()
+            try:
+                connection.start_transaction(isolation_level='READ COMMITTED')
+                tickets, payments, points = [], [], []
+                for hold, gateway_id, price_per_seat, delivery_method, future in batch:
+                    # A savepoint per booking undoes a partial claim without failing the batch
+                    cursor.execute("SAVEPOINT seat_hold")
+                    cursor.execute(claim_seats_sql(len(hold.seats)), hold.seats)
+                    if cursor.rowcount != len(hold.seats):
+                        cursor.execute("ROLLBACK TO SAVEPOINT seat_hold")
+                        outcomes.append((hold, future, SeatsUnavailable(
+                            f"seats of hold {hold.hold_id} were sold by another writer")))
+                        continue
+                    total_cost = round(price_per_seat * len(hold.seats), 2)
+                    cursor.execute(INSERT_BOOKING_SQL, (hold.user_id, hold.show_id, now, total_cost))
+                    booking_id = cursor.lastrowid
+                    tickets.extend((booking_id, seat, f"TICKET-{booking_id}-{random.randint(1000, 9999)}",
+                                    delivery_method) for seat in hold.seats)
+                    payments.append((booking_id, gateway_id, total_cost, now))
+                    points.append((hold.user_id, total_cost, int(total_cost * POINTS_PER_UNIT), now))
+                    outcomes.append((hold, future, booking_id))
+                for sql, rows in ((INSERT_TICKET_SQL, tickets), (INSERT_PAYMENT_SQL, payments),
+                                  (INSERT_POINTS_SQL, points)):
+                    if rows:
+                        cursor.executemany(sql, rows)
+                connection.commit()
+            except Error as e:
+                connection.rollback()
+                outcomes = [(hold, future, e) for hold, _, _, _, future in batch]
+            finally:
+                cursor.close()
+                connection.close()
+        self.batches += 1
+        self.batch_seconds += time.perf_counter() - start
+
+        stale_shows = set()
+        with self._lock:
+            for hold, _, result in outcomes:
+                self._drop(hold)
+                if not isinstance(result, Exception):
+                    self._sold[hold.show_id].update(hold.seats)
+                elif isinstance(result, SeatsUnavailable):
+                    stale_shows.add(hold.show_id)
+        for _, future, result in outcomes:
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        # Another writer sold seats of these shows: pick up what it sold
+        for show_id in stale_shows:
+            try:
+                self.load_show(show_id)
+            except Error as e:
+                print(f"❌ Could not reload seats of show {show_id}: {e}")
+
+    def close(self):
+        """Write every queued confirmation and stop the writer thread"""
+        self._stopping.set()
+        if self._writer is not None:
+            self._writer.join()
+
+    def stats(self):
+        """Active holds, expired holds and batch write counters"""
+        return {
+            'active_holds': len(self._holds),
+            'expired': self.expired,
+            'batches': self.batches,
+            'avg_batch_ms': self.batch_seconds / self.batches * 1000 if self.batches else 0.0
+        }
+
+def bench_memory(shows=100, seats_per_show=500, operations=200000, seed=42):
+    """Measure hold, release and expiry throughput without a database"""
+    rng = random.Random(seed)
+    manager = SeatHoldManager(hold_seconds=0.5)
+    for show_id in range(1, shows + 1):
+        manager.register_show(show_id, range(show_id * 10000, show_id * 10000 + seats_per_show))
+    holds, failed = [], 0
+    start = time.perf_counter()
+    for i in range(operations):
+        if holds and rng.random() < 0.4:
+            manager.release(holds.pop(rng.randrange(len(holds))))
+            continue
+        show_id = rng.randint(1, shows)
+        first = show_id * 10000 + rng.randrange(seats_per_show - 1)
+        try:
+            holds.append(manager.hold(show_id, (first, first + 1), user_id=i))
+        except SeatsUnavailable:
+            failed += 1
+    elapsed = time.perf_counter() - start
+    print(f"{operations} hold/release operations in {elapsed:.2f}s ({operations / elapsed:,.0f} ops/s), "
+          f"{failed} holds refused, {manager.stats()['active_holds']} active")
+    time.sleep(0.5)
+    start = time.perf_counter()
+    expired = manager.expire()
+    print(f"Expired {expired} holds in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+def simulate_checkouts(database, customers, payment_ms, seats=2, batch_size=100, seed=42):
+    """Run concurrent checkouts (hold, pay, confirm) and compare DB time per booking with payment time"""
+    manager = SeatHoldManager(database, batch_size=batch_size)
+    connection = get_connection(database)
+    cursor = connection.cursor()
+    cursor.execute("SELECT show_id FROM `Show` ORDER BY show_id")
+    show_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT user_id FROM User LIMIT 1000")
+    user_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT gateway_id FROM PaymentGateway")
+    gateway_ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    connection.close()
+    if not show_ids or not user_ids or not gateway_ids:
+        print("❌ No shows, users or gateways found, import data (or run booking_load_test.py --setup) first")
+        return
+
+    def checkout(customer):
+        rng = random.Random(seed * 1000 + customer)
+        start = time.perf_counter()
+        for _ in range(5):
+            show_id = rng.choice(show_ids)
+            free = manager.available_seats(show_id)
+            if len(free) < seats:
+                continue
+            try:
+                hold_id = manager.hold(show_id, rng.sample(free[:seats * 4], seats), rng.choice(user_ids))
+            except SeatsUnavailable:
+                continue
+            # The customer pays while only the in-memory hold protects the seats
+            time.sleep(payment_ms / 1000)
+            try:
+                manager.confirm(hold_id, rng.choice(gateway_ids), 250).result()
+                return time.perf_counter() - start
+            except SeatsUnavailable:
+                continue
+        return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(customers, 64)) as executor:
+        results = list(executor.map(checkout, range(customers)))
+    manager.close()
+    elapsed = time.perf_counter() - start
+    latencies = [result for result in results if result is not None]
+    stats = manager.stats()
+    print(f"\n{len(latencies)}/{customers} checkouts booked in {elapsed:.2f}s")
+    summarize_latencies('checkout', latencies)
+    if latencies:
+        print(f"  {stats['batches']} write batches, {stats['avg_batch_ms']:.1f}ms each; DB transaction time per "
+              f"booking {stats['avg_batch_ms'] * stats['batches'] / len(latencies):.2f}ms vs {payment_ms:.0f}ms payment")
+
+def main():
+    parser = argparse.ArgumentParser(description='In-memory seat holds with batched booking writes')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    bench_parser = subparsers.add_parser('bench', help='Measure in-memory hold, release and expiry throughput')
+    bench_parser.add_argument('--operations', '-n', type=int, default=200000)
+    simulate_parser = subparsers.add_parser('simulate', help='Run concurrent checkouts against a database')
+    simulate_parser.add_argument('--database', default=f"{load_db_config()['database']}_loadtest",
+                                 help='Database to book in (bookings are committed)')
+    simulate_parser.add_argument('--customers', '-c', type=int, default=500)
+    simulate_parser.add_argument('--payment-ms', type=float, default=200.0, help='Simulated payment time')
+    simulate_parser.add_argument('--batch-size', type=int, default=100, help='Bookings written per transaction')
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        bench_memory(operations=args.operations)
+    else:
+        try:
+            simulate_checkouts(args.database, args.customers, args.payment_ms, batch_size=args.batch_size)
+        except Error as e:
+            print(f"The error '{e}' occurred")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from mysql.connector import Error
+from tqdm import tqdm
+
+from export_data import export_database, MANIFEST_FILE
+from post_load import analyze_tables
+
+# The shared connection layer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import get_connection, open_connection, load_db_config
+from batch_insert import PacketBatchInserter
+
+# Table definitions and row counts of a snapshot, next to one Parquet file per table
+SNAPSHOT_FILE = 'snapshot.json'
+
+# Rows read from Parquet and committed at a time on restore
+RESTORE_CHUNK_SIZE = 50000
+
+def list_base_tables(connection):
+    """Every base table of the connection's database, with its CREATE TABLE statement"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT TABLE_NAME FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+        ORDER BY TABLE_NAME
+    """)
+    tables = [row[0] for row in cursor.fetchall()]
+    definitions = {}
+    for table in tables:
+        cursor.execute(f"SHOW CREATE TABLE `{table}`")
+        definitions[table] = cursor.fetchone()[1]
+    cursor.close()
+    return definitions
+
+def take_snapshot(database, snapshot_dir, jobs=4, chunk_size=10000):
+    """Dump every table of a database to zstd-compressed Parquet, several tables at a time
+
+    The CREATE TABLE statements are kept in snapshot.json so a restore
+    recreates the tables exactly, indexes, foreign keys and AUTO_INCREMENT
+    counters included. Tables are dumped on separate connections, so write
+    nothing to the database while the snapshot runs. Returns True on success.
+    """
+    started = time.perf_counter()
+    connection = get_connection(database)
+    try:
+        definitions = list_base_tables(connection)
+    finally:
+        connection.close()
+    if not definitions:
+        print(f"❌ Database '{database}' has no tables to snapshot")
+        return False
+
+    # Dump into a fresh folder and swap it in at the end, so a failed run leaves the old snapshot intact
+    work_dir = snapshot_dir.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(work_dir, ignore_errors=True)
+    # Workers open their own connections rather than waiting on the pool when jobs exceeds its size
+    failed = export_database(lambda: open_connection(database), list(definitions), work_dir,
+                             export_format='parquet', jobs=jobs, chunk_size=chunk_size)
+    if failed:
+        print(f"❌ Snapshot failed for {', '.join(failed)}; '{snapshot_dir}' was left as it was")
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return False
+
+    with open(os.path.join(work_dir, MANIFEST_FILE)) as f:
+        exported = json.load(f)
+    os.remove(os.path.join(work_dir, MANIFEST_FILE))
+    snapshot = {
+        'database': database,
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'tables': {table: {'file': exported[table]['file'], 'rows': exported[table]['rows'],
+                           'create_table': definitions[table]}
+                   for table in definitions}
+    }
+    with open(os.path.join(work_dir, SNAPSHOT_FILE), 'w') as f:
+        json.dump(snapshot, f, indent=2, sort_keys=True)
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    os.replace(work_dir, snapshot_dir)
+
+    size = sum(os.path.getsize(os.path.join(snapshot_dir, name)) for name in os.listdir(snapshot_dir))
+    rows = sum(table['rows'] for table in snapshot['tables'].values())
+    print(f"✅ Snapshot of {len(definitions)} tables ({rows} rows, {size / 1024 / 1024:.1f} MB) "
+          f"written to '{snapshot_dir}' in {time.perf_counter() - started:.1f}s")
+    return True
+
+def recreate_tables(database, snapshot):
+    """Drop the snapshot's tables and create them again, empty, from their saved definitions"""
+    connection = get_connection(database)
+    cursor = connection.cursor()
+    try:
+        # Tables reference each other; with checks off they can be dropped and created in any order
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        for table, entry in snapshot['tables'].items():
+            cursor.execute(f"DROP TABLE IF EXISTS `{table}`")
+            cursor.execute(entry['create_table'])
+    finally:
+        cursor.execute("SET SESSION foreign_key_checks = 1")
+        cursor.close()
+        connection.close()
+
+def restore_table(database, table, path, chunk_size=RESTORE_CHUNK_SIZE):
+    """Load one table from its Parquet file with packet-sized multi-row INSERTs, returning the row count
+
+    Foreign key and unique checks are off for the session: the rows were
+    consistent when they were dumped, and other tables load at the same time.
+    Each table gets its own connection outside the pool, so any number of
+    jobs can run at once.
+    """
+    import pyarrow.parquet as pq
+
+    connection = open_connection(database)
+    cursor = connection.cursor()
+    batcher = None
+    rows = 0
+    try:
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        cursor.execute("SET SESSION unique_checks = 0")
+        parquet = pq.ParquetFile(path)
+        batcher = PacketBatchInserter(connection, table, parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=chunk_size):
+            # Integer columns with NULLs stay Python ints instead of becoming floats
+            batcher.insert(batch.to_pandas(integer_object_nulls=True, date_as_object=True))
+            batcher.flush()
+            connection.commit()
+            rows += batch.num_rows
+    finally:
+        if batcher is not None:
+            batcher.close()
+        cursor.execute("SET SESSION unique_checks = 1")
+        cursor.execute("SET SESSION foreign_key_checks = 1")
+        cursor.close()
+        connection.close()
+    return rows
+
+def restore_snapshot(database, snapshot_dir, jobs=4, analyze=True):
+    """Replace the snapshot's tables in a database with the snapshot's contents, several tables at a time
+
+    Tables that are not in the snapshot are left alone. Returns True when
+    every table was restored with the expected number of rows.
+    """
+    try:
+        with open(os.path.join(snapshot_dir, SNAPSHOT_FILE)) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ No usable snapshot in '{snapshot_dir}': {e}")
+        return False
+
+    started = time.perf_counter()
+    print(f"Restoring {len(snapshot['tables'])} tables of the {snapshot['created_at']} snapshot "
+          f"of '{snapshot['database']}' into '{database}'")
+    recreate_tables(database, snapshot)
+
+    restored = []
+    failed = []
+    # Biggest tables first, so they don't start last and hold up the end
+    tables = sorted(snapshot['tables'], key=lambda table: -snapshot['tables'][table]['rows'])
+    with tqdm(total=len(tables), desc="Restoring tables") as pbar:
+        with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="restore") as executor:
+            futures = {executor.submit(restore_table, database, table,
+                                       os.path.join(snapshot_dir, snapshot['tables'][table]['file'])): table
+                       for table in tables if snapshot['tables'][table]['rows']}
+            for future in as_completed(futures):
+                table = futures[future]
+                expected = snapshot['tables'][table]['rows']
+                try:
+                    rows = future.result()
+                    if rows == expected:
+                        restored.append(table)
+                    else:
+                        print(f"❌ {table}: restored {rows} of {expected} rows")
+                        failed.append(table)
+                except (Error, OSError) as e:
+                    print(f"❌ Error restoring {table}: {e}")
+                    failed.append(table)
+                pbar.update(1)
+            pbar.update(len(tables) - len(futures))
+
+    if analyze and restored:
+        analyze_tables(database, restored)
+    rows = sum(snapshot['tables'][table]['rows'] for table in tables if table not in failed)
+    if failed:
+        print(f"\n❌ {len(failed)} tables failed: {', '.join(failed)}")
+        return False
+    print(f"\n✅ Restored {len(tables)} tables ({rows} rows) in {time.perf_counter() - started:.1f}s")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Snapshot a loaded database to Parquet and restore it in seconds')
+    parser.add_argument('command', choices=['snapshot', 'restore'])
+    parser.add_argument('--dir', default='snapshot', help='Snapshot folder')
+    parser.add_argument('--database', help='Database to snapshot or restore into (default: the configured one)')
+    parser.add_argument('--jobs', '-j', type=int, default=4, help='Tables dumped or restored in parallel')
+    parser.add_argument('--skip-analyze', action='store_true', help="Don't run ANALYZE TABLE after a restore")
+    args = parser.parse_args()
+
+    database = args.database or load_db_config()['database']
+    if args.command == 'snapshot':
+        take_snapshot(database, args.dir, jobs=args.jobs)
+    else:
+        restore_snapshot(database, args.dir, jobs=args.jobs, analyze=not args.skip_analyze)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+# The shared CSV helpers live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from csv_source import csv_stem, estimate_csv_size, is_parquet, read_parquet
+
+# Tables whose user_id references must follow a merged user
+DEPENDENT_TABLES = ('Membership', 'Booking', 'PointsTransaction')
+
+# Users CSV bytes per on-disk hash partition; one partition is in memory at a time
+PARTITION_BYTES = 256 * 1024 * 1024
+
+CHUNK_SIZE = 500000
+
+# Providers that ignore dots in the local part of an address
+DOTLESS_DOMAINS = {'gmail.com': 'gmail.com', 'googlemail.com': 'gmail.com'}
+
+def normalize_emails(emails):
+    """Lowercase, trim and drop +tags (and Gmail dots) so one mailbox has one spelling"""
+    emails = emails.astype('string').str.strip().str.lower()
+    parts = emails.str.extract(r'^([^@\s]+)@([^@\s]+)$')
+    local = parts[0].str.replace(r'\+.*$', '', regex=True)
+    dotless = parts[1].isin(list(DOTLESS_DOMAINS))
+    local = local.mask(dotless, local.str.replace('.', '', regex=False))
+    domain = parts[1].replace(DOTLESS_DOMAINS)
+    normalized = (local + '@' + domain).where(parts[0].notna(), emails)
+    return normalized.mask(normalized == '')
+
+def normalize_phones(phones):
+    """Keep the last 10 digits, dropping country codes, spaces and punctuation"""
+    digits = phones.astype('string').str.replace(r'\D', '', regex=True).str[-10:]
+    return digits.mask(digits.str.len() < 7)
+
+def open_chunks(path, chunk_size, as_text=False, **read_csv_args):
+    """Chunked reader over a CSV or Parquet file, for use in a with statement
+
+    Parquet chunks are text when as_text is set (like dtype=str), and keep
+    their column types otherwise.
+    """
+    if is_parquet(path):
+        return contextlib.closing(read_parquet(path, chunk_size, as_text=as_text))
+    return pd.read_csv(path, chunksize=chunk_size, **read_csv_args)
+
+def identity_keys(users):
+    """One identity key per user: the normalized email, or the phone when there is no email"""
+    emails = normalize_emails(users['email']) if 'email' in users else pd.Series(pd.NA, index=users.index, dtype='string')
+    phones = normalize_phones(users['phone']) if 'phone' in users else pd.Series(pd.NA, index=users.index, dtype='string')
+    # Users with neither are never duplicates of anyone
+    return ('e:' + emails).fillna('p:' + phones)
+
+def partition_users(user_files, work_dir, chunk_size=CHUNK_SIZE):
+    """Hash every user's identity key and append (user_id, key) to one of N partition files
+
+    Equal keys always hash to the same partition, so each partition can be
+    deduplicated on its own. Returns the partition file paths.
+    """
+    total_bytes = sum(estimate_csv_size(path) for path in user_files)
+    partitions = max(1, -(-total_bytes // PARTITION_BYTES))
+    paths = [os.path.join(work_dir, f"users_{i:04d}.csv") for i in range(partitions)]
+    for path in paths:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('user_id,key\n')
+
+    for user_file in user_files:
+        reader = open_chunks(user_file, chunk_size, as_text=True, dtype=str, keep_default_na=False, na_values=[''],
+                             usecols=lambda column: column in ('user_id', 'email', 'phone'))
+        with reader as chunks:
+            for chunk in tqdm(chunks, desc=f"Hashing {os.path.basename(user_file)}", unit='chunks'):
+                keys = identity_keys(chunk)
+                frame = pd.DataFrame({'user_id': pd.to_numeric(chunk['user_id'], errors='coerce'), 'key': keys})
+                frame = frame.dropna()
+                if frame.empty:
+                    continue
+                buckets = pd.util.hash_array(frame['key'].to_numpy(dtype=object)) % np.uint64(partitions)
+                for bucket, rows in frame.groupby(buckets):
+                    rows.to_csv(paths[int(bucket)], mode='a', header=False, index=False)
+    return paths
+
+def find_duplicates(partition_paths):
+    """Map every duplicate user_id to the lowest user_id sharing its key, one partition at a time"""
+    found = []
+    for path in tqdm(partition_paths, desc="Deduplicating partitions", unit='partitions'):
+        users = pd.read_csv(path, dtype={'user_id': np.int64, 'key': str})
+        canonical = users.groupby('key')['user_id'].transform('min')
+        duplicate = users['user_id'] != canonical
+        if duplicate.any():
+            found.append(pd.DataFrame({'user_id': users['user_id'][duplicate],
+                                       'canonical_id': canonical[duplicate],
+                                       'key': users['key'][duplicate]}))
+    if not found:
+        return pd.DataFrame({'user_id': pd.Series(dtype=np.int64), 'canonical_id': pd.Series(dtype=np.int64),
+                             'key': pd.Series(dtype=str)})
+    return pd.concat(found, ignore_index=True).drop_duplicates('user_id').sort_values('user_id', ignore_index=True)
+
+def rewrite_user_ids(src, dst, id_map, drop_duplicates=False, chunk_size=CHUNK_SIZE):
+    """Stream a CSV to dst, pointing user_id at canonical users (or dropping duplicate users)"""
+    mapping = pd.Series(id_map['canonical_id'].to_numpy(), index=id_map['user_id'].to_numpy())
+    header = True
+    rewritten = 0
+    with open_chunks(src, chunk_size, as_text=True, dtype=str, keep_default_na=False) as reader:
+        for chunk in reader:
+            user_ids = pd.to_numeric(chunk['user_id'], errors='coerce')
+            duplicate = user_ids.isin(mapping.index)
+            if drop_duplicates:
+                chunk = chunk[~duplicate]
+            elif duplicate.any():
+                chunk.loc[duplicate, 'user_id'] = user_ids[duplicate].map(mapping).astype(np.int64).astype(str)
+            rewritten += int(duplicate.sum())
+            chunk.to_csv(dst, mode='w' if header else 'a', header=header, index=False)
+            header = False
+    return rewritten
+
+def merge_memberships(src, dst, id_map, chunk_size=CHUNK_SIZE):
+    """Rewrite memberships so each merged user keeps one membership holding the summed points
+
+    Rows of users that are not involved in a merge stream straight through;
+    only the merged users' rows are held and combined at the end.
+    """
+    mapping = pd.Series(id_map['canonical_id'].to_numpy(), index=id_map['user_id'].to_numpy())
+    involved = set(mapping.index) | set(mapping.to_numpy().tolist())
+    held = []
+    header = True
+    with open_chunks(src, chunk_size) as reader:
+        for chunk in reader:
+            merged = chunk['user_id'].isin(involved)
+            held.append(chunk[merged])
+            chunk[~merged].to_csv(dst, mode='w' if header else 'a', header=header, index=False)
+            header = False
+    held = pd.concat(held, ignore_index=True) if held else pd.DataFrame()
+    if held.empty:
+        return 0
+    held['user_id'] = held['user_id'].map(mapping).fillna(held['user_id']).astype(np.int64)
+    combined = held.sort_values('membership_id').groupby('user_id', as_index=False).agg(
+        {column: ('sum' if column == 'current_points' else 'first') for column in held.columns if column != 'user_id'})
+    combined[list(held.columns)].to_csv(dst, mode='a', header=header, index=False)
+    return len(held) - len(combined)
+
+def deduplicate_users(csv_by_table, mode='report', reject_dir=None, work_dir=None):
+    """Find duplicate users before import and optionally merge them
+
+    mode='report' only lists duplicates. mode='merge' writes deduplicated
+    copies of the user files and of every membership, booking and points
+    file (user_id pointed at the surviving user) into work_dir and returns a
+    new csv_by_table that imports those copies. Duplicates are written to
+    <reject_dir>/users.duplicates.csv.
+    """
+    user_files = csv_by_table.get('User')
+    if not user_files:
+        return csv_by_table
+    start = time.perf_counter()
+    partition_dir = tempfile.mkdtemp(prefix='srm_user_partitions_')
+    try:
+        id_map = find_duplicates(partition_users(user_files, partition_dir))
+    finally:
+        shutil.rmtree(partition_dir, ignore_errors=True)
+
+    if id_map.empty:
+        print(f"✅ No duplicate users found ({time.perf_counter() - start:.1f}s)")
+        return csv_by_table
+    print(f"⚠️  {len(id_map)} duplicate users found (same normalized email, or phone when there is no email)")
+    if reject_dir:
+        os.makedirs(reject_dir, exist_ok=True)
+        report_path = os.path.join(reject_dir, 'users.duplicates.csv')
+        id_map.to_csv(report_path, index=False)
+        print(f"  Listed in {report_path}")
+    print(id_map.head(10).to_string(index=False))
+    if mode != 'merge':
+        return csv_by_table
+
+    os.makedirs(work_dir, exist_ok=True)
+    rewritten = dict(csv_by_table)
+    for table in ('User',) + DEPENDENT_TABLES:
+        new_files = []
+        for src in csv_by_table.get(table, []):
+            # Rewritten copies are plain CSV even when the source is compressed or Parquet
+            dst = os.path.join(work_dir, csv_stem(src) + '.csv')
+            if table == 'User':
+                count = rewrite_user_ids(src, dst, id_map, drop_duplicates=True)
+                print(f"  {os.path.basename(src)}: dropped {count} duplicate users")
+            elif table == 'Membership':
+                count = merge_memberships(src, dst, id_map)
+                print(f"  {os.path.basename(src)}: merged {count} memberships into their user's surviving one")
+            else:
+                count = rewrite_user_ids(src, dst, id_map)
+                print(f"  {os.path.basename(src)}: repointed {count} rows to the surviving user")
+            new_files.append(dst)
+        if new_files:
+            rewritten[table] = new_files
+    print(f"✅ Merged {len(id_map)} duplicate users in {time.perf_counter() - start:.1f}s")
+    return rewritten
+
+def main():
+    # The importer's file discovery decides which CSVs belong to which table
+    from import_data import find_csv_files, group_csv_by_table
+    from coercion import DEFAULT_REJECT_DIR
+
+    parser = argparse.ArgumentParser(description='Find and merge duplicate users in a dataset before import')
+    parser.add_argument('--dataset', '-d', default='dataset', help='Path to dataset folder')
+    parser.add_argument('--merge', metavar='OUTPUT_DIR',
+                        help='Write deduplicated users, memberships, bookings and points files here')
+    parser.add_argument('--reject-dir', default=DEFAULT_REJECT_DIR, help='Where users.duplicates.csv is written')
+    args = parser.parse_args()
+
+    _, csv_files = find_csv_files(args.dataset)
+    if not csv_files:
+        print(f"❌ No CSV files found in {args.dataset}")
+        return
+    deduplicate_users(group_csv_by_table(csv_files), 'merge' if args.merge else 'report',
+                      args.reject_dir, args.merge)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Multi-row INSERTs packed to the server's max_allowed_packet, for the V1 and V2 importers.
+
+Each INSERT carries as many rows as fit in one packet, judged from the
+measured size of the widest row seen so far, and is sent over the binary
+protocol as a prepared statement (on the C extension when it is installed)
+that is reused for every full batch. Wide rows such as review text get
+fewer rows per statement instead of a packet error; narrow rows get more
+rows per round trip.
+"""
+import numpy as np
+import pandas as pd
+
+# Bytes left free in each packet for the COM_STMT_EXECUTE header
+PACKET_HEADROOM = 1024
+
+# A prepared statement takes at most this many placeholders
+MAX_PREPARED_PARAMS = 65535
+
+# Binary-protocol size of a non-NULL number, and of a DATETIME with microseconds and its length byte
+NUMBER_BYTES = 8
+DATETIME_BYTES = 12
+
+# Every parameter sends 2 type bytes
+PARAM_TYPE_BYTES = 2
+
+def get_max_allowed_packet(connection):
+    """Read the session's max_allowed_packet from the server"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT @@max_allowed_packet")
+    value = int(cursor.fetchone()[0])
+    cursor.close()
+    return value
+
+def row_bytes(df):
+    """Upper bound of each row's size in an execute packet, computed per column"""
+    sizes = np.full(len(df), len(df.columns) * PARAM_TYPE_BYTES + (len(df.columns) + 7) // 8, dtype=np.int64)
+    for column in df.columns:
+        values = df[column]
+        present = values.notna().to_numpy()
+        if pd.api.types.is_datetime64_any_dtype(values):
+            sizes += np.where(present, DATETIME_BYTES, 0)
+        elif pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            sizes += np.where(present, NUMBER_BYTES, 0)
+        else:
+            # Text (and dates held as objects, which are never longer than their text) with its length prefix
+            encoded = values.astype('string').str.encode('utf-8').str.len().fillna(0).to_numpy(dtype=np.int64)
+            prefix = np.select([encoded < 251, encoded < 2 ** 16, encoded < 2 ** 24], [1, 3, 4], 9)
+            sizes += np.where(present, encoded + prefix, 0)
+    return sizes
+
+def to_params(df):
+    """Rows as a 2-D object array of Python values, with None for every missing value"""
+    if df.empty:
+        return np.empty((len(df), len(df.columns)), dtype=object)
+    columns = []
+    for column in df.columns:
+        values = df[column].astype(object)
+        columns.append(values.where(values.notna(), None).to_numpy(dtype=object))
+    return np.column_stack(columns)
+
+class PacketBatchInserter:
+    """Inserts DataFrames into one table with prepared multi-row INSERTs that fill max_allowed_packet
+
+    Rows are buffered until a full statement's worth is waiting, so every
+    statement but the last one of a flush() reuses the same prepared
+    statement. The rows per statement only shrink, when a wider row than any
+    before arrives, which keeps every statement inside the packet limit.
+    Nothing is committed here; that is up to the caller.
+    """
+
+    def __init__(self, connection, table_name, columns, max_allowed_packet=None):
+        self.connection = connection
+        self.table_name = table_name
+        self.columns = list(columns)
+        if max_allowed_packet is None:
+            max_allowed_packet = get_max_allowed_packet(connection)
+        self.packet_limit = max_allowed_packet - PACKET_HEADROOM
+        self.max_row_bytes = 0
+        self.rows_per_statement = 0
+        self.statements = 0
+        self.rows = 0
+        self._cursors = {}
+        self._buffer = []
+        self._buffered = 0
+
+    def insert_sql(self, rows):
+        """INSERT for a number of rows, with %s placeholders for the prepared cursor"""
+        row = '(' + ', '.join(['%s'] * len(self.columns)) + ')'
+        columns = ', '.join(f"`{column}`" for column in self.columns)
+        return f"INSERT INTO `{self.table_name}` ({columns}) VALUES " + ', '.join([row] * rows)
+
+    def insert(self, df):
+        """Queue a DataFrame's rows, sending every full statement's worth"""
+        if df.empty:
+            return
+        df = df[self.columns]
+        widest = int(row_bytes(df).max())
+        if widest > self.packet_limit:
+            raise ValueError(f"A row of about {widest} bytes doesn't fit in max_allowed_packet "
+                             f"({self.packet_limit + PACKET_HEADROOM} bytes) for {self.table_name}")
+        if widest > self.max_row_bytes:
+            self.max_row_bytes = widest
+            # The statement text is a packet of its own when it is prepared
+            placeholder_bytes = 3 * len(self.columns) + 2
+            self.rows_per_statement = max(1, min(self.packet_limit // widest,
+                                                 self.packet_limit // placeholder_bytes,
+                                                 MAX_PREPARED_PARAMS // len(self.columns)))
+        self._buffer.append(to_params(df))
+        self._buffered += len(df)
+        if self._buffered >= self.rows_per_statement:
+            rows = np.concatenate(self._buffer)
+            full = len(rows) - len(rows) % self.rows_per_statement
+            for start in range(0, full, self.rows_per_statement):
+                self._execute(rows[start:start + self.rows_per_statement])
+            self._buffer = [rows[full:]]
+            self._buffered = len(rows) - full
+
+    def flush(self):
+        """Send the buffered rows as one final, shorter statement"""
+        if self._buffered:
+            rows = np.concatenate(self._buffer)
+            self._execute(rows)
+            # A leftover size is rarely seen again; don't keep its statement prepared
+            if len(rows) != self.rows_per_statement:
+                self._cursors.pop(len(rows)).close()
+        self._buffer = []
+        self._buffered = 0
+
+    def _execute(self, rows):
+        """Run the prepared INSERT for this many rows"""
+        cursor = self._cursors.get(len(rows))
+        if cursor is None:
+            cursor = self.connection.cursor(prepared=True)
+            self._cursors[len(rows)] = cursor
+        cursor.execute(self.insert_sql(len(rows)), rows.ravel().tolist())
+        self.statements += 1
+        self.rows += len(rows)
+
+    def close(self):
+        """Drop unsent rows and release the prepared statements"""
+        self._buffer = []
+        self._buffered = 0
+        for cursor in self._cursors.values():
+            cursor.close()
+        self._cursors.clear()
@@ -0,0 +1,168 @@
+"""Adaptive rows-per-insert for the V1 and V2 importers.
+
+The best batch size depends on the table: a 2-column PaymentGateway row and
+an 11-column Payment row cost very different amounts to insert, and so do
+tables with many indexes. ChunkSizeController measures how long each insert
+takes and hill-climbs toward the size with the most rows per second, while
+keeping every insert under a latency ceiling. Rechunker cuts the parsed rows
+into batches of whatever size the controller currently asks for.
+"""
+import math
+from collections import Counter
+import pandas as pd
+
+# MySQL errors that call for smaller batches
+LOCK_ERRNOS = {1205, 1213}     # lock wait timeout, deadlock
+PACKET_ERRNOS = {1153, 2020}   # packet bigger than max_allowed_packet (server, client)
+
+# The search starts by doubling and narrows to this step around the best size
+COARSE_STEP = 2.0
+FINE_STEP = 1.25
+
+# The best rate seen fades a little every measurement, so the search keeps following the table as it grows
+BEST_RATE_DECAY = 0.97
+
+def error_kind(error):
+    """'lock' or 'packet' for errors smaller batches can avoid, otherwise None"""
+    errno = getattr(getattr(error, 'orig', None), 'errno', None) or getattr(error, 'errno', None)
+    if errno in LOCK_ERRNOS:
+        return 'lock'
+    if errno in PACKET_ERRNOS:
+        return 'packet'
+    return None
+
+class ChunkSizeController:
+    """Picks the rows per insert for one table from measured latency and throughput
+
+    Every `samples` inserts at one size make a measurement. While rows/s
+    improves the size keeps moving the same way (doubling at first); once
+    it gets worse the search turns back from the best size with a finer
+    step. An insert slower than `latency_ceiling` seconds caps the size at
+    what should fit under the ceiling, and lock waits or packet errors halve
+    it and lower the cap.
+    """
+
+    def __init__(self, table_name, initial=1000, minimum=100, maximum=200000, latency_ceiling=2.0, samples=2):
+        self.table_name = table_name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_ceiling = latency_ceiling
+        self.samples = samples
+        self.cap = maximum
+        self.size = self._clamp(initial)
+        self.best_size = self.size
+        self.best_rate = 0.0
+        self.step = COARSE_STEP
+        self.direction = 1
+        self.slowest = 0.0
+        self.errors = Counter()
+        self.history = [self.size]
+        self._measured = []
+
+    def _clamp(self, size):
+        # Two significant figures: 11952 and 11953 are the same choice, and 12000 reads better in a log
+        size = round(size, 1 - int(math.log10(max(size, 1))))
+        return int(min(max(size, self.minimum), self.cap, self.maximum))
+
+    def _move(self, size):
+        self.size = self._clamp(size)
+        self._measured = []
+        if self.size != self.history[-1]:
+            self.history.append(self.size)
+
+    def record(self, rows, seconds):
+        """Report one insert of `rows` rows that took `seconds`"""
+        if rows <= 0:
+            return
+        seconds = max(seconds, 1e-6)
+        self.slowest = max(self.slowest, seconds)
+        if seconds > self.latency_ceiling:
+            # Assume latency grows with the batch: cap at the size that should just fit, and back off below it
+            self.cap = max(self.minimum, int(rows * self.latency_ceiling / seconds))
+            self.best_size = min(self.best_size, self.cap)
+            self.direction = -1
+            self._move(self.cap * 0.8)
+            return
+        self._measured.append((rows, seconds))
+        if len(self._measured) < self.samples:
+            return
+
+        rate = sum(r for r, _ in self._measured) / sum(s for _, s in self._measured)
+        self.best_rate *= BEST_RATE_DECAY
+        if rate >= self.best_rate:
+            self.best_size, self.best_rate = self.size, rate
+            target = self.size * self.step ** self.direction
+            if self._clamp(target) == self.size:
+                # Pinned against a bound: look the other way next
+                self.direction = -self.direction
+            self._move(target)
+        else:
+            # Past the peak: turn around from the best size with a finer step
+            self.direction = -self.direction
+            self.step = max(FINE_STEP, math.sqrt(self.step))
+            self._move(self.best_size * self.step ** self.direction)
+
+    def record_error(self, kind):
+        """Shrink after a lock wait, deadlock or oversized packet"""
+        self.errors[kind] += 1
+        self.cap = max(self.minimum, self.size // 2)
+        self.best_size = min(self.best_size, self.cap)
+        self.best_rate = 0.0
+        self.direction = -1
+        self.step = COARSE_STEP
+        self._move(self.cap)
+
+    def summary(self):
+        """The size to pin for this table, with the measurements behind it"""
+        return {
+            'chunk_size': self.best_size,
+            'chunk_rows_per_second': round(self.best_rate, 1),
+            'chunk_max_latency': round(self.slowest, 3)
+        }
+
+    def describe(self):
+        """One line on the chosen size and how the search got there"""
+        path = ' -> '.join(str(size) for size in self.history[-12:])
+        if len(self.history) > 12:
+            path = '... -> ' + path
+        errors = ''.join(f", {count} {kind} errors" for kind, count in self.errors.items())
+        return (f"{self.table_name}: chose {self.best_size} rows per insert (~{self.best_rate:,.0f} rows/s, "
+                f"slowest insert {self.slowest:.2f}s of {self.latency_ceiling:.2f}s allowed{errors}); "
+                f"sizes tried: {path}")
+
+class Rechunker:
+    """Cuts a stream of DataFrames into batches of controller.size rows
+
+    The size is read again before every batch, so each batch follows the
+    controller's latest decision. A batch that failed can be handed back
+    with push_back() and is cut again at the new size.
+    """
+
+    def __init__(self, chunks, controller):
+        self.chunks = chunks
+        self.controller = controller
+        self._pending = []
+        self._count = 0
+
+    def push_back(self, batch):
+        """Put a batch back at the front, to be cut again"""
+        self._pending.insert(0, batch)
+        self._count += len(batch)
+
+    def _take(self, size):
+        frame = pd.concat(self._pending) if len(self._pending) > 1 else self._pending[0]
+        batch, rest = frame.iloc[:size], frame.iloc[size:]
+        self._pending = [rest] if len(rest) else []
+        self._count = len(rest)
+        return batch
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            if chunk.empty:
+                continue
+            self._pending.append(chunk)
+            self._count += len(chunk)
+            while self._count >= self.controller.size:
+                yield self._take(self.controller.size)
+        while self._count:
+            yield self._take(self.controller.size)
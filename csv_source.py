@@ -0,0 +1,258 @@
+"""Plain and compressed CSV files for the V1 and V2 import scripts.
+
+Datasets may ship as .csv, .csv.gz, .csv.bz2 or .csv.zst (zstandard is an
+optional dependency, only needed for .zst). Compressed files are always
+decompressed as a stream: the parser decompresses while it reads, and the
+helpers here read just the head of the decompressed data to sniff encodings
+and estimate row counts, so no uncompressed copy is ever written to disk.
+
+Files are parsed either by pandas' C parser or, with the 'pyarrow' engine,
+by Arrow's multithreaded CSV reader over a memory-mapped file. Parquet
+files, such as the ones export_data.py writes, are read with pyarrow one
+record batch at a time and can be imported in place of CSVs.
+"""
+import os
+import io
+import bz2
+import csv
+import glob
+import gzip
+import zlib
+import pandas as pd
+
+# Compression suffix -> pandas' compression name
+COMPRESSIONS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.zst': 'zstd'
+}
+
+CSV_SUFFIXES = ['.csv'] + ['.csv' + suffix for suffix in COMPRESSIONS]
+
+PARQUET_SUFFIX = '.parquet'
+
+# CSV parser engines: pandas' C parser, or Arrow's multithreaded reader
+PARSER_ENGINES = ('c', 'pyarrow')
+DEFAULT_PARSER_ENGINE = 'c'
+
+# Bytes per block handed to an Arrow parser thread
+ARROW_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Compressed bytes fed to the decompressor at a time when sampling
+_READ_SIZE = 16 * 1024
+
+def csv_compression(csv_file):
+    """The compression of a CSV file from its suffix ('gzip', 'bz2', 'zstd'), or None"""
+    return COMPRESSIONS.get(os.path.splitext(csv_file)[1].lower())
+
+def is_parquet(csv_file):
+    """Whether a data file is Parquet rather than CSV"""
+    return csv_file.lower().endswith(PARQUET_SUFFIX)
+
+def csv_stem(csv_file):
+    """File name without the .csv and compression suffixes: data/movies.csv.gz -> movies"""
+    name = os.path.basename(csv_file)
+    if is_parquet(name):
+        return name[:-len(PARQUET_SUFFIX)]
+    if csv_compression(name):
+        name = os.path.splitext(name)[0]
+    if name.lower().endswith('.csv'):
+        name = name[:-4]
+    return name
+
+def list_csv_files(folder_path):
+    """All plain and compressed CSV files under a folder, recursively, and Parquet files
+
+    When both movies.csv and movies.csv.gz exist only the plain file is
+    returned, so the same data is never imported twice. Likewise a
+    movies.parquet next to any movies CSV is skipped.
+    """
+    found = set()
+    for suffix in CSV_SUFFIXES + [PARQUET_SUFFIX]:
+        found.update(glob.glob(os.path.join(folder_path, "**", "*" + suffix), recursive=True))
+    csv_stems = {os.path.join(os.path.dirname(path), csv_stem(path)) for path in found if not is_parquet(path)}
+    csv_files = []
+    for csv_file in sorted(found):
+        if csv_compression(csv_file) and os.path.splitext(csv_file)[0] in found:
+            print(f"⚠️  Skipping {csv_file}: {os.path.basename(os.path.splitext(csv_file)[0])} is next to it")
+            continue
+        if is_parquet(csv_file) and os.path.join(os.path.dirname(csv_file), csv_stem(csv_file)) in csv_stems:
+            print(f"⚠️  Skipping {csv_file}: a {csv_stem(csv_file)} CSV is next to it")
+            continue
+        csv_files.append(csv_file)
+    return csv_files
+
+def _decompressor(compression):
+    """A fresh incremental decompressor with a decompress(bytes) method"""
+    if compression == 'gzip':
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    if compression == 'bz2':
+        return bz2.BZ2Decompressor()
+    import zstandard
+    return zstandard.ZstdDecompressor().decompressobj()
+
+def open_csv_binary(csv_file):
+    """Open a CSV file for reading bytes, decompressing on the fly"""
+    compression = csv_compression(csv_file)
+    if compression == 'gzip':
+        return gzip.open(csv_file, 'rb')
+    if compression == 'bz2':
+        return bz2.open(csv_file, 'rb')
+    if compression == 'zstd':
+        import zstandard
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(csv_file, 'rb'), closefd=True))
+    return open(csv_file, 'rb')
+
+def open_csv_text(csv_file, encoding='utf-8', errors='strict'):
+    """Open a CSV file for reading text, decompressing on the fly"""
+    return io.TextIOWrapper(open_csv_binary(csv_file), encoding=encoding, errors=errors, newline='')
+
+def sample_csv_head(csv_file, sample_size):
+    """Decompress the start of a CSV file
+
+    Returns (data, compressed_bytes, complete): at least sample_size bytes
+    of CSV text (unless the file is shorter), how many bytes of the file were
+    consumed to produce them, and whether data is the whole file.
+    """
+    compression = csv_compression(csv_file)
+    if compression is None:
+        with open(csv_file, 'rb') as f:
+            data = f.read(sample_size)
+        return data, len(data), len(data) == os.path.getsize(csv_file)
+
+    decompressor = _decompressor(compression)
+    parts = []
+    produced = 0
+    consumed = 0
+    with open(csv_file, 'rb') as f:
+        while produced < sample_size:
+            block = f.read(_READ_SIZE)
+            if not block:
+                break
+            consumed += len(block)
+            part = decompressor.decompress(block)
+            parts.append(part)
+            produced += len(part)
+            # Another gzip member or zstd frame may follow; only the first is sampled
+            if getattr(decompressor, 'eof', False) and decompressor.unused_data:
+                consumed -= len(decompressor.unused_data)
+                break
+    return b''.join(parts), consumed, consumed == os.path.getsize(csv_file)
+
+def estimate_csv_size(csv_file, sample_size=1024 * 1024):
+    """Estimate the uncompressed size of a CSV file from the ratio of a decompressed sample"""
+    if is_parquet(csv_file):
+        metadata = _parquet_file(csv_file).metadata
+        return sum(metadata.row_group(i).total_byte_size for i in range(metadata.num_row_groups))
+    if csv_compression(csv_file) is None:
+        return os.path.getsize(csv_file)
+    data, consumed, complete = sample_csv_head(csv_file, sample_size)
+    if complete or consumed == 0:
+        return len(data)
+    return int(os.path.getsize(csv_file) * len(data) / consumed)
+
+def csv_header(csv_file, encoding='utf-8'):
+    """Column names from the first row of a CSV file, or a Parquet file's schema"""
+    if is_parquet(csv_file):
+        return _parquet_file(csv_file).schema_arrow.names
+    sample = sample_csv_head(csv_file, 64 * 1024)[0]
+    return next(csv.reader(io.StringIO(sample.decode(encoding, errors='replace'))), [])
+
+def _arrow_input(csv_file):
+    """Arrow input for a CSV file: memory-mapped when plain, a decompressing stream otherwise"""
+    import pyarrow as pa
+    if csv_compression(csv_file) is None:
+        return pa.memory_map(csv_file)
+    return pa.input_stream(csv_file, compression='detect')
+
+def read_csv_arrow(csv_file, chunk_size, encoding='utf-8', as_text=False, bad_rows=None):
+    """Parse a CSV file with Arrow's multithreaded reader, yielding DataFrames of chunk_size rows
+
+    Blocks of the file are parsed and converted in parallel. With as_text
+    every column is read as a string and empty fields become NaN (the same
+    as pandas' dtype=str, na_values=['']), streaming one block at a time.
+    Otherwise column types are inferred over the whole file, like pandas'
+    low_memory=False, with pandas' rules: only True/False are booleans and
+    dates stay text. Rows with the wrong number of fields are skipped, short
+    ones included (the C parser pads those); if bad_rows is a list, a
+    (line, expected fields, actual fields, text) tuple is appended for each.
+    Chunks keep a running index across the file, as pandas' chunks do.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    def skip_row(row):
+        if bad_rows is not None:
+            bad_rows.append((row.number, row.expected_columns, row.actual_columns, row.text))
+        return 'skip'
+
+    if encoding.lower().replace('-', '') in ('utf8', 'ascii'):
+        encoding = 'utf8'  # Arrow's own decoder; anything else is transcoded through Python codecs
+    read_options = pa_csv.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_SIZE, encoding=encoding)
+    # Quoted fields may span lines, as the C parser allows
+    parse_options = pa_csv.ParseOptions(newlines_in_values=True, invalid_row_handler=skip_row)
+    if as_text:
+        columns = csv_header(csv_file, encoding)
+        convert_options = pa_csv.ConvertOptions(column_types={column: pa.string() for column in columns},
+                                                strings_can_be_null=True, null_values=[''])
+        reader = pa_csv.open_csv(_arrow_input(csv_file), read_options=read_options,
+                                 parse_options=parse_options, convert_options=convert_options)
+        schema, batches = reader.schema, reader
+    else:
+        # A NUL format never matches, which turns timestamp inference off
+        convert_options = pa_csv.ConvertOptions(timestamp_parsers=['\0'], true_values=['True', 'TRUE', 'true'],
+                                                false_values=['False', 'FALSE', 'false'])
+        table = pa_csv.read_csv(_arrow_input(csv_file), read_options=read_options,
+                                parse_options=parse_options, convert_options=convert_options)
+        # Dates and times are still inferred; give them back as the text they were
+        temporal = [i for i, field in enumerate(table.schema)
+                    if pa.types.is_date(field.type) or pa.types.is_time(field.type)]
+        for i in temporal:
+            table = table.set_column(i, table.schema[i].name, table.column(i).cast(pa.string()))
+        schema, batches = table.schema, table.to_batches()
+
+    start = 0
+    pending = []
+    pending_rows = 0
+    for batch in batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunk_size:
+            table = pa.Table.from_batches(pending, schema=schema)
+            chunk = table.slice(0, chunk_size).to_pandas()
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            rest = table.slice(chunk_size)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+            yield chunk
+    if pending_rows:
+        chunk = pa.Table.from_batches(pending, schema=schema).to_pandas()
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        yield chunk
+
+def _parquet_file(path):
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(path)
+
+def parquet_rows(path):
+    """Row count of a Parquet file, from its footer"""
+    return _parquet_file(path).metadata.num_rows
+
+def read_parquet(path, chunk_size, as_text=False):
+    """Read a Parquet file one record batch at a time, yielding DataFrames of up to chunk_size rows
+
+    With as_text every column is cast to its text form, as a CSV export
+    would hold it (dates and timestamps in ISO format, booleans as
+    true/false), with NaN for nulls; otherwise columns keep their Parquet
+    types. Chunks keep a running index across the file.
+    """
+    import pyarrow as pa
+    start = 0
+    for batch in _parquet_file(path).iter_batches(batch_size=chunk_size):
+        if as_text:
+            batch = pa.RecordBatch.from_arrays([column.cast(pa.string()) for column in batch.columns],
+                                               names=batch.schema.names)
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
@@ -0,0 +1,215 @@
+"""Shared MySQL connection pool and SQLAlchemy engine for the V1 and V2 scripts.
+
+Settings are read from db_config.ini (or the file named by SRM_DB_CONFIG)
+and can be overridden with SRM_DB_<SETTING> environment variables, e.g.
+SRM_DB_PASSWORD or SRM_DB_POOL_SIZE. See db_config.example.ini.
+With backend = sqlite the V2 schema and importer use a local SQLite file
+per database instead of a server; see sqlite_backend.py.
+"""
+import os
+import time
+import threading
+import configparser
+import mysql.connector
+from mysql.connector import Error, pooling
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+
+DEFAULT_CONFIG = {
+    'backend': 'mysql',       # 'mysql' or 'sqlite'
+    'sqlite_dir': '',         # folder for <database>.sqlite3 files, default the repository root
+    'host': 'localhost',
+    'port': 3306,
+    'user': 'ali',
+    'password': 'admin',
+    'database': 'SRM_STEP',   # used by the V2 scripts
+    'v1_database': 'UNOX',    # used by the V1 scripts
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_timeout': 30,
+    'connect_timeout': 10,
+    'pool_recycle': 3600,
+    'use_pure': False,        # False uses the C extension when it is installed
+    'compress': False
+}
+
+CONFIG_FILE = os.environ.get('SRM_DB_CONFIG',
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db_config.ini'))
+
+_config = None
+_pools = {}
+_engines = {}
+_lock = threading.Lock()
+
+def _convert(value, default):
+    """Convert a config string to the type of its default value"""
+    if isinstance(default, bool):
+        return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+    if isinstance(default, int):
+        return int(value)
+    return value
+
+def load_db_config(reload=False):
+    """Load connection settings: defaults, then the config file, then environment"""
+    global _config
+    if _config is not None and not reload:
+        return _config
+
+    config = dict(DEFAULT_CONFIG)
+    parser = configparser.ConfigParser()
+    if parser.read(CONFIG_FILE) and parser.has_section('database'):
+        for key, value in parser.items('database'):
+            if key in config:
+                config[key] = _convert(value, DEFAULT_CONFIG[key])
+    for key in config:
+        value = os.environ.get(f'SRM_DB_{key.upper()}')
+        if value is not None:
+            config[key] = _convert(value, DEFAULT_CONFIG[key])
+    _config = config
+    return config
+
+def is_sqlite():
+    """True when the configured backend is the embedded SQLite one"""
+    return load_db_config()['backend'].strip().lower() == 'sqlite'
+
+def sqlite_path(database=None):
+    """Path of the SQLite file that holds a database"""
+    config = load_db_config()
+    folder = config['sqlite_dir'] or os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(folder, f"{database or config['database']}.sqlite3")
+
+def _connect_args(config):
+    """Keyword arguments shared by pooled connections and the engine"""
+    return {
+        'charset': 'utf8mb4',
+        'use_unicode': True,
+        'use_pure': config['use_pure'],
+        'compress': config['compress'],
+        'connection_timeout': config['connect_timeout']
+    }
+
+def _get_pool(database):
+    """Get or create the connection pool for a database ('' for no database)"""
+    with _lock:
+        pool = _pools.get(database)
+        if pool is None:
+            config = load_db_config()
+            kwargs = _connect_args(config)
+            if database:
+                kwargs['database'] = database
+            pool = pooling.MySQLConnectionPool(
+                pool_name=f"srm_{database or 'server'}",
+                # mysql.connector caps pools at CNX_POOL_MAXSIZE connections
+                pool_size=max(1, min(config['pool_size'], pooling.CNX_POOL_MAXSIZE)),
+                host=config['host'],
+                port=config['port'],
+                user=config['user'],
+                password=config['password'],
+                **kwargs
+            )
+            _pools[database] = pool
+        return pool
+
+def get_connection(database=None):
+    """Borrow a pooled connection; close() hands it back to the pool
+
+    `database` defaults to the configured V2 database. Pass '' to connect to
+    the server without selecting a database. Waits up to pool_timeout seconds
+    for a free connection before raising PoolError.
+    """
+    if database is None:
+        database = load_db_config()['database']
+    if is_sqlite():
+        # A file database has no server to pool connections to; opening one is cheap
+        from sqlite_backend import SQLiteConnection
+        return SQLiteConnection(sqlite_path(database))
+    pool = _get_pool(database)
+    deadline = time.monotonic() + load_db_config()['pool_timeout']
+    while True:
+        try:
+            return pool.get_connection()
+        except pooling.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+
+def open_connection(database=None):
+    """Open a dedicated connection outside the pool, e.g. one per load-test client
+
+    The caller owns it; close() really disconnects.
+    """
+    config = load_db_config()
+    if database is None:
+        database = config['database']
+    if is_sqlite():
+        from sqlite_backend import SQLiteConnection
+        return SQLiteConnection(sqlite_path(database))
+    kwargs = _connect_args(config)
+    if database:
+        kwargs['database'] = database
+    return mysql.connector.connect(
+        host=config['host'],
+        port=config['port'],
+        user=config['user'],
+        password=config['password'],
+        **kwargs
+    )
+
+def create_connection(database=None):
+    """Borrow a pooled connection, printing the error and returning None on failure"""
+    try:
+        connection = get_connection(database)
+        if is_sqlite():
+            print(f"SQLite/{connection.path} connection successful")
+            return connection
+        print(f"MySQL{'/' + connection.database if connection.database else ''} connection successful")
+        return connection
+    except Error as e:
+        print(f"The error '{e}' occurred")
+        return None
+
+def get_engine(database=None, bulk_load=False):
+    """Get the process-wide SQLAlchemy engine for a database
+
+    On SQLite, bulk_load=True gives a separate engine whose connections
+    skip fsync and foreign key checks (sqlite_backend.LOAD_PRAGMAS); only
+    the importer's inserts should use it. MySQL has one engine either way.
+    """
+    config = load_db_config()
+    if database is None:
+        database = config['database']
+    sqlite = is_sqlite()
+    key = (database, 'bulk_load') if sqlite and bulk_load else database
+    with _lock:
+        engine = _engines.get(key)
+        if engine is None and sqlite:
+            from sqlite_backend import create_sqlite_engine, CONNECTION_PRAGMAS, LOAD_PRAGMAS
+            engine = _engines[key] = create_sqlite_engine(sqlite_path(database),
+                                                          LOAD_PRAGMAS if bulk_load else CONNECTION_PRAGMAS)
+        if engine is None:
+            url = URL.create(
+                'mysql+mysqlconnector',
+                username=config['user'],
+                password=config['password'],
+                host=config['host'],
+                port=config['port'],
+                database=database or None
+            )
+            engine = create_engine(
+                url,
+                pool_size=config['pool_size'],
+                max_overflow=config['max_overflow'],
+                pool_timeout=config['pool_timeout'],
+                pool_recycle=config['pool_recycle'],
+                pool_pre_ping=True,
+                connect_args=_connect_args(config)
+            )
+            _engines[database] = engine
+        return engine
+
+def dispose_all():
+    """Dispose every engine, e.g. after forking worker processes"""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
@@ -0,0 +1,301 @@
+"""Embedded SQLite backend for the V2 schema and importer, selected with backend = sqlite.
+
+The database is a single file per database name, so loads, tests and
+analytics need no MySQL server. Connections are wrapped so the scripts'
+MySQL-style SQL keeps working: %s placeholders become ?, backtick quoting
+is native to SQLite, DESCRIBE is answered from PRAGMA table_info, and
+errors are raised as mysql.connector's Error. Dates, decimals and booleans
+read back as the same Python types mysql.connector returns. MySQL DDL is
+translated by translate_ddl(). The importer's bulk loads run in WAL mode
+with synchronous=OFF and foreign keys off, and insert with executemany()
+on one prepared statement; every other connection keeps synchronous=NORMAL
+and foreign keys on.
+"""
+import re
+import sqlite3
+import decimal
+import datetime
+import numpy as np
+import pandas as pd
+from mysql.connector import Error
+
+# Settings for every connection unless asked otherwise: WAL lets readers run during a load
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON"
+)
+
+# Settings for the importer's bulk-load connections only: no fsync at all, so a crash mid-load can
+# lose the load (rerun it), and foreign keys checked once afterwards with foreign_key_violations()
+LOAD_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA foreign_keys = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144"  # KiB, i.e. 256 MB
+)
+
+# Seconds a writer waits for another connection's write lock
+BUSY_TIMEOUT = 30
+
+# Values sqlite3 can't bind natively, stored the way MySQL prints them
+sqlite3.register_adapter(decimal.Decimal, str)
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(sep=' '))
+sqlite3.register_adapter(pd.Timestamp, lambda value: value.isoformat(sep=' '))
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.float64, float)
+sqlite3.register_adapter(np.bool_, bool)
+
+# ...and read back by declared column type, as mysql.connector would return them
+sqlite3.register_converter('DATETIME', lambda value: datetime.datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('DATE', lambda value: datetime.date.fromisoformat(value.decode()[:10]))
+sqlite3.register_converter('DECIMAL', lambda value: decimal.Decimal(value.decode()))
+sqlite3.register_converter('BOOLEAN', lambda value: int(value))
+
+DESCRIBE_RE = re.compile(r"^\s*DESCRIBE\s+`?(\w+)`?\s*;?\s*$", re.IGNORECASE)
+
+def translate_ddl(statement):
+    """Translate a MySQL CREATE TABLE into SQLite statements, returned as one script
+
+    INT AUTO_INCREMENT PRIMARY KEY becomes INTEGER PRIMARY KEY (the rowid),
+    table options such as ENGINE= and ON UPDATE CURRENT_TIMESTAMP are
+    dropped, and inline INDEX/KEY definitions become CREATE INDEX statements.
+    Foreign key columns get an index named after the constraint, as InnoDB
+    creates one for them implicitly.
+    Column types keep their MySQL names, which SQLite maps to the right
+    affinities and which the importer reads back to coerce values.
+    """
+    table = re.search(r"CREATE TABLE (?:IF NOT EXISTS )?`?(\w+)`?", statement, re.IGNORECASE).group(1)
+    lines = []
+    indexes = []
+    for line in statement.strip().splitlines():
+        index = re.match(r"\s*(UNIQUE\s+)?(?:INDEX|KEY)\s+`?(\w+)`?\s*(\([^)]*\)),?\s*$", line, re.IGNORECASE)
+        if index:
+            unique, name, columns = index.groups()
+            indexes.append(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS `{name}` ON `{table}` {columns};")
+            continue
+        foreign_key = re.match(r"\s*CONSTRAINT\s+`?(\w+)`?\s+FOREIGN KEY\s*(\([^)]*\))", line, re.IGNORECASE)
+        if foreign_key:
+            name, columns = foreign_key.groups()
+            indexes.append(f"CREATE INDEX IF NOT EXISTS `{name}` ON `{table}` {columns};")
+        line = re.sub(r"\b\w*INT\s+(?:NOT NULL\s+)?AUTO_INCREMENT\s+PRIMARY KEY", "INTEGER PRIMARY KEY",
+                      line, flags=re.IGNORECASE)
+        line = re.sub(r"\s+AUTO_INCREMENT\b|\s+ON UPDATE CURRENT_TIMESTAMP\b|\s+UNSIGNED\b", "",
+                      line, flags=re.IGNORECASE)
+        line = re.sub(r"^\)\s*ENGINE\s*=.*$", ");", line, flags=re.IGNORECASE)
+        lines.append(line)
+    # Removing an inline index can leave a trailing comma before the closing parenthesis
+    body = re.sub(r",(\s*\n\);)", r"\1", "\n".join(lines))
+    return "\n".join([body] + indexes)
+
+class SQLiteCursor:
+    """DB-API cursor over sqlite3 that accepts the MySQL-style SQL of the scripts"""
+
+    def __init__(self, connection, cursor):
+        self._connection = connection
+        self._cursor = cursor
+        self._rows = None
+
+    @staticmethod
+    def _sql(statement):
+        return statement.replace('%s', '?')
+
+    def execute(self, statement, params=()):
+        self._rows = None
+        describe = DESCRIBE_RE.match(statement)
+        if describe:
+            self._rows = describe_table(self._connection, describe.group(1))
+            return self
+        try:
+            self._cursor.execute(self._sql(statement), params or ())
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+        return self
+
+    def executemany(self, statement, rows):
+        try:
+            self._cursor.executemany(self._sql(statement), rows)
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+        return self
+
+    def fetchone(self):
+        if self._rows is not None:
+            return self._rows.pop(0) if self._rows else None
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return rows
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        size = size or self._cursor.arraysize
+        if self._rows is not None:
+            rows, self._rows = self._rows[:size], self._rows[size:]
+            return rows
+        return self._cursor.fetchmany(size)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+class SQLiteConnection:
+    """sqlite3 connection with the parts of mysql.connector's interface the scripts use"""
+
+    def __init__(self, path, pragmas=CONNECTION_PRAGMAS):
+        self.path = path
+        self.database = path
+        self._connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                                           detect_types=sqlite3.PARSE_DECLTYPES)
+        for pragma in pragmas:
+            self._connection.execute(pragma)
+
+    def cursor(self, buffered=None, prepared=False):
+        # sqlite3 caches prepared statements itself, so prepared= needs nothing here
+        return SQLiteCursor(self._connection, self._connection.cursor())
+
+    def executescript(self, script):
+        """Run several ;-separated statements, such as translated DDL"""
+        try:
+            self._connection.executescript(script)
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def is_connected(self):
+        try:
+            self._connection.execute("SELECT 1")
+            return True
+        except sqlite3.ProgrammingError:
+            return False
+
+    def close(self):
+        self._connection.close()
+
+def create_sqlite_engine(path, pragmas=CONNECTION_PRAGMAS):
+    """SQLAlchemy engine on the database file, with `pragmas` (e.g. LOAD_PRAGMAS) on every connection"""
+    from sqlalchemy import create_engine, event
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={'timeout': BUSY_TIMEOUT, 'check_same_thread': False})
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, _):
+        for pragma in pragmas:
+            dbapi_connection.execute(pragma)
+
+    return engine
+
+def describe_table(connection, table_name):
+    """Rows shaped like MySQL's DESCRIBE (Field, Type, Null, Key, Default, Extra), from PRAGMA table_info
+
+    `connection` is a plain sqlite3 connection.
+    """
+    columns = connection.execute(f"PRAGMA table_info(`{table_name}`)").fetchall()
+    if not columns:
+        raise Error(msg=f"Table '{table_name}' doesn't exist")
+    primary_key = [column for column in columns if column[5]]
+    rows = []
+    for _, name, sql_type, not_null, default, pk in columns:
+        # A lone INTEGER PRIMARY KEY is the rowid, which numbers itself like AUTO_INCREMENT
+        rowid = pk and len(primary_key) == 1 and sql_type.upper() == 'INTEGER'
+        rows.append((name, sql_type.lower() or 'text', 'NO' if not_null or pk else 'YES', 'PRI' if pk else '',
+                     default, 'auto_increment' if rowid else ''))
+    return rows
+
+def table_statistics(connection):
+    """(table, estimated rows, data bytes, index bytes) per table, without counting rows
+
+    Row counts come from the statistics ANALYZE leaves in sqlite_stat1, and
+    sizes from the dbstat table when SQLite was built with it.
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
+    tables = [row[0] for row in cursor.fetchall()]
+    rows = {}
+    try:
+        cursor.execute("SELECT tbl, MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 GROUP BY tbl")
+        rows = dict(cursor.fetchall())
+    except Error:
+        pass  # Nothing analyzed yet
+    data_bytes, index_bytes = {}, {}
+    try:
+        cursor.execute("""
+            SELECT m.tbl_name, m.type, SUM(s.pgsize)
+            FROM dbstat s JOIN sqlite_master m ON m.name = s.name
+            GROUP BY m.tbl_name, m.type
+        """)
+        for table, kind, size in cursor.fetchall():
+            (data_bytes if kind == 'table' else index_bytes)[table] = size
+    except Error:
+        pass  # SQLite built without dbstat
+    cursor.close()
+    return [(table, int(rows.get(table) or 0), int(data_bytes.get(table, 0)), int(index_bytes.get(table, 0)))
+            for table in tables]
+
+def foreign_key_violations(connection):
+    """{(table, referenced table): rows} for rows whose parent row is missing, from PRAGMA foreign_key_check"""
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA foreign_key_check")
+    violations = {}
+    for table, _, parent, _ in cursor.fetchall():
+        violations[(table, parent)] = violations.get((table, parent), 0) + 1
+    cursor.close()
+    return violations
+
+class SQLiteBatchInserter:
+    """Inserts DataFrames into one table with executemany() over a single prepared INSERT
+
+    The counterpart of batch_insert.PacketBatchInserter: SQLite runs in
+    process, so there is no packet to fill, and reusing one statement for
+    every row is the fastest way in. Nothing is committed here.
+    """
+
+    def __init__(self, connection, table_name, columns):
+        # A plain sqlite3 connection, e.g. the driver connection of an SQLAlchemy engine
+        self.connection = connection
+        self.table_name = table_name
+        self.columns = list(columns)
+        self.statements = 0
+        self.rows = 0
+        self._cursor = connection.cursor()
+        placeholders = ', '.join(['?'] * len(self.columns))
+        column_list = ', '.join(f"`{column}`" for column in self.columns)
+        self.insert_sql = f"INSERT INTO `{table_name}` ({column_list}) VALUES ({placeholders})"
+
+    def insert(self, df):
+        """Insert a DataFrame's rows"""
+        if df.empty:
+            return
+        from batch_insert import to_params
+        try:
+            self._cursor.executemany(self.insert_sql, to_params(df[self.columns]).tolist())
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+        self.statements += 1
+        self.rows += len(df)
+
+    def flush(self):
+        """Nothing is buffered; here for PacketBatchInserter's interface"""
+
+    def close(self):
+        self._cursor.close()